@@ -4,6 +4,30 @@ from flask import Flask
 def create_app():
     app = Flask(__name__, instance_relative_config=True)
 
+    # Budgets des recherches de chemin (secondes, noeuds développés, workers du pool)
+    app.config.from_mapping(
+        PATHFINDING_TIME_LIMIT=10.0,
+        PATHFINDING_MAX_EXPANSIONS=2_000_000,
+        PATHFINDING_WORKERS=4,
+        # Chemins calculés sur la roadmap (squelette de l'espace libre) quand elle est disponible,
+        # l'A* servant de repli. Désactivé par défaut : plus rapides, ces chemins ne sont pas
+        # les plus courts (environ 15 % plus longs) et sont enregistrés avec les POIs
+        ROADMAP_ENABLED=False,
+        # Planification coopérative d'une flotte de karts
+        FLEET_PLANNING_TIME_LIMIT=2.0,
+        FLEET_MAX_EXPANSIONS_PER_KART=200_000,
+        # Profilage des requêtes : échantillonnage si PROFILING_ENABLED, et en-tête X-Profile: 1
+        # accepté seulement si PROFILING_HEADER_ENABLED ou en mode debug (sinon n'importe quel
+        # client pourrait faire profiler ses requêtes)
+        PROFILING_ENABLED=False,
+        PROFILING_HEADER_ENABLED=False,
+        PROFILING_SAMPLE_RATE=0.01,
+        PROFILING_SLOW_THRESHOLD=1.0,
+        PROFILING_INTERVAL=0.005,
+        PROFILING_DIR="data/profiles",
+        PROFILING_MAX_BYTES=100 * 1024 * 1024,
+    )
+
     # Pour éviter les import circulaires
     from . import routes
     app.register_blueprint(routes.bp)
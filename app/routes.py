@@ -1,18 +1,78 @@
 import os
+import random
+import time
 
 import numpy as np
-from flask import Blueprint, redirect, url_for, render_template, request, send_from_directory, jsonify
+from flask import Blueprint, redirect, url_for, render_template, request, send_from_directory, jsonify, current_app, g
 from plotly.callbacks import Points
 from scipy.interpolate import griddata
 
-from backend.pathfinding.a_star import astar_pathfinding
+from backend import metrics, profiling
+from backend.grid_store import get_grid_shape
+from backend.pathfinding.a_star import PathfindingTimeout, multi_target_pathfinding
+from backend.pathfinding.components import are_connected
+from backend.pathfinding import cooperative
+from backend.pathfinding.executor import run_path_query, run_in_pool
+from backend.pathfinding.wavefront import nearest_sources as find_nearest_sources
 from backend.viewer import visualize_occupancy_data, get_map_data
-from backend.utils import list_npz_files, delete_map_files, add_poi_to_map, get_poi_map, delete_poi_from_map, rename_poi_in_map, add_new_path_to_map, add_obstacle_to_map
-from backend.svg_convertor import svg_to_occupancy, save_occupancy_data
+from backend.utils import list_npz_files, delete_map_files, rasterize_map, add_poi_to_map, get_poi_map, delete_poi_from_map, rename_poi_in_map, add_new_path_to_map, add_obstacle_to_map, get_component_labels, get_landmarks, get_obstacle_array, get_roadmap, is_free_cell, import_pois_to_map, parse_poi_records, undo_last_obstacle, get_drawn_obstacles, restore_drawn_obstacles
+from backend.obstacle_journal import get_history, map_lock
+from backend.geometry_cache import get_geometry, get_raster, load_cached_geometry, read_raster_metadata
 
 # Créeation du blueprint pour les routes principales
 bp = Blueprint('main', __name__)
 
+@bp.before_request
+def start_profiling():
+    # Profilage à la demande : en-tête X-Profile, ou tirage aléatoire si PROFILING_ENABLED
+    config = current_app.config
+    header_allowed = config['PROFILING_HEADER_ENABLED'] or current_app.debug
+    forced = header_allowed and request.headers.get('X-Profile', '') in ('1', 'true')
+    sampled = config['PROFILING_ENABLED'] and random.random() < config['PROFILING_SAMPLE_RATE']
+    if forced or sampled:
+        g.profile = profiling.start_request_profile(config['PROFILING_INTERVAL'])
+        g.profile_forced = forced
+
+@bp.after_request
+def save_profiling(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profiling.finish_request_profile(profile)
+
+    # Seules les requêtes lentes sont enregistrées (toujours si demandé par l'en-tête)
+    config = current_app.config
+    if not g.profile_forced and profile.duration < config['PROFILING_SLOW_THRESHOLD']:
+        return response
+
+    tags = {
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code
+    }
+    map_name = (request.view_args or {}).get('map_name')
+    if map_name:
+        tags['map_name'] = map_name
+        try:
+            height, width = get_grid_shape(os.path.join("data/NPZ-output", f"{map_name}.npz"))
+            tags['grid_size'] = f"{height}x{width}"
+        except Exception:
+            pass
+    try:
+        base_path = profile.save(config['PROFILING_DIR'], tags, config['PROFILING_MAX_BYTES'])
+        response.headers['X-Profile-Id'] = os.path.basename(base_path)
+    except Exception as e:
+        print(f"Erreur lors de l'enregistrement du profil : {str(e)}")
+    return response
+
+@bp.teardown_request
+def stop_profiling(exception=None):
+    # Si la vue a levé une exception, after_request n'est pas appelé : on libère le profileur
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiling.finish_request_profile(profile)
+
 # Route à la racine
 @bp.route('/')
 def home():
@@ -63,22 +123,112 @@ def upload_and_process_svg():
     try:
         upload_path = os.path.join(svg_directory, file.filename)
         file.save(upload_path)
+        map_name = os.path.splitext(file.filename)[0]
+        output_path = os.path.join(npz_directory, map_name + ".npz")
+
+        # Géométrie du SVG : analysée une seule fois par contenu (cache par empreinte)
+        fill_closed = 'fill_closed' in request.form
+        svg_hash, geometry, _ = get_geometry(upload_path)
+        params = {'svg_hash': svg_hash, 'resolution': 20.0, 'samples_per_segment': 500, 'fill_closed': fill_closed}
 
-        # Traite le fichier SVG
-        grid, bounds = svg_to_occupancy(upload_path)
-        output_path = os.path.join(npz_directory, os.path.splitext(file.filename)[0] + ".npz")
-        save_occupancy_data(grid, bounds, output_path)
+        # Même fichier déjà importé avec les mêmes paramètres : la carte (et ses POIs) est gardée telle quelle
+        if os.path.exists(output_path) and read_raster_metadata(output_path) == params:
+            metrics.increment('geometry_cache.duplicate_uploads')
+            return redirect(url_for('main.home'))
 
-        # Génère et sauvegarde une preview PNG
-        from backend.viewer import generate_plot_preview  # Import local pour éviter les dépendances circulaires
-        preview_path = os.path.join(preview_directory, os.path.splitext(file.filename)[0] + ".png")
-        generate_plot_preview(grid, bounds, preview_path)
+        # Traite le fichier SVG (option : remplir l'intérieur des formes fermées) ; une carte
+        # existante est remplacée d'un coup, sous son verrou
+        rasterize_map(output_path, svg_hash, geometry, params['resolution'], params['samples_per_segment'], fill_closed,
+                      roadmap=current_app.config['ROADMAP_ENABLED'])
 
         # Redirige vers la page d'accueil après le traitement
         return redirect(url_for('main.home'))
     except Exception as e:
         return f"Error processing SVG: {str(e)}", 500
 
+@bp.route('/rerasterize/<map_name>', methods=['POST'])
+def rerasterize(map_name):
+    # Nouvelle rastérisation d'une carte sans relire le SVG : {"resolution", "samples_per_segment", "fill_closed"}
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+    if not os.path.exists(file_path):
+        return jsonify({'success': False, 'message': 'Carte introuvable'}), 404
+
+    data = request.get_json(silent=True) or {}
+    previous = read_raster_metadata(file_path)
+    try:
+        if previous is not None:
+            svg_hash = previous['svg_hash']
+            geometry = load_cached_geometry(svg_hash)
+        else:
+            svg_hash, geometry = None, None
+        if geometry is None:
+            # Carte antérieure au cache ou cache vidé : le SVG d'origine est analysé une fois
+            svg_path = os.path.join("data/SVG-input", f"{map_name}.svg")
+            if not os.path.exists(svg_path):
+                return jsonify({'success': False, 'message': 'SVG source introuvable'}), 404
+            svg_hash, geometry, _ = get_geometry(svg_path)
+
+        old_resolution = previous['resolution'] if previous is not None else 20.0
+        resolution = float(data.get('resolution', old_resolution))
+        samples_per_segment = int(data.get('samples_per_segment', previous['samples_per_segment'] if previous else 500))
+        fill_closed = bool(data.get('fill_closed', previous['fill_closed'] if previous else False))
+        if resolution <= 0 or samples_per_segment <= 0:
+            raise ValueError("la résolution et le nombre d'échantillons doivent être positifs")
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f"Paramètres invalides : {str(e)}"}), 400
+
+    # Les POIs sont replacés à la nouvelle échelle et les chemins recalculés sur la nouvelle
+    # carte avant sa mise en place : le verrou reste pris jusque-là, pour qu'aucune édition
+    # ne s'intercale
+    with map_lock(file_path):
+        pois = get_poi_map(file_path)
+        # Obstacles ajoutés à la main : la nouvelle carte repart d'un stockage vide, ils sont rejoués
+        raster = None
+        if previous is not None and previous['svg_hash'] == svg_hash:
+            raster, _, _ = get_raster(svg_hash, geometry, old_resolution, previous['samples_per_segment'], previous['fill_closed'])
+        old_shape, drawn = get_drawn_obstacles(file_path, raster)
+
+        def place_pois(staging_path):
+            restore_drawn_obstacles(staging_path, drawn, old_shape)
+            grid = get_obstacle_array(staging_path)
+            height, width = grid.shape
+            scale = resolution / old_resolution
+
+            accepted, rejected = [], []
+            for poi in pois:
+                record = dict(poi, x=poi['x'] * scale, y=poi['y'] * scale)
+                col, row = int(round(record['x'])), int(round(record['y']))
+                if not (0 <= col < width and 0 <= row < height) or grid[row, col]:
+                    rejected.append({'name': record['name'], 'reason': 'obstacle'})
+                else:
+                    accepted.append(record)
+
+            start_point = next((record for record in accepted if record['type'] == 'start'), None)
+            paths = {}
+            if start_point is not None:
+                # Pas encore de roadmap pour la nouvelle grille
+                accepted, unrouted, paths = route_end_points(staging_path, start_point, accepted, use_roadmap=False)
+                rejected.extend(unrouted)
+            # POIs et chemins écrits avec la carte : un échec laisse l'ancienne carte en place
+            if accepted and not import_pois_to_map(staging_path, accepted, paths):
+                raise RuntimeError("l'import des POIs a échoué")
+            return accepted, rejected, paths
+
+        try:
+            grid, _, (accepted, rejected, paths) = rasterize_map(
+                file_path, svg_hash, geometry, resolution, samples_per_segment, fill_closed,
+                prepare=place_pois, roadmap=current_app.config['ROADMAP_ENABLED']
+            )
+        except Exception as e:
+            return jsonify({'success': False, 'message': f"Erreur lors de la rastérisation : {str(e)}"}), 500
+    return jsonify({
+        'success': True,
+        'grid_size': list(grid.shape),
+        'pois': len(accepted),
+        'routes': len(paths),
+        'rejected': rejected
+    })
+
 @bp.route('/delete_map/<map_name>', methods=['POST'])
 def delete_map(map_name):
     try:
@@ -88,10 +238,69 @@ def delete_map(map_name):
     except Exception as e:
         return f"Error deleting map: {str(e)}", 500
 
+def enabled_roadmap(file_path):
+    """
+    Roadmap d'une carte si elle est activée : sinon elle n'est ni chargée ni calculée.
+    """
+    return get_roadmap(file_path) if current_app.config['ROADMAP_ENABLED'] else None
+
+def roadmap_route(roadmap, grid, start_coords, end_coords):
+    """
+    Calcule un chemin sur la roadmap de la carte, si elle est disponible et activée.
+
+    Returns:
+        list: Chemin [(x, y), ...], ou None si l'A* doit prendre le relais
+    """
+    if roadmap is None or not current_app.config['ROADMAP_ENABLED']:
+        return None
+    started_at = time.monotonic()
+    path = roadmap.query(grid, start_coords, end_coords)
+    metrics.observe('roadmap.duration', time.monotonic() - started_at)
+    metrics.increment('roadmap.hits' if path else 'roadmap.misses')
+    return path
+
+def compute_route(grid, labels, start_coords, end_coords, landmarks=None, roadmap=None):
+    """
+    Calcule le chemin entre deux points : sur la roadmap si possible, sinon dans le pool
+    de recherche, avec les budgets configurés.
+
+    Returns:
+        tuple: (chemin, erreur) où erreur vaut None, 'unreachable', 'timeout' ou 'no_path'
+    """
+    # Rejet immédiat si les deux points sont dans des zones non connectées
+    if labels is not None and not are_connected(labels, start_coords, end_coords):
+        metrics.increment('pathfinding.unreachable')
+        return [], 'unreachable'
+
+    path = roadmap_route(roadmap, grid, start_coords, end_coords)
+    if path:
+        return path, None
+
+    try:
+        path = run_path_query(
+            grid, start_coords, end_coords,
+            time_limit=current_app.config['PATHFINDING_TIME_LIMIT'],
+            max_expansions=current_app.config['PATHFINDING_MAX_EXPANSIONS'],
+            max_workers=current_app.config['PATHFINDING_WORKERS'],
+            landmarks=landmarks
+        )
+    except PathfindingTimeout as e:
+        print(f"Recherche de chemin interrompue : {str(e)}")
+        return [], 'timeout'
+    return path, None if path else 'no_path'
+
 @bp.route('/add_poi/<map_name>', methods=['POST'])
 def add_poi(map_name):
     data = request.get_json()
     file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+
+    # Refuse un point posé sur un obstacle (contour ou intérieur d'une forme pleine)
+    if not is_free_cell(file_path, data['x'], data['y']):
+        return jsonify({'success': False, 'message': "Le point est placé sur un obstacle."})
+
+    # Les noms de points sont uniques dans une carte
+    if any(poi['name'] == data.get('name', 'Point') for poi in get_poi_map(file_path)):
+        return jsonify({'success': False, 'message': "Un point porte déjà ce nom."})
     
     success = add_poi_to_map(
         file_path,
@@ -115,8 +324,17 @@ def add_poi(map_name):
         
         # Si on a un point de départ, on effectue le pathfinding
         if start_point is not None:
-            grid, start_coords, end_coords = get_map_data(file_path, start_point["name"], data.get('name', 'Point'))
-            path = astar_pathfinding(grid, start_coords, end_coords)
+            _, start_coords, end_coords = get_map_data(file_path, start_point["name"], data.get('name', 'Point'))
+
+            # La recherche lit les voisins case par case : tableau NumPy plutôt que lecture tuile par tuile
+            path, error = compute_route(get_obstacle_array(file_path), get_component_labels(file_path), start_coords, end_coords,
+                                        landmarks=get_landmarks(file_path), roadmap=enabled_roadmap(file_path))
+            if error == 'unreachable':
+                delete_poi_from_map(file_path, data.get('name', 'Point'))
+                return jsonify({'success': False, 'message': "Le point est inaccessible depuis le départ. Le point est supprimé."})
+            if error == 'timeout':
+                delete_poi_from_map(file_path, data.get('name', 'Point'))
+                return jsonify({'success': False, 'timeout': True, 'message': "Le calcul du chemin a dépassé le temps imparti. Le point est supprimé."})
             if not path:
                 delete_poi_from_map(file_path, data.get('name', 'Point'))
                 return jsonify({'success': False, 'message': "Aucun path trouvé. Le point est supprimé."})
@@ -146,6 +364,123 @@ def rename_poi(map_name):
     )
     return jsonify({'success': success})
 
+def route_end_points(file_path, start_point, records, use_roadmap=True):
+    """
+    Calcule les chemins du départ vers les points d'arrivée d'une liste de POIs.
+    Comme pour /add_poi, un point d'arrivée sans chemin n'est pas gardé ; une seule
+    recherche depuis le départ sert à tous les points d'arrivée. Sans use_roadmap, la
+    roadmap de la carte n'est ni lue ni programmée.
+
+    Returns:
+        tuple: (POIs gardés, POIs rejetés [{'name', 'reason'}], chemins {nom du chemin: [(x, y), ...]})
+    """
+    paths = {}
+    unrouted = []
+    labels = get_component_labels(file_path)
+    # La recherche atteint la plupart des tuiles : la grille est chargée en entier une fois
+    grid = get_obstacle_array(file_path)
+    start_coords = (int(round(start_point['x'])), int(round(start_point['y'])))
+    end_coords = {}
+    for record in records:
+        if record['type'] == 'end':
+            end_coords[record['name']] = (int(round(record['x'])), int(round(record['y'])))
+
+    errors = {}
+    for name, coords in end_coords.items():
+        if labels is not None and not are_connected(labels, start_coords, coords):
+            metrics.increment('pathfinding.unreachable')
+            errors[name] = 'unreachable'
+
+    # Chemins sur la roadmap d'abord : l'A* ne traite que les points qu'elle ne relie pas
+    found = {}
+    roadmap = enabled_roadmap(file_path) if use_roadmap else None
+    for name, coords in end_coords.items():
+        if name not in errors and coords not in found:
+            path = roadmap_route(roadmap, grid, start_coords, coords)
+            if path:
+                found[coords] = path
+
+    targets = [coords for name, coords in end_coords.items() if name not in errors and coords not in found]
+    if targets:
+        try:
+            found.update(run_in_pool(
+                multi_target_pathfinding, grid, start_coords, targets,
+                time_limit=current_app.config['PATHFINDING_TIME_LIMIT'],
+                max_expansions=current_app.config['PATHFINDING_MAX_EXPANSIONS'],
+                max_workers=current_app.config['PATHFINDING_WORKERS']
+            ))
+        except PathfindingTimeout as e:
+            print(f"Recherche de chemins interrompue : {str(e)}")
+            errors.update({name: 'timeout' for name, coords in end_coords.items()
+                           if name not in errors and coords not in found})
+
+    routed = []
+    for record in records:
+        if record['type'] == 'end':
+            path = found.get(end_coords[record['name']])
+            if not path:
+                unrouted.append({'name': record['name'], 'reason': errors.get(record['name'], 'no_path')})
+                continue
+            paths["path_to_" + record['name']] = path
+        routed.append(record)
+    return routed, unrouted, paths
+
+@bp.route('/import_pois/<map_name>', methods=['POST'])
+def import_pois(map_name):
+    # Import en masse de POIs : fichier CSV/JSON (champ "poi_file") ou corps JSON
+    # {"pois": [{"name", "type", "x", "y"}, ...], "compute_routes": true}
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+    try:
+        if 'poi_file' in request.files:
+            file = request.files['poi_file']
+            records = parse_poi_records(file.read().decode('utf-8'), file.filename)
+            compute_routes = request.form.get('compute_routes') in ('1', 'true', 'on')
+        else:
+            data = request.get_json()
+            records = parse_poi_records(data.get('pois', []))
+            compute_routes = bool(data.get('compute_routes'))
+    except (ValueError, UnicodeDecodeError, AttributeError) as e:
+        return jsonify({'success': False, 'message': f"Import invalide : {str(e)}"}), 400
+
+    existing = get_poi_map(file_path)
+    names = {poi['name'] for poi in existing}
+    start_point = next((poi for poi in existing if poi['type'] == 'start'), None)
+    grid = get_obstacle_array(file_path)
+    if grid is None:
+        return jsonify({'success': False, 'message': 'Carte introuvable'}), 404
+    height, width = grid.shape
+
+    # Validation de chaque point : nom unique, un seul départ, case libre
+    accepted, rejected = [], []
+    for record in records:
+        col, row = int(round(record['x'])), int(round(record['y']))
+        if record['name'] in names:
+            rejected.append({'name': record['name'], 'reason': 'duplicate'})
+        elif record['type'] == 'start' and start_point is not None:
+            rejected.append({'name': record['name'], 'reason': 'start_exists'})
+        elif not (0 <= col < width and 0 <= row < height) or grid[row, col]:
+            rejected.append({'name': record['name'], 'reason': 'obstacle'})
+        else:
+            accepted.append(record)
+            names.add(record['name'])
+            if record['type'] == 'start':
+                start_point = record
+
+    # Calcul optionnel des chemins : comme pour /add_poi, un point d'arrivée sans chemin n'est pas gardé.
+    # Une seule recherche depuis le départ sert à tous les points d'arrivée.
+    paths = {}
+    if compute_routes and start_point is not None:
+        accepted, unrouted, paths = route_end_points(file_path, start_point, accepted)
+        rejected.extend(unrouted)
+
+    success = import_pois_to_map(file_path, accepted, paths) if accepted else True
+    return jsonify({
+        'success': success,
+        'imported': len(accepted) if success else 0,
+        'routes': len(paths) if success else 0,
+        'rejected': rejected
+    })
+
 @bp.route('/select_map')
 def select_map():
     maps = list_npz_files("data/NPZ-output/")
@@ -198,4 +533,150 @@ def add_obstacle(map_name):
     success = add_obstacle_to_map(file_path, data['points'])
     print(f"Résultat de l'ajout d'obstacle: {'Succès' if success else 'Échec'}")
     
-    return jsonify({'success': success})
\ No newline at end of file
+    return jsonify({'success': success})
+
+@bp.route('/undo_obstacle/<map_name>', methods=['POST'])
+def undo_obstacle(map_name):
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+    
+    # Annule le dernier obstacle ajouté encore actif
+    edit_id = undo_last_obstacle(file_path)
+    if edit_id is None:
+        return jsonify({'success': False, 'message': "Aucun obstacle à annuler."})
+    return jsonify({'success': True, 'undone': edit_id})
+
+@bp.route('/obstacle_history/<map_name>')
+def obstacle_history(map_name):
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+    return jsonify({'history': get_history(file_path)})
+
+def resolve_point(point, pois):
+    """
+    Coordonnées de grille d'un point donné par un nom de POI ou par {"x": ..., "y": ...}.
+
+    Returns:
+        tuple: (x, y), ou None si le point est inconnu
+    """
+    if isinstance(point, dict):
+        return int(round(float(point['x']))), int(round(float(point['y'])))
+    return pois.get(point)
+
+@bp.route('/plan_fleet/<map_name>', methods=['POST'])
+def plan_fleet(map_name):
+    # Planifie des trajets sans collision pour plusieurs karts
+    # Corps JSON : {"karts": [{"start": "Départ 1", "end": "Arrivée 1"}, ...]}, chaque point
+    # étant un nom de POI ou des coordonnées {"x": ..., "y": ...}
+    data = request.get_json()
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+
+    if not data or not data.get('karts'):
+        return jsonify({'success': False, 'message': 'Aucun kart à planifier'})
+
+    # Résolution des noms de POI en coordonnées
+    pois = {str(poi['name']): (int(round(poi['x'])), int(round(poi['y']))) for poi in get_poi_map(file_path)}
+    karts = []
+    for kart in data['karts']:
+        endpoints = []
+        for point in (kart.get('start'), kart.get('end')):
+            coords = resolve_point(point, pois)
+            if coords is None:
+                return jsonify({'success': False, 'message': f"Point inconnu : {point}"})
+            endpoints.append(coords)
+        karts.append(tuple(endpoints))
+
+    grid = get_obstacle_array(file_path)
+    if grid is None:
+        return jsonify({'success': False, 'message': 'Carte introuvable'})
+
+    try:
+        results = run_in_pool(
+            cooperative.plan_fleet, grid, karts,
+            labels=get_component_labels(file_path),
+            max_expansions=current_app.config['FLEET_MAX_EXPANSIONS_PER_KART'],
+            time_limit=current_app.config['FLEET_PLANNING_TIME_LIMIT'],
+            max_workers=current_app.config['PATHFINDING_WORKERS'],
+            metric='fleet_planning'
+        )
+    except PathfindingTimeout as e:
+        print(f"Planification de flotte interrompue : {str(e)}")
+        return jsonify({'success': False, 'timeout': True, 'message': "La planification a dépassé le temps imparti."})
+
+    for result in results:
+        metrics.increment(f"fleet_planning.karts.{result['status']}")
+
+    return jsonify({
+        'success': all(result['status'] == 'ok' for result in results),
+        'karts': [
+            {
+                'status': result['status'],
+                'path': [{'x': x, 'y': y, 't': t} for t, (x, y) in enumerate(result['path'])]
+            }
+            for result in results
+        ]
+    })
+
+@bp.route('/nearest_sources/<map_name>', methods=['POST'])
+def nearest_sources(map_name):
+    # Source la plus proche (en distance de chemin) de chaque cible, en une seule propagation
+    # Corps JSON : {"sources": [...], "targets": [...], "max_distance": 500}, chaque point étant
+    # un nom de POI ou des coordonnées {"x": ..., "y": ...} ; par défaut, les cibles sont les
+    # points d'arrivée de la carte
+    data = request.get_json(silent=True) or {}
+    file_path = os.path.join("data/NPZ-output", f"{map_name}.npz")
+
+    poi_records = get_poi_map(file_path)
+    pois = {str(poi['name']): (int(round(poi['x'])), int(round(poi['y']))) for poi in poi_records}
+    sources = data.get('sources') or []
+    targets = data.get('targets') or [str(poi['name']) for poi in poi_records if poi['type'] == 'end']
+    if not sources:
+        return jsonify({'success': False, 'message': 'Aucune source'}), 400
+    try:
+        source_coords = [resolve_point(point, pois) for point in sources]
+        target_coords = [resolve_point(point, pois) for point in targets]
+        max_distance = float(data['max_distance']) if data.get('max_distance') is not None else None
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f"Point invalide : {str(e)}"}), 400
+    unknown = [point for point, coords in zip(sources + targets, source_coords + target_coords) if coords is None]
+    if unknown:
+        return jsonify({'success': False, 'message': f"Point inconnu : {unknown[0]}"}), 400
+
+    grid = get_obstacle_array(file_path)
+    if grid is None:
+        return jsonify({'success': False, 'message': 'Carte introuvable'}), 404
+
+    try:
+        matches, labels, distances = run_in_pool(
+            find_nearest_sources, grid, source_coords, target_coords, max_distance,
+            return_fields=True,
+            time_limit=current_app.config['PATHFINDING_TIME_LIMIT'],
+            max_workers=current_app.config['PATHFINDING_WORKERS'],
+            metric='wavefront'
+        )
+    except PathfindingTimeout as e:
+        print(f"Propagation interrompue : {str(e)}")
+        return jsonify({'success': False, 'timeout': True, 'message': "Le calcul a dépassé le temps imparti."})
+
+    results = [
+        {
+            'target': target,
+            'source': sources[source] if source is not None else None,
+            'source_index': source,
+            'distance': round(distance, 1) if source is not None else None
+        }
+        for target, (source, distance) in zip(targets, matches)
+    ]
+
+    reached = np.isfinite(distances)
+    return jsonify({
+        'success': True,
+        'results': results,
+        # Couverture : cases atteintes par chaque source et distance maximale
+        'coverage': {
+            'cells': np.bincount(labels[reached], minlength=len(sources)).tolist(),
+            'max_distance': round(float(distances[reached].max()), 1) if reached.any() else None
+        }
+    })
+
+@bp.route('/metrics')
+def get_metrics():
+    return jsonify(metrics.snapshot())
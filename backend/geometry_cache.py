@@ -0,0 +1,132 @@
+import hashlib
+import os
+
+import numpy as np
+
+from backend.grid_store import save_npz
+from backend.svg_convertor import extract_geometry, rasterize_geometry
+
+# Dossier du cache : géométries (<empreinte>.npz) et grilles rastérisées (<empreinte>_<paramètres>.npz)
+GEOMETRY_CACHE_DIR = "data/geometry-cache"
+# Nombre maximum de grilles rastérisées gardées en cache (les plus anciennes sont supprimées)
+RASTER_CACHE_LIMIT = 64
+
+GEOMETRY_KEYS = ('bounds', 'control_points', 'segment_subpath', 'segment_is_line',
+                 'subpath_path', 'subpath_closed', 'path_filled', 'path_bbox')
+
+
+def hash_svg(svg_filename):
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier SVG.
+    """
+    digest = hashlib.sha256()
+    with open(svg_filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _geometry_path(svg_hash, cache_dir):
+    return os.path.join(cache_dir, f"{svg_hash}.npz")
+
+
+def _raster_path(svg_hash, resolution, samples_per_segment, fill_closed, cache_dir):
+    return os.path.join(cache_dir, f"{svg_hash}_r{resolution:g}_s{samples_per_segment}_f{int(fill_closed)}.npz")
+
+
+def load_cached_geometry(svg_hash, cache_dir=GEOMETRY_CACHE_DIR):
+    """
+    Renvoie la géométrie en cache pour une empreinte, ou None si elle n'y est pas.
+    """
+    path = _geometry_path(svg_hash, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as npz:
+        if not all(key in npz.files for key in GEOMETRY_KEYS):
+            return None
+        return {key: npz[key] for key in GEOMETRY_KEYS}
+
+
+def get_geometry(svg_filename, cache_dir=GEOMETRY_CACHE_DIR):
+    """
+    Renvoie la géométrie d'un fichier SVG, en ne l'analysant que si son contenu n'est
+    pas déjà en cache.
+
+    Returns:
+        tuple: (empreinte du contenu, géométrie, True si elle venait du cache)
+    """
+    svg_hash = hash_svg(svg_filename)
+    geometry = load_cached_geometry(svg_hash, cache_dir)
+    if geometry is not None:
+        return svg_hash, geometry, True
+
+    geometry = extract_geometry(svg_filename)
+    os.makedirs(cache_dir, exist_ok=True)
+    save_npz(_geometry_path(svg_hash, cache_dir), geometry)
+    return svg_hash, geometry, False
+
+
+def get_raster(svg_hash, geometry, resolution, samples_per_segment, fill_closed, cache_dir=GEOMETRY_CACHE_DIR):
+    """
+    Renvoie la grille d'occupation d'une géométrie pour des paramètres donnés, depuis le
+    cache si elle a déjà été calculée (grille compactée à 1 bit par case).
+
+    Returns:
+        tuple: (grille, bounds, True si elle venait du cache)
+    """
+    path = _raster_path(svg_hash, resolution, samples_per_segment, fill_closed, cache_dir)
+    if os.path.exists(path):
+        with np.load(path) as npz:
+            shape = tuple(npz['shape'])
+            grid = np.unpackbits(npz['bits'], count=shape[0] * shape[1]).reshape(shape).astype(bool)
+            return grid, tuple(float(v) for v in npz['bounds']), True
+
+    grid, bounds = rasterize_geometry(geometry, resolution, samples_per_segment, fill_closed)
+    os.makedirs(cache_dir, exist_ok=True)
+    save_npz(path, {'bits': np.packbits(grid), 'shape': np.array(grid.shape), 'bounds': np.array(bounds)})
+    _prune_rasters(cache_dir)
+    return grid, bounds, False
+
+
+def _prune_rasters(cache_dir):
+    rasters = [
+        os.path.join(cache_dir, filename) for filename in os.listdir(cache_dir)
+        if filename.endswith('.npz') and '_r' in filename
+    ]
+    rasters.sort(key=os.path.getmtime)
+    for path in rasters[:max(0, len(rasters) - RASTER_CACHE_LIMIT)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def raster_metadata(svg_hash, resolution, samples_per_segment, fill_closed):
+    """
+    Métadonnées de rastérisation enregistrées dans le NPZ d'une carte.
+    """
+    return {
+        'svg_hash': np.array(svg_hash),
+        'resolution': np.array(float(resolution)),
+        'samples_per_segment': np.array(int(samples_per_segment)),
+        'fill_closed': np.array(bool(fill_closed))
+    }
+
+
+def read_raster_metadata(map_path):
+    """
+    Lit les métadonnées de rastérisation d'une carte.
+
+    Returns:
+        dict: {'svg_hash', 'resolution', 'samples_per_segment', 'fill_closed'} ou None
+              pour une carte créée avant le cache de géométrie
+    """
+    with np.load(map_path) as npz:
+        if 'svg_hash' not in npz.files:
+            return None
+        return {
+            'svg_hash': str(npz['svg_hash']),
+            'resolution': float(npz['resolution']),
+            'samples_per_segment': int(npz['samples_per_segment']),
+            'fill_closed': bool(npz['fill_closed'])
+        }
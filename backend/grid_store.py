@@ -0,0 +1,389 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# Taille (en cases) des tuiles carrées de la grille
+TILE_SIZE = 256
+
+# Un verrou par dossier de tuiles : les mises à jour de index.json (lecture, modification,
+# réécriture) et la migration d'une carte ne s'entremêlent pas entre threads
+_store_locks = {}
+_store_locks_lock = threading.Lock()
+
+
+def get_store_dir(map_path):
+    """
+    Renvoie le dossier de tuiles associé à une carte (ex: data/NPZ-output/carte.tiles).
+    """
+    return os.path.splitext(map_path)[0] + ".tiles"
+
+
+def _store_lock(store_dir):
+    key = os.path.abspath(store_dir)
+    with _store_locks_lock:
+        return _store_locks.setdefault(key, threading.RLock())
+
+
+def atomic_write(path, payload):
+    """
+    Écrit un fichier de façon atomique : le contenu est écrit dans un fichier temporaire
+    du même dossier, puis remplace le fichier d'un coup.
+
+    Le fichier temporaire a un nom unique : deux écritures simultanées ne se mélangent
+    pas, même entre processus, et un échec ne laisse aucun fichier derrière lui.
+
+    Args:
+        path (str): Chemin du fichier
+        payload (bytes): Contenu à écrire
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory or ".")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_npz(path, data):
+    """
+    Enregistre un fichier NPZ de façon atomique : un lecteur concurrent voit l'ancien
+    ou le nouveau fichier, jamais un fichier à moitié écrit.
+
+    Args:
+        path (str): Chemin du fichier NPZ
+        data (dict): Tableaux à enregistrer
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **data)
+    atomic_write(path, buffer.getvalue())
+
+
+def _read_index(store_dir):
+    with open(os.path.join(store_dir, "index.json"), 'r') as f:
+        return json.load(f)
+
+
+def _write_index(store_dir, index):
+    atomic_write(os.path.join(store_dir, "index.json"), json.dumps(index, indent=2).encode())
+
+
+class TiledGrid:
+    """
+    Couche d'une grille découpée en tuiles compressées, chargées à la demande.
+
+    S'utilise comme un tableau NumPy 2D pour la lecture case par case (grid[y, x], grid.shape).
+    Les tuiles absentes du disque valent entièrement la valeur de remplissage de la couche,
+    ce qui rend le stockage creux pour les grandes zones vides. Une couche peut avoir des
+    dimensions supplémentaires en tête (ex: une carte de distances par landmark), une tuile
+    a alors la forme extra_shape + (hauteur, largeur).
+    """
+
+    def __init__(self, store_dir, layer, index=None):
+        index = index if index is not None else _read_index(store_dir)
+        info = index['layers'][layer]
+        self.store_dir = store_dir
+        self.layer = layer
+        self.shape = tuple(index['shape'])
+        self.tile_size = index['tile_size']
+        self.dtype = np.dtype(info['dtype'])
+        self.extra_shape = tuple(info.get('extra_shape', ()))
+        self.fill = info.get('fill', 0)
+        self.meta = info.get('meta', {})
+        self._layer_dir = os.path.join(store_dir, layer)
+        self._tiles = {}
+        self._dirty = set()
+
+    @property
+    def tile_grid_shape(self):
+        """Nombre de tuiles (lignes, colonnes)."""
+        height, width = self.shape
+        return -(-height // self.tile_size), -(-width // self.tile_size)
+
+    @property
+    def loaded_tiles(self):
+        """Nombre de tuiles actuellement chargées en mémoire."""
+        return len(self._tiles)
+
+    def _tile_path(self, tile_row, tile_col):
+        return os.path.join(self._layer_dir, f"{tile_row}_{tile_col}.npz")
+
+    def _tile_bounds(self, tile_row, tile_col):
+        height, width = self.shape
+        y0 = tile_row * self.tile_size
+        x0 = tile_col * self.tile_size
+        return y0, min(y0 + self.tile_size, height), x0, min(x0 + self.tile_size, width)
+
+    def tile(self, tile_row, tile_col):
+        """
+        Renvoie une tuile, en la chargeant depuis le disque au premier accès.
+        """
+        key = (tile_row, tile_col)
+        tile = self._tiles.get(key)
+        if tile is None:
+            path = self._tile_path(tile_row, tile_col)
+            if os.path.exists(path):
+                with np.load(path) as npz:
+                    tile = npz['data']
+            else:
+                y0, y1, x0, x1 = self._tile_bounds(tile_row, tile_col)
+                tile = np.full(self.extra_shape + (y1 - y0, x1 - x0), self.fill, dtype=self.dtype)
+            self._tiles[key] = tile
+        return tile
+
+    def __getitem__(self, key):
+        # grid[y, x], ou grid[..., y, x] comme pour un tableau NumPy à dimensions en tête
+        if len(key) == 3 and key[0] is Ellipsis:
+            key = key[1:]
+        y, x = key
+        size = self.tile_size
+        return self.tile(y // size, x // size)[..., y % size, x % size]
+
+    def get_cells(self, rows, cols):
+        """
+        Lit plusieurs cases d'un coup, en ne chargeant que les tuiles concernées.
+
+        Args:
+            rows (np.ndarray): Indices de ligne
+            cols (np.ndarray): Indices de colonne
+
+        Returns:
+            np.ndarray: Valeurs des cases (forme extra_shape + (n,))
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.empty(self.extra_shape + rows.shape, dtype=self.dtype)
+        tile_ids = (rows // self.tile_size) * self.tile_grid_shape[1] + cols // self.tile_size
+        for tile_id in np.unique(tile_ids):
+            mask = tile_ids == tile_id
+            tile = self.tile(*divmod(int(tile_id), self.tile_grid_shape[1]))
+            values[..., mask] = tile[..., rows[mask] % self.tile_size, cols[mask] % self.tile_size]
+        return values
+
+    def set_cells(self, rows, cols, value, persist=True):
+        """
+        Modifie plusieurs cases ; seules les tuiles touchées seront réécrites par flush().
+
+        Args:
+            rows (np.ndarray): Indices de ligne
+            cols (np.ndarray): Indices de colonne
+            value: Nouvelle valeur (scalaire ou tableau de forme extra_shape + (n,))
+            persist (bool): False pour une modification en mémoire seulement (ignorée par flush())
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), self.extra_shape + rows.shape)
+        tile_ids = (rows // self.tile_size) * self.tile_grid_shape[1] + cols // self.tile_size
+        for tile_id in np.unique(tile_ids):
+            mask = tile_ids == tile_id
+            key = divmod(int(tile_id), self.tile_grid_shape[1])
+            tile = self.tile(*key)
+            tile[..., rows[mask] % self.tile_size, cols[mask] % self.tile_size] = value[..., mask]
+            if persist:
+                self._dirty.add(key)
+
+    def to_array(self):
+        """
+        Assemble la couche complète en un seul tableau (charge toutes les tuiles).
+        """
+        array = np.empty(self.extra_shape + self.shape, dtype=self.dtype)
+        tile_rows, tile_cols = self.tile_grid_shape
+        for tile_row in range(tile_rows):
+            for tile_col in range(tile_cols):
+                y0, y1, x0, x1 = self._tile_bounds(tile_row, tile_col)
+                array[..., y0:y1, x0:x1] = self.tile(tile_row, tile_col)
+        return array
+
+    def write_array(self, array):
+        """
+        Remplace le contenu de la couche ; seules les tuiles qui changent seront réécrites.
+        """
+        array = np.asarray(array, dtype=self.dtype)
+        tile_rows, tile_cols = self.tile_grid_shape
+        for tile_row in range(tile_rows):
+            for tile_col in range(tile_cols):
+                y0, y1, x0, x1 = self._tile_bounds(tile_row, tile_col)
+                new_tile = array[..., y0:y1, x0:x1]
+                if not np.array_equal(self.tile(tile_row, tile_col), new_tile):
+                    self._tiles[(tile_row, tile_col)] = new_tile.copy()
+                    self._dirty.add((tile_row, tile_col))
+
+    def flush(self):
+        """
+        Écrit sur le disque les tuiles modifiées.
+
+        Returns:
+            int: Nombre de tuiles réécrites
+        """
+        os.makedirs(self._layer_dir, exist_ok=True)
+        for key in self._dirty:
+            tile = self._tiles[key]
+            path = self._tile_path(*key)
+            if np.all(tile == self.fill):
+                # Tuile vide : on ne la stocke pas
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            buffer = io.BytesIO()
+            np.savez_compressed(buffer, data=tile)
+            atomic_write(path, buffer.getvalue())
+        written = len(self._dirty)
+        self._dirty.clear()
+        return written
+
+
+def write_layer(map_path, layer, array, extra_dims=0, fill=0, meta=None):
+    """
+    Crée ou remplace une couche dans le stockage en tuiles d'une carte.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ de la carte
+        layer (str): Nom de la couche
+        array (np.ndarray): Contenu complet de la couche
+        extra_dims (int): Nombre de dimensions en tête avant les deux dimensions de la grille
+        fill: Valeur des tuiles non stockées
+        meta (dict): Métadonnées JSON de la couche (ex: cases des landmarks)
+
+    Returns:
+        TiledGrid: La couche écrite
+    """
+    array = np.asarray(array)
+    store_dir = get_store_dir(map_path)
+    os.makedirs(store_dir, exist_ok=True)
+
+    with _store_lock(store_dir):
+        index_path = os.path.join(store_dir, "index.json")
+        if os.path.exists(index_path):
+            index = _read_index(store_dir)
+        else:
+            index = {'shape': list(array.shape[extra_dims:]), 'tile_size': TILE_SIZE, 'layers': {}}
+        if list(array.shape[extra_dims:]) != index['shape']:
+            raise ValueError(f"Forme {array.shape} incompatible avec la grille {index['shape']}")
+
+        # Une couche remplacée repart de zéro
+        shutil.rmtree(os.path.join(store_dir, layer), ignore_errors=True)
+        index['layers'][layer] = {
+            'dtype': array.dtype.str,
+            'extra_shape': list(array.shape[:extra_dims]),
+            'fill': fill.item() if isinstance(fill, np.generic) else fill
+        }
+        if meta:
+            index['layers'][layer]['meta'] = meta
+        _write_index(store_dir, index)
+
+        grid = TiledGrid(store_dir, layer, index)
+        grid.write_array(array)
+        grid.flush()
+    return grid
+
+
+def has_layer(map_path, layer):
+    """
+    Indique si une couche existe dans le stockage en tuiles d'une carte.
+    """
+    store_dir = get_store_dir(map_path)
+    if not os.path.exists(os.path.join(store_dir, "index.json")):
+        return False
+    return layer in _read_index(store_dir)['layers']
+
+
+def delete_layer(map_path, layer):
+    """
+    Retire une couche du stockage en tuiles d'une carte (sans effet si elle n'existe pas).
+
+    Returns:
+        bool: True si la couche existait
+    """
+    store_dir = get_store_dir(map_path)
+    with _store_lock(store_dir):
+        if not has_layer(map_path, layer):
+            return False
+        index = _read_index(store_dir)
+        del index['layers'][layer]
+        _write_index(store_dir, index)
+        shutil.rmtree(os.path.join(store_dir, layer), ignore_errors=True)
+    return True
+
+
+def open_layer(map_path, layer='obstacle_grid'):
+    """
+    Ouvre une couche de la carte sans charger ses tuiles.
+    Les cartes encore stockées d'un seul bloc dans le NPZ sont d'abord migrées, et les
+    éditions d'obstacles du journal pas encore compactées sont appliquées en mémoire.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ de la carte
+        layer (str): Nom de la couche
+
+    Returns:
+        TiledGrid: La couche demandée
+    """
+    migrate_map_to_tiles(map_path)
+    grid = TiledGrid(get_store_dir(map_path), layer)
+    if layer == 'obstacle_grid':
+        # Import local pour éviter les dépendances circulaires
+        from backend.obstacle_journal import apply_journal
+        apply_journal(grid, map_path)
+    return grid
+
+
+def get_grid_shape(map_path):
+    """
+    Renvoie la forme (hauteur, largeur) de la grille sans charger de tuile.
+    """
+    migrate_map_to_tiles(map_path)
+    return tuple(_read_index(get_store_dir(map_path))['shape'])
+
+
+def migrate_map_to_tiles(map_path):
+    """
+    Découpe en tuiles les grilles d'une carte stockées d'un seul bloc dans le NPZ,
+    puis les retire du NPZ. Ne fait rien si la carte est déjà migrée : un dossier de
+    tuiles avec son index suffit à le savoir, sans ouvrir le NPZ.
+
+    Returns:
+        bool: True si une migration a eu lieu
+    """
+    store_dir = get_store_dir(map_path)
+    if os.path.exists(os.path.join(store_dir, "index.json")):
+        return False
+    with _store_lock(store_dir):
+        with np.load(map_path) as npz:
+            if 'obstacle_grid' not in npz:
+                return False
+        # Carte à l'ancien format : ses chemins peuvent encore être picklés
+        with np.load(map_path, allow_pickle=True) as npz:
+            data = dict(npz)
+
+        # Import local pour éviter les dépendances circulaires
+        from backend.pathfinding.components import compute_component_labels
+        from backend.path_encoding import migrate_legacy_paths
+
+        print(f"Migration de {map_path} vers le stockage en tuiles")
+        migrate_legacy_paths(data)
+        grid = data.pop('obstacle_grid').astype(bool)
+        labels = data.pop('component_labels', None)
+        if labels is None:
+            labels = compute_component_labels(grid)
+        write_layer(map_path, 'obstacle_grid', grid, fill=False)
+        write_layer(map_path, 'component_labels', labels.astype(np.int32))
+        save_npz(map_path, data)
+    return True
+
+
+def delete_store(map_path):
+    """
+    Supprime le dossier de tuiles d'une carte.
+    """
+    # Import local : le journal dépend lui-même du stockage en tuiles
+    from backend.obstacle_journal import forget_journal
+
+    shutil.rmtree(get_store_dir(map_path), ignore_errors=True)
+    forget_journal(map_path)
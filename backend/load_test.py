@@ -0,0 +1,377 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from werkzeug.serving import make_server
+
+from app import create_app
+from backend.grid_store import open_layer
+from backend.obstacle_journal import wait_for_compaction
+from backend.pathfinding.landmarks import wait_for_landmark_updates
+from backend.pathfinding.roadmap import wait_for_roadmap_updates
+from backend.path_encoding import decode_paths
+from backend.poi_table import PoiTable
+from backend.svg_convertor import save_occupancy_data
+from backend.utils import add_poi_to_map
+
+# Répartition par défaut des requêtes (poids relatifs)
+DEFAULT_MIX = {
+    'viewer': 40,
+    'add_poi': 25,
+    'delete_poi': 15,
+    'add_obstacle': 10,
+    'upload_and_process_svg': 10,
+}
+
+# Un calcul en arrière-plan peut en programmer un autre : nombre maximum de passes d'attente
+BACKGROUND_WAIT_ROUNDS = 5
+
+
+def make_synthetic_grid(rng, height, width, obstacle_count):
+    """
+    Génère une grille d'obstacles : murs d'enceinte et rectangles pleins aléatoires.
+    """
+    grid = np.zeros((height, width), dtype=bool)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = True
+    for _ in range(obstacle_count):
+        h, w = rng.integers(2, max(3, height // 8)), rng.integers(2, max(3, width // 8))
+        y, x = rng.integers(1, height - h), rng.integers(1, width - w)
+        grid[y:y + h, x:x + w] = True
+    return grid
+
+
+def make_synthetic_svg(rng, width=100, height=60, rect_count=8):
+    """
+    Génère un plan SVG : contour de la pièce et quelques rectangles (racks).
+    """
+    shapes = [f'<path d="M0 0 L{width} 0 L{width} {height} L0 {height} Z" fill="none" stroke="black"/>']
+    for _ in range(rect_count):
+        w, h = rng.integers(2, 10), rng.integers(2, 10)
+        x, y = rng.integers(1, width - w), rng.integers(1, height - h)
+        shapes.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}"/>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+            + "".join(shapes) + '</svg>')
+
+
+def seed_maps(rng, map_count, height, width):
+    """
+    Crée les cartes synthétiques (avec un point de départ) dans le dossier de travail courant.
+
+    Returns:
+        dict: {nom de la carte: {'grid': grille initiale, 'bounds': limites}}
+    """
+    os.makedirs("data/NPZ-output", exist_ok=True)
+    maps = {}
+    for i in range(map_count):
+        name = f"load_test_{i}"
+        grid = make_synthetic_grid(rng, height, width, obstacle_count=max(1, height * width // 2000))
+        bounds = (0.0, width / 20.0, 0.0, height / 20.0)
+        path = os.path.join("data/NPZ-output", f"{name}.npz")
+        save_occupancy_data(grid, bounds, path)
+        free = np.argwhere(~grid)
+        y, x = free[rng.integers(len(free))]
+        add_poi_to_map(path, float(x), float(y), 'start', 'Départ')
+        maps[name] = {'grid': grid, 'bounds': bounds}
+    return maps
+
+
+class LoadTest:
+    """
+    Rejoue un mélange de requêtes en parallèle sur un serveur de l'application.
+    """
+
+    def __init__(self, base_url, maps, mix, seed=0):
+        self.base_url = base_url
+        self.maps = maps
+        self.operations = list(mix)
+        self.weights = [mix[operation] for operation in self.operations]
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.rejected = defaultdict(int)
+        self.error_samples = []
+        # POIs créés par le test, que delete_poi peut supprimer
+        self.created_pois = defaultdict(list)
+
+    def _random(self, func, *args):
+        with self.lock:
+            return func(*args)
+
+    def _request(self, path, payload=None, files=None):
+        url = self.base_url + path
+        headers = {}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        elif files is not None:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for field, (filename, content) in files.items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                    f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n'
+                )
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+
+        request = urllib.request.Request(url, data=body, headers=headers, method='POST' if body else 'GET')
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, response.read()
+
+    def _random_free_point(self, map_name):
+        grid = self.maps[map_name]['grid']
+        height, width = grid.shape
+        while True:
+            x, y = self._random(self.rng.randrange, width), self._random(self.rng.randrange, height)
+            if not grid[y, x]:
+                return x, y
+
+    def run_one(self, index):
+        operation = self._random(self.rng.choices, self.operations, self.weights)[0]
+        map_name = self._random(self.rng.choice, list(self.maps))
+        started = time.perf_counter()
+        rejected = False
+        try:
+            if operation == 'viewer':
+                self._request(f"/viewer/{map_name}")
+            elif operation == 'add_poi':
+                x, y = self._random_free_point(map_name)
+                name = f"lt-{index}"
+                _, body = self._request(f"/add_poi/{map_name}", {'x': x, 'y': y, 'type': 'end', 'name': name})
+                if json.loads(body).get('success'):
+                    with self.lock:
+                        self.created_pois[map_name].append(name)
+                else:
+                    rejected = True
+            elif operation == 'delete_poi':
+                with self.lock:
+                    names = self.created_pois[map_name]
+                    name = names.pop(self.rng.randrange(len(names))) if names else None
+                if name is None:
+                    return
+                _, body = self._request(f"/delete_poi/{map_name}", {'name': name})
+                rejected = not json.loads(body).get('success')
+            elif operation == 'add_obstacle':
+                min_x, max_x, min_y, max_y = self.maps[map_name]['bounds']
+                points = [
+                    {'x': self._random(self.rng.uniform, min_x, max_x), 'y': self._random(self.rng.uniform, min_y, max_y)}
+                    for _ in range(self._random(self.rng.randint, 2, 3))
+                ]
+                _, body = self._request(f"/add_obstacle/{map_name}", {'points': points})
+                rejected = not json.loads(body).get('success')
+            elif operation == 'upload_and_process_svg':
+                svg = make_synthetic_svg(np.random.default_rng(index))
+                self._request("/upload_and_process_svg", files={'svg_file': (f"lt_upload_{index}.svg", svg.encode())})
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            detail = str(e)
+            if isinstance(e, urllib.error.HTTPError):
+                detail += " - " + e.read(200).decode(errors='replace').strip()
+            with self.lock:
+                self.errors[operation] += 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append(f"{operation} {map_name}: {detail}")
+            return
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies[operation].append(elapsed)
+            if rejected:
+                self.rejected[operation] += 1
+
+    def run(self, request_count, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self.run_one, range(request_count)))
+        return time.perf_counter() - started
+
+
+def check_map_integrity(map_path, expected_pois=()):
+    """
+    Vérifie la cohérence d'une carte après le test de charge.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ de la carte
+        expected_pois (list): Noms des POIs ajoutés avec succès et jamais supprimés
+
+    Returns:
+        list: Problèmes détectés (liste vide si la carte est cohérente)
+    """
+    issues = []
+    try:
+        # Sans pickle : un NPZ à l'ancien format ou corrompu échoue ici
+        with np.load(map_path) as npz:
+            data = {key: npz[key] for key in npz.files}
+    except Exception as e:
+        return [f"NPZ illisible : {e}"]
+
+    try:
+        pois = PoiTable.from_npz(data)
+        columns = [len(data[key]) for key in ('poi_x', 'poi_y', 'poi_types') if key in data]
+        if columns and len(set(columns + [len(pois)])) != 1:
+            issues.append(f"Colonnes de POIs de tailles différentes : {columns} / {len(pois)} noms")
+        if len(set(pois.names)) != len(pois):
+            issues.append("Noms de POIs en double")
+        # Un POI confirmé au client mais absent du fichier = écriture concurrente perdue
+        lost = [name for name in expected_pois if name not in pois]
+        if lost:
+            issues.append(f"{len(lost)} POI(s) confirmé(s) mais perdu(s) : {', '.join(lost[:5])}")
+
+        end_names = {name for name, poi_type in zip(pois.names, pois.types) if poi_type == 'end'}
+        grid = open_layer(map_path, 'obstacle_grid').to_array()
+        height, width = grid.shape
+        for path_name, points in decode_paths(data).items():
+            if not path_name.startswith("path_to_") or path_name[len("path_to_"):] not in end_names:
+                issues.append(f"Chemin orphelin : {path_name}")
+            if points.min() < 0 or points[:, 0].max() >= width or points[:, 1].max() >= height:
+                issues.append(f"Chemin hors de la grille : {path_name}")
+
+        labels = open_layer(map_path, 'component_labels').to_array()
+        if labels.shape != grid.shape or np.any((labels == 0) != grid):
+            issues.append("Étiquettes des composantes incohérentes avec la grille")
+    except Exception as e:
+        issues.append(f"Erreur de vérification : {e}")
+    return issues
+
+
+def format_report(load_test, duration, integrity):
+    lines = [f"Durée : {duration:.2f} s", ""]
+    lines.append(f"{'opération':<24}{'n':>6}{'erreurs':>9}{'refus':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    total = 0
+    for operation in sorted(set(load_test.latencies) | set(load_test.errors)):
+        latencies = np.array(load_test.latencies[operation]) * 1000
+        total += len(latencies) + load_test.errors[operation]
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+        lines.append(f"{operation:<24}{len(latencies):>6}{load_test.errors[operation]:>9}"
+                     f"{load_test.rejected[operation]:>7}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+    lines.append("")
+    lines.append(f"Débit : {total / duration:.1f} requêtes/s")
+    for sample in load_test.error_samples:
+        lines.append(f"  erreur : {sample}")
+
+    lines.append("")
+    broken = {name: issues for name, issues in integrity.items() if issues}
+    lines.append(f"Intégrité : {len(integrity) - len(broken)}/{len(integrity)} cartes cohérentes")
+    for name, issues in broken.items():
+        for issue in issues:
+            lines.append(f"  {name} : {issue}")
+    return "\n".join(lines)
+
+
+def wait_for_background_work(timeout=60.0):
+    """
+    Attend la fin des calculs lancés en arrière-plan par les requêtes (compaction des
+    journaux, landmarks, roadmaps), qui écrivent encore dans les cartes.
+
+    Chaque attente bloque sur les threads concernés jusqu'à l'échéance ; une nouvelle passe
+    n'a lieu que si un calcul a été reprogrammé entre-temps.
+
+    Args:
+        timeout (float): Délai maximum total en secondes
+
+    Returns:
+        bool: True si plus aucun calcul n'est en cours
+    """
+    deadline = time.monotonic() + timeout
+    waits = [wait_for_compaction, wait_for_landmark_updates, wait_for_roadmap_updates]
+    for _ in range(BACKGROUND_WAIT_ROUNDS):
+        # Liste et non générateur : chaque attente est faite à chaque passe
+        if all([wait(max(0.0, deadline - time.monotonic())) for wait in waits]):
+            return True
+        if time.monotonic() >= deadline:
+            break
+    return False
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        operation, _, weight = item.partition('=')
+        if operation not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Opération inconnue : {operation}")
+        mix[operation] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge local des routes Flask de Stoc'Kart")
+    parser.add_argument('--requests', type=int, default=200, help="Nombre total de requêtes")
+    parser.add_argument('--concurrency', type=int, default=8, help="Nombre de clients simultanés")
+    parser.add_argument('--maps', type=int, default=3, help="Nombre de cartes synthétiques")
+    parser.add_argument('--grid-size', type=int, nargs=2, default=(200, 300), metavar=('HAUTEUR', 'LARGEUR'))
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="Poids des opérations, ex: viewer=40,add_poi=25,delete_poi=15")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Dossier de travail (par défaut un dossier temporaire)")
+    parser.add_argument('--keep', action='store_true', help="Conserver le dossier de travail")
+    parser.add_argument('--verbose', action='store_true', help="Afficher les logs de l'application")
+    args = parser.parse_args(argv)
+
+    # L'application travaille dans des chemins relatifs (data/, app/static/) : on l'isole
+    workdir = args.workdir or tempfile.mkdtemp(prefix="stockart-load-")
+    previous_cwd = os.getcwd()
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    quiet = contextlib.ExitStack()
+    if not args.verbose:
+        quiet.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        quiet.enter_context(contextlib.redirect_stderr(io.StringIO()))
+    try:
+        with quiet:
+            maps = seed_maps(np.random.default_rng(args.seed), args.maps, *args.grid_size)
+            server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                load_test = LoadTest(f"http://127.0.0.1:{server.server_port}", maps, args.mix, args.seed)
+                duration = load_test.run(args.requests, args.concurrency)
+            finally:
+                server.shutdown()
+
+            # Vérification sur des fichiers qui ne bougent plus
+            wait_for_background_work()
+            integrity = {}
+            for filename in sorted(os.listdir("data/NPZ-output")):
+                if filename.endswith('.npz'):
+                    name = os.path.splitext(filename)[0]
+                    integrity[name] = check_map_integrity(os.path.join("data/NPZ-output", filename),
+                                                          load_test.created_pois.get(name, ()))
+
+        print(format_report(load_test, duration, integrity))
+        failed = sum(load_test.errors.values()) > 0 or any(integrity.values())
+        return 1 if failed else 0
+    finally:
+        # Les threads en arrière-plan écrivent en chemins relatifs : ils doivent finir
+        # avant le retour au dossier d'origine et la suppression du dossier de travail
+        wait_for_background_work()
+        os.chdir(previous_cwd)
+        if args.keep or args.workdir:
+            print(f"Dossier de travail : {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    """
+    Exécution en ligne de commande :
+      python -m backend.load_test --requests 500 --concurrency 16
+    """
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import threading
+from collections import defaultdict
+
+# Compteurs et durées partagés entre les threads du serveur
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = {}
+
+
+def increment(name, value=1):
+    """
+    Incrémente un compteur.
+
+    Args:
+        name (str): Nom du compteur (ex: 'pathfinding.timeouts')
+        value (int): Valeur à ajouter
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name, seconds):
+    """
+    Enregistre une durée mesurée (nombre, total et maximum par nom).
+
+    Args:
+        name (str): Nom de la mesure (ex: 'pathfinding.duration')
+        seconds (float): Durée en secondes
+    """
+    with _lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+
+def snapshot():
+    """
+    Renvoie une copie de toutes les métriques.
+
+    Returns:
+        dict: {'counters': {nom: valeur}, 'timings': {nom: {'count', 'total', 'max', 'mean'}}}
+    """
+    with _lock:
+        timings = {
+            name: dict(timing, mean=timing['total'] / timing['count'] if timing['count'] else 0.0)
+            for name, timing in _timings.items()
+        }
+        return {'counters': dict(_counters), 'timings': timings}
+
+
+def reset():
+    """
+    Remet toutes les métriques à zéro.
+    """
+    with _lock:
+        _counters.clear()
+        _timings.clear()
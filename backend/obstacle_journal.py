@@ -0,0 +1,307 @@
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from backend.grid_store import get_store_dir, atomic_write, TiledGrid
+
+# Fichiers du journal, dans le dossier de tuiles de la carte
+JOURNAL_FILE = "obstacle_journal.bin"
+META_FILE = "obstacle_journal.json"
+
+# Types d'édition : ajout d'obstacle (cases -> obstacle), annulation d'un ajout (cases -> libres)
+EDIT_ADD = 1
+EDIT_UNDO = 2
+EDIT_KINDS = {EDIT_ADD: 'add', EDIT_UNDO: 'undo'}
+
+# En-tête d'une entrée : identifiant, horodatage, type, édition annulée (0 sinon), nombre de cases.
+# Suivent les lignes puis les colonnes des cases modifiées (int32).
+_HEADER = struct.Struct('<IdBII')
+
+# Nombre d'éditions non compactées au-delà duquel la compaction est lancée en arrière-plan
+COMPACTION_THRESHOLD = 16
+# Nombre d'éditions conservées dans le journal après compaction (historique et annulation)
+HISTORY_LIMIT = 200
+
+_locks = {}
+_locks_lock = threading.Lock()
+# Compactions en cours : {chemin de la carte: thread}
+_compacting = {}
+
+# Journaux déjà lus, par carte : (inode, octets lus, éditions). Le journal ne fait que
+# s'allonger entre deux compactions, qui le remplacent par un nouveau fichier (autre inode) :
+# seule la fin ajoutée depuis la dernière lecture est décodée
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def map_lock(map_path):
+    """
+    Renvoie le verrou (réentrant) qui sérialise les éditions et la compaction d'une carte.
+    """
+    key = os.path.abspath(map_path)
+    with _locks_lock:
+        return _locks.setdefault(key, threading.RLock())
+
+
+def _journal_path(map_path):
+    return os.path.join(get_store_dir(map_path), JOURNAL_FILE)
+
+
+def grid_version(map_path):
+    """
+    Identifie l'état de la grille d'obstacles d'une carte sans la lire : son index.json est
+    réécrit à chaque rastérisation et son journal s'allonge à chaque édition.
+
+    Returns:
+        tuple: Clé qui change dès que le contenu de la grille peut avoir changé
+    """
+    version = []
+    for path in (os.path.join(get_store_dir(map_path), "index.json"), _journal_path(map_path)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            version.append(None)
+            continue
+        version.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(version)
+
+
+def _read_meta(map_path):
+    path = os.path.join(get_store_dir(map_path), META_FILE)
+    if not os.path.exists(path):
+        return {'compacted_through': 0, 'last_id': 0}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_meta(map_path, meta):
+    atomic_write(os.path.join(get_store_dir(map_path), META_FILE), json.dumps(meta).encode())
+
+
+def _encode_record(record):
+    rows = np.asarray(record['rows'], dtype='<i4')
+    cols = np.asarray(record['cols'], dtype='<i4')
+    header = _HEADER.pack(record['id'], record['timestamp'], record['kind'], record['target'], len(rows))
+    return header + rows.tobytes() + cols.tobytes()
+
+
+def _decode_records(raw):
+    # Renvoie les éditions complètes et le nombre d'octets qu'elles occupent
+    records = []
+    offset = 0
+    while offset + _HEADER.size <= len(raw):
+        edit_id, timestamp, kind, target, count = _HEADER.unpack_from(raw, offset)
+        end = offset + _HEADER.size + 8 * count
+        if end > len(raw):
+            break
+        cells = np.frombuffer(raw, dtype='<i4', count=2 * count, offset=offset + _HEADER.size)
+        rows = cells[:count].astype(np.int64)
+        cols = cells[count:].astype(np.int64)
+        # Partagées entre lectures par le cache : en lecture seule
+        rows.setflags(write=False)
+        cols.setflags(write=False)
+        records.append({
+            'id': edit_id,
+            'timestamp': timestamp,
+            'kind': kind,
+            'target': target,
+            'rows': rows,
+            'cols': cols
+        })
+        offset = end
+    return records, offset
+
+
+def read_journal(map_path):
+    """
+    Lit toutes les éditions du journal d'une carte.
+
+    Une entrée tronquée en fin de fichier (écriture interrompue) est ignorée. Les éditions
+    déjà lues sont gardées en mémoire : une nouvelle lecture ne décode que la fin du journal.
+
+    Returns:
+        list: Éditions [{'id', 'timestamp', 'kind', 'target', 'rows', 'cols'}, ...] dans l'ordre
+    """
+    path = _journal_path(map_path)
+    key = os.path.abspath(map_path)
+    with _parsed_lock:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            _parsed.pop(key, None)
+            return []
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            cached = _parsed.get(key)
+            if cached is not None and cached[0] == inode:
+                _, offset, records = cached
+                f.seek(offset)
+            else:
+                offset, records = 0, []
+            new_records, size = _decode_records(f.read())
+        if new_records:
+            records = records + new_records
+        _parsed[key] = (inode, offset + size, records)
+        return list(records)
+
+
+def forget_journal(map_path):
+    """
+    Oublie les éditions gardées en mémoire pour une carte (après suppression de son stockage).
+    """
+    with _parsed_lock:
+        _parsed.pop(os.path.abspath(map_path), None)
+
+
+def append_edit(map_path, kind, rows, cols, target=0):
+    """
+    Ajoute une édition à la fin du journal (seules les cases qui changent y sont écrites).
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        kind (int): EDIT_ADD ou EDIT_UNDO
+        rows (np.ndarray): Lignes des cases modifiées
+        cols (np.ndarray): Colonnes des cases modifiées
+        target (int): Identifiant de l'édition annulée (EDIT_UNDO)
+
+    Returns:
+        int: Identifiant de la nouvelle édition
+    """
+    with map_lock(map_path):
+        meta = _read_meta(map_path)
+        record = {
+            'id': meta['last_id'] + 1,
+            'timestamp': time.time(),
+            'kind': kind,
+            'target': target,
+            'rows': rows,
+            'cols': cols
+        }
+        with open(_journal_path(map_path), 'ab') as f:
+            f.write(_encode_record(record))
+            f.flush()
+            os.fsync(f.fileno())
+        meta['last_id'] = record['id']
+        _write_meta(map_path, meta)
+
+        if meta['last_id'] - meta['compacted_through'] >= COMPACTION_THRESHOLD:
+            schedule_compaction(map_path)
+        return record['id']
+
+
+def _apply_records(grid, records, persist):
+    for record in records:
+        grid.set_cells(record['rows'], record['cols'], record['kind'] == EDIT_ADD, persist=persist)
+
+
+def apply_journal(grid, map_path):
+    """
+    Applique en mémoire à la grille d'obstacles les éditions pas encore compactées.
+
+    Les éditions fixent des valeurs absolues : les rejouer dans l'ordre sur une tuile
+    qui les contient déjà ne change rien.
+    """
+    with map_lock(map_path):
+        compacted_through = _read_meta(map_path)['compacted_through']
+        records = [record for record in read_journal(map_path) if record['id'] > compacted_through]
+    _apply_records(grid, records, persist=False)
+    return grid
+
+
+def compact_journal(map_path):
+    """
+    Intègre les éditions du journal aux tuiles de la grille d'obstacles, puis ne garde
+    dans le journal que les HISTORY_LIMIT dernières éditions.
+
+    Returns:
+        int: Nombre d'éditions intégrées
+    """
+    with map_lock(map_path):
+        if not os.path.exists(_journal_path(map_path)):
+            return 0
+        meta = _read_meta(map_path)
+        records = read_journal(map_path)
+        pending = [record for record in records if record['id'] > meta['compacted_through']]
+        if pending:
+            # Grille de base, sans passer par open_layer qui rejouerait le journal
+            grid = TiledGrid(get_store_dir(map_path), 'obstacle_grid')
+            _apply_records(grid, pending, persist=True)
+            grid.flush()
+            meta['compacted_through'] = pending[-1]['id']
+            _write_meta(map_path, meta)
+
+        if len(records) > HISTORY_LIMIT:
+            atomic_write(_journal_path(map_path), b''.join(_encode_record(record) for record in records[-HISTORY_LIMIT:]))
+        return len(pending)
+
+
+def _compaction_worker(map_path):
+    try:
+        count = compact_journal(map_path)
+        print(f"Journal de {map_path} compacté ({count} éditions)")
+    except Exception as e:
+        print(f"Erreur lors de la compaction du journal: {str(e)}")
+    finally:
+        with _locks_lock:
+            _compacting.pop(map_path, None)
+
+
+def schedule_compaction(map_path):
+    """
+    Lance la compaction du journal d'une carte dans un thread en arrière-plan.
+    """
+    with _locks_lock:
+        if map_path in _compacting:
+            return
+        thread = threading.Thread(target=_compaction_worker, args=(map_path,), name="journal-compaction", daemon=True)
+        _compacting[map_path] = thread
+        thread.start()
+
+
+def wait_for_compaction(timeout=None):
+    """
+    Attend la fin des compactions en cours (utile pour les scripts et les tests).
+
+    Returns:
+        bool: True si plus aucune compaction n'est en cours
+    """
+    with _locks_lock:
+        threads = list(_compacting.values())
+    for thread in threads:
+        thread.join(timeout)
+    with _locks_lock:
+        return not _compacting
+
+
+def active_edits(records):
+    """
+    Renvoie les ajouts d'obstacles qui n'ont pas été annulés, du plus ancien au plus récent.
+    """
+    undone = {record['target'] for record in records if record['kind'] == EDIT_UNDO}
+    return [record for record in records if record['kind'] == EDIT_ADD and record['id'] not in undone]
+
+
+def get_history(map_path):
+    """
+    Renvoie l'historique des éditions d'obstacles d'une carte, sans les cases.
+
+    Returns:
+        list: [{'id', 'timestamp', 'kind': 'add' | 'undo', 'target', 'cells', 'undone'}, ...]
+    """
+    records = read_journal(map_path)
+    undone = {record['target'] for record in records if record['kind'] == EDIT_UNDO}
+    return [
+        {
+            'id': record['id'],
+            'timestamp': record['timestamp'],
+            'kind': EDIT_KINDS.get(record['kind'], 'unknown'),
+            'target': record['target'] or None,
+            'cells': len(record['rows']),
+            'undone': record['id'] in undone
+        }
+        for record in records
+    ]
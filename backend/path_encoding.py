@@ -0,0 +1,160 @@
+import numpy as np
+
+from backend.poi_table import encode_strings, decode_strings
+
+# Clés du NPZ utilisées pour stocker les chemins
+PATH_KEYS = ('path_name_bytes', 'path_name_offsets', 'path_starts', 'path_step_offsets', 'path_codes')
+# Ancien format : dictionnaire picklé {nom: {'x': float64[], 'y': float64[]}} dans un tableau 0-d
+LEGACY_PATH_KEY = 'paths'
+
+# Codes de Freeman : un pas vers l'une des 8 cases voisines tient sur 3 bits
+DIRECTIONS = np.array([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)], dtype=np.int32)
+# Table (dx + 1, dy + 1) -> code, -1 pour un pas invalide
+_DIRECTION_CODES = np.full((3, 3), -1, dtype=np.int8)
+_DIRECTION_CODES[DIRECTIONS[:, 0] + 1, DIRECTIONS[:, 1] + 1] = np.arange(8)
+_BIT_WEIGHTS = np.array([4, 2, 1], dtype=np.uint8)
+
+
+def encode_path(points):
+    """
+    Encode un chemin de cases voisines en une case de départ et une suite de codes de direction.
+
+    Args:
+        points (list): Cases du chemin [(x, y), ...], chacune voisine (8-connexité) de la précédente
+
+    Returns:
+        tuple: (départ (x, y), codes np.uint8 de valeur 0 à 7, un par pas)
+
+    Raises:
+        ValueError: Si deux cases consécutives ne sont pas voisines
+    """
+    points = np.rint(np.asarray(points, dtype=float)).astype(np.int64).reshape(-1, 2)
+    steps = np.diff(points, axis=0)
+    if np.any(np.abs(steps) > 1):
+        raise ValueError("Le chemin contient un saut entre deux cases non voisines")
+    codes = _DIRECTION_CODES[steps[:, 0] + 1, steps[:, 1] + 1]
+    if np.any(codes < 0):
+        raise ValueError("Le chemin contient un pas nul")
+    return (int(points[0, 0]), int(points[0, 1])), codes.astype(np.uint8)
+
+
+def decode_path(start, codes):
+    """
+    Reconstruit les cases d'un chemin encodé par encode_path.
+
+    Returns:
+        np.ndarray: Cases du chemin, de forme (nombre de pas + 1, 2)
+    """
+    points = np.empty((len(codes) + 1, 2), dtype=np.int32)
+    points[0] = start
+    np.cumsum(DIRECTIONS[codes], axis=0, out=points[1:])
+    points[1:] += points[0]
+    return points
+
+
+def pack_paths(encoded_paths):
+    """
+    Range des chemins encodés dans des tableaux simples, prêts pour np.savez.
+
+    Les codes de tous les chemins sont concaténés puis compactés à 3 bits par pas.
+
+    Args:
+        encoded_paths (dict): {nom: (départ (x, y), codes)}
+
+    Returns:
+        dict: Tableaux à enregistrer sous les clés PATH_KEYS
+    """
+    names = list(encoded_paths)
+    starts = np.array([encoded_paths[name][0] for name in names], dtype=np.int32).reshape(-1, 2)
+    lengths = [len(encoded_paths[name][1]) for name in names]
+    step_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    step_offsets[1:] = np.cumsum(lengths)
+
+    codes = np.concatenate([encoded_paths[name][1] for name in names]) if names else np.zeros(0, dtype=np.uint8)
+    bits = ((codes[:, None] & _BIT_WEIGHTS) > 0).ravel()
+
+    name_bytes, name_offsets = encode_strings(names)
+    return {
+        'path_name_bytes': name_bytes,
+        'path_name_offsets': name_offsets,
+        'path_starts': starts,
+        'path_step_offsets': step_offsets,
+        'path_codes': np.packbits(bits)
+    }
+
+
+def _unpack_codes(data):
+    step_offsets = data['path_step_offsets']
+    bits = np.unpackbits(data['path_codes'], count=3 * int(step_offsets[-1]))
+    return bits.reshape(-1, 3) @ _BIT_WEIGHTS
+
+
+def unpack_paths(data):
+    """
+    Lit les chemins encodés du contenu d'un NPZ (dict ou NpzFile), sans les décoder.
+
+    Returns:
+        dict: {nom: (départ (x, y), codes)}
+    """
+    if 'path_starts' not in data:
+        return {}
+    names = decode_strings(data['path_name_bytes'], data['path_name_offsets'])
+    starts = data['path_starts']
+    step_offsets = data['path_step_offsets']
+    codes = _unpack_codes(data)
+    return {
+        name: (tuple(int(v) for v in starts[i]), codes[step_offsets[i]:step_offsets[i + 1]])
+        for i, name in enumerate(names)
+    }
+
+
+def decode_paths(data):
+    """
+    Décode d'un coup tous les chemins du contenu d'un NPZ (dict ou NpzFile).
+
+    Une seule somme cumulée sur l'ensemble des pas suffit : chaque chemin est ensuite
+    recalé sur sa case de départ.
+
+    Returns:
+        dict: {nom: np.ndarray de forme (n, 2) des cases (x, y)}
+    """
+    if 'path_starts' not in data:
+        return {}
+    names = decode_strings(data['path_name_bytes'], data['path_name_offsets'])
+    starts = data['path_starts'].astype(np.int64)
+    step_offsets = data['path_step_offsets']
+
+    # Position cumulée après chaque pas, précédée de 0
+    positions = np.zeros((int(step_offsets[-1]) + 1, 2), dtype=np.int64)
+    np.cumsum(DIRECTIONS[_unpack_codes(data)], axis=0, out=positions[1:])
+
+    paths = {}
+    for i, name in enumerate(names):
+        first, last = step_offsets[i], step_offsets[i + 1]
+        paths[name] = positions[first:last + 1] - positions[first] + starts[i]
+    return paths
+
+
+def migrate_legacy_paths(data):
+    """
+    Convertit au format compact les chemins picklés de l'ancien format (clé 'paths').
+
+    Args:
+        data (dict): Contenu du NPZ chargé avec allow_pickle=True, modifié en place
+
+    Returns:
+        bool: True si une conversion a eu lieu
+    """
+    if LEGACY_PATH_KEY not in data:
+        return False
+    legacy = data.pop(LEGACY_PATH_KEY)
+    legacy = legacy.item() if isinstance(legacy, np.ndarray) else legacy
+
+    encoded = unpack_paths(data)
+    for name, path in (legacy or {}).items():
+        try:
+            encoded[name] = encode_path(np.column_stack([path['x'], path['y']]))
+        except ValueError as e:
+            print(f"Chemin {name} ignoré lors de la conversion : {str(e)}")
+    data.update(pack_paths(encoded))
+    return True
@@ -1,52 +1,120 @@
+import time
 
-def astar_pathfinding(grid, start, end):
+import numpy as np
+
+# Number of expansions between two checks of the time limit and the cancel flag
+BUDGET_CHECK_INTERVAL = 256
+
+INFINITY = float('inf')
+
+
+class PathfindingTimeout(Exception):
+    """
+    Raised when a search exhausts its time or expansion budget, or is cancelled.
+    """
+
+
+def get_neighbors(grid, pos, width, height):
+    """
+    Returns the walkable neighbors of a cell with their move cost
+
+    Args:
+        grid: 2D array indexed as grid[y, x], where 1 represents a wall
+        pos: Tuple of (x, y) coordinates of the cell
+        width: Width of the grid
+        height: Height of the grid
+
+    Returns:
+        List of ((x, y), cost) tuples
+    """
+    x, y = pos
+    # Check all 8 directions (including diagonals)
+    directions = [
+        (x+1, y), (x-1, y), (x, y+1), (x, y-1),  # 4-directional
+        (x+1, y+1), (x-1, y-1), (x+1, y-1), (x-1, y+1)  # diagonals
+    ]
+
+    # Filter valid neighbors
+    neighbors = []
+    for nx, ny in directions:
+        # Check if within grid bounds
+        if nx < 0 or ny < 0 or nx >= width or ny >= height:
+            continue
+        # Check if walkable (0 is walkable, 1 is wall)
+        if grid[ny, nx] == 1:  # 1 means wall (unwalkable)
+            continue
+        # For diagonal movement, make sure we're not cutting corners through walls
+        if nx != x and ny != y:
+            if grid[y, nx] == 1 or grid[ny, x] == 1:  # Can't cut through walls
+                continue
+
+        # Calculate cost: 1.0 for cardinals, 1.4 for diagonals
+        cost = 1.4 if (nx != x and ny != y) else 1.0
+        neighbors.append(((nx, ny), cost))
+
+    return neighbors
+
+
+def astar_pathfinding(grid, start, end, time_limit=None, max_expansions=None, cancel_event=None, landmarks=None):
     """
     Implements A* pathfinding algorithm
+
+    With landmarks, the heuristic is the ALT lower bound max(|d(L, end) - d(L, n)|) over
+    the landmarks L (triangle inequality), combined with the Euclidean distance. It stays
+    admissible after obstacles are added, since path distances can only grow.
     
     Args:
-        grid: 2D matrix where 1 represents a wall (unwalkable) and 0 represents walkable space
+        grid: 2D array (NumPy array or TiledGrid) indexed as grid[y, x], where 1 represents a wall
+            (unwalkable) and 0 represents walkable space
         start: Tuple of (x, y) coordinates for the starting point
         end: Tuple of (x, y) coordinates for the end point
+        time_limit: Maximum search time in seconds (None for no limit)
+        max_expansions: Maximum number of expanded nodes (None for no limit)
+        cancel_event: Optional threading.Event, the search stops as soon as it is set
+        landmarks: Optional landmark distances of shape (k, height, width), giving the distance of
+            each cell to each of the k landmarks (inf when unreachable), as a NumPy array or a
+            TiledGrid layer (assembled once per query)
         
     Returns:
         List of (x, y) coordinates representing the path from start to end, or empty list if no path exists
+
+    Raises:
+        PathfindingTimeout: If the budget is exhausted or the search is cancelled
     """
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
     # Convert float coordinates to integers if needed
     start = (int(start[0]), int(start[1]))
     end = (int(end[0]), int(end[1]))
+    height, width = grid.shape[:2]
 
-    # Helper function to get neighboring cells
-    def get_neighbors(pos):
-        x, y = pos
-        # Check all 8 directions (including diagonals)
-        directions = [
-            (x+1, y), (x-1, y), (x, y+1), (x, y-1),  # 4-directional
-            (x+1, y+1), (x-1, y-1), (x+1, y-1), (x-1, y+1)  # diagonals
-        ]
-
-        # Filter valid neighbors
-        neighbors = []
-        for nx, ny in directions:
-            # Check if within grid bounds
-            if nx < 0 or ny < 0 or nx >= len(grid[0]) or ny >= len(grid):
-                continue
-            # Check if walkable (0 is walkable, 1 is wall)
-            if grid[ny][nx] == 1:  # 1 means wall (unwalkable)
-                continue
-            # For diagonal movement, make sure we're not cutting corners through walls
-            if nx != x and ny != y:
-                if grid[y][nx] == 1 or grid[ny][x] == 1:  # Can't cut through walls
-                    continue
-
-            # Calculate cost: 1.0 for cardinals, 1.4 for diagonals
-            cost = 1.4 if (nx != x and ny != y) else 1.0
-            neighbors.append(((nx, ny), cost))
-
-        return neighbors
+    fields = None
+    goal_distances = None
+    if landmarks is not None:
+        # One dense array per query: each expansion then reads its k distances with a single index
+        fields = landmarks if isinstance(landmarks, np.ndarray) else landmarks.to_array()
+        goal_column = fields[:, end[1], end[0]]
+        # Landmarks that cannot reach the goal give no bound
+        usable = np.isfinite(goal_column)
+        if not usable.all():
+            fields = fields[usable]
+        goal_distances = goal_column[usable].tolist()
+        # Goal outside the landmarks' component: no landmark can bound the distance
+        if not goal_distances:
+            goal_distances = None
 
-    # Heuristic function (Euclidean distance)
+    # Heuristic function (Euclidean distance, raised by the landmark bound when available)
     def heuristic(a, b):
-        return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+        bound = ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+        if goal_distances is None:
+            return bound
+        # Plain floats: a NumPy reduction per expansion costs more than the k subtractions
+        for goal_distance, distance in zip(goal_distances, fields[:, a[1], a[0]].tolist()):
+            # A landmark that cannot reach the cell (inf) gives no bound
+            if distance != INFINITY:
+                difference = abs(goal_distance - distance)
+                if difference > bound:
+                    bound = difference
+        return bound
 
     # Initialize data structures
     from heapq import heappush, heappop
@@ -64,10 +132,26 @@ def astar_pathfinding(grid, start, end):
     # Add start node to open set
     heappush(open_set, (f_score[start], start))
 
+    expansions = 0
+
     while open_set:
         # Get node with lowest f_score
         _, current = heappop(open_set)
 
+        # Skip stale entries: a node is pushed again each time a better path is found
+        if current in closed_set:
+            continue
+
+        # Check the search budget
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            raise PathfindingTimeout(f"Expansion budget exhausted ({max_expansions} nodes)")
+        if expansions % BUDGET_CHECK_INTERVAL == 0:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PathfindingTimeout("Search cancelled")
+            if deadline is not None and time.monotonic() > deadline:
+                raise PathfindingTimeout(f"Time budget exhausted ({time_limit} s)")
+
         # If we reached the end, construct and return the path
         if current == end:
             path = []
@@ -82,7 +166,7 @@ def astar_pathfinding(grid, start, end):
         closed_set.add(current)
 
         # Check all neighbors
-        for neighbor, move_cost in get_neighbors(current):
+        for neighbor, move_cost in get_neighbors(grid, current, width, height):
             # Skip if already visited
             if neighbor in closed_set:
                 continue
@@ -97,9 +181,82 @@ def astar_pathfinding(grid, start, end):
                 g_score[neighbor] = tentative_g_score
                 f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
 
-                # Add to open set if not already there
-                if neighbor not in [node for _, node in open_set]:
-                    heappush(open_set, (f_score[neighbor], neighbor))
+                # Add to open set (older entries for this node are skipped when popped)
+                heappush(open_set, (f_score[neighbor], neighbor))
 
     # If we get here, no path was found
-    return []
\ No newline at end of file
+    return []
+
+
+def multi_target_pathfinding(grid, start, ends, time_limit=None, max_expansions=None, cancel_event=None):
+    """
+    Finds the paths from one start to many end points with a single Dijkstra search
+
+    The search tree is shared by all end points, so routing N points costs one pass over
+    the reachable area instead of N A* searches. The search stops as soon as every end
+    point has been reached.
+
+    Args:
+        grid: 2D array (NumPy array or TiledGrid) indexed as grid[y, x], where 1 represents a wall
+        start: Tuple of (x, y) coordinates for the starting point
+        ends: List of (x, y) coordinates for the end points
+        time_limit: Maximum search time in seconds (None for no limit)
+        max_expansions: Maximum number of expanded nodes (None for no limit)
+        cancel_event: Optional threading.Event, the search stops as soon as it is set
+
+    Returns:
+        Dict mapping each reachable end point (x, y) to its path, unreachable end points are left out
+
+    Raises:
+        PathfindingTimeout: If the budget is exhausted or the search is cancelled
+    """
+    from heapq import heappush, heappop
+
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    start = (int(start[0]), int(start[1]))
+    remaining = {(int(end[0]), int(end[1])) for end in ends}
+    height, width = grid.shape[:2]
+
+    open_set = [(0, start)]
+    closed_set = set()
+    came_from = {}
+    g_score = {start: 0}
+    paths = {}
+    expansions = 0
+
+    while open_set and remaining:
+        cost, current = heappop(open_set)
+        if current in closed_set:
+            continue
+
+        # Check the search budget
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            raise PathfindingTimeout(f"Expansion budget exhausted ({max_expansions} nodes)")
+        if expansions % BUDGET_CHECK_INTERVAL == 0:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PathfindingTimeout("Search cancelled")
+            if deadline is not None and time.monotonic() > deadline:
+                raise PathfindingTimeout(f"Time budget exhausted ({time_limit} s)")
+
+        closed_set.add(current)
+        if current in remaining:
+            remaining.discard(current)
+            node = current
+            path = [node]
+            while node in came_from:
+                node = came_from[node]
+                path.append(node)
+            path.reverse()
+            paths[current] = path
+
+        for neighbor, move_cost in get_neighbors(grid, current, width, height):
+            if neighbor in closed_set:
+                continue
+            tentative_g_score = cost + move_cost
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                heappush(open_set, (tentative_g_score, neighbor))
+
+    return paths
@@ -0,0 +1,102 @@
+import numpy as np
+from scipy import ndimage
+
+# Voisinage 4-connexe utilisé pour tester les voisins d'un départ posé sur un obstacle
+CARDINAL_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def compute_component_labels(grid):
+    """
+    Étiquette les composantes connexes de l'espace libre d'une grille d'obstacles.
+
+    L'A* se déplace dans 8 directions mais interdit de couper un coin : une diagonale
+    n'est autorisée que si les deux cases orthogonales sont libres. Deux cases reliées
+    en diagonale le sont donc aussi par un chemin 4-connexe, et les composantes
+    "8-connexes sans coupe de coin" sont exactement les composantes 4-connexes.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles (True/1 = obstacle, False/0 = libre)
+
+    Returns:
+        np.ndarray: Matrice int32 de même forme (0 = obstacle, 1..n = composante)
+    """
+    free = ~np.asarray(grid).astype(bool)
+    labels, _ = ndimage.label(free)
+    return labels.astype(np.int32)
+
+
+def update_component_labels(labels, new_obstacles):
+    """
+    Met à jour les étiquettes après l'ajout d'obstacles, sans tout recalculer.
+
+    Ajouter des obstacles ne peut que couper une composante, jamais en fusionner deux :
+    seules les composantes touchées par les nouvelles cases sont ré-étiquetées. Le plus
+    grand morceau garde l'ancienne étiquette, les autres reçoivent de nouvelles étiquettes.
+
+    Args:
+        labels (np.ndarray): Étiquettes actuelles (modifiées en place)
+        new_obstacles (tuple): Indices (lignes, colonnes) des cases devenues obstacles
+
+    Returns:
+        np.ndarray: Les étiquettes mises à jour
+    """
+    rows, cols = new_obstacles
+    affected = np.unique(labels[rows, cols])
+    affected = affected[affected > 0]
+    labels[rows, cols] = 0
+
+    next_label = int(labels.max()) + 1
+    for label in affected:
+        region = labels == label
+        pieces, count = ndimage.label(region)
+        if count <= 1:
+            continue
+
+        # Le plus grand morceau conserve l'étiquette d'origine
+        sizes = np.bincount(pieces.ravel())[1:]
+        largest = int(np.argmax(sizes)) + 1
+        for piece in range(1, count + 1):
+            if piece == largest:
+                continue
+            labels[pieces == piece] = next_label
+            next_label += 1
+
+    return labels
+
+
+def are_connected(labels, start, end):
+    """
+    Indique en O(1) si l'A* peut relier deux points de la grille.
+
+    Args:
+        labels (np.ndarray): Étiquettes des composantes (voir compute_component_labels)
+        start (tuple): Coordonnées (x, y) du point de départ
+        end (tuple): Coordonnées (x, y) du point d'arrivée
+
+    Returns:
+        bool: False si aucun chemin ne peut exister, True sinon
+    """
+    start = (int(start[0]), int(start[1]))
+    end = (int(end[0]), int(end[1]))
+    if start == end:
+        return True
+
+    height, width = labels.shape
+    ex, ey = end
+    if not (0 <= ex < width and 0 <= ey < height):
+        return False
+    end_label = labels[ey, ex]
+    if end_label == 0:
+        # L'A* ne rentre jamais dans une case obstacle
+        return False
+
+    sx, sy = start
+    if 0 <= sx < width and 0 <= sy < height and labels[sy, sx] != 0:
+        return bool(labels[sy, sx] == end_label)
+
+    # Départ posé sur un obstacle : l'A* peut tout de même en sortir vers un voisin libre
+    for dx, dy in CARDINAL_OFFSETS:
+        nx, ny = sx + dx, sy + dy
+        if 0 <= nx < width and 0 <= ny < height and labels[ny, nx] == end_label:
+            return True
+    return False
@@ -0,0 +1,270 @@
+import time
+from heapq import heappush, heappop
+
+from backend.pathfinding.a_star import PathfindingTimeout, BUDGET_CHECK_INTERVAL
+from backend.pathfinding.components import are_connected
+
+# Actions possibles à chaque pas de temps : (dx, dy, coût). (0, 0) = attendre sur place
+MOVES = (
+    (0, 0, 1.0),
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, 1.4), (-1, -1, 1.4), (1, -1, 1.4), (-1, 1, 1.4),
+)
+# Index du mouvement opposé (pour détecter les échanges de place face à face)
+OPPOSITE_MOVE = (0, 2, 1, 4, 3, 6, 5, 8, 7)
+
+
+class ReservationTable:
+    """
+    Table de réservation espace-temps partagée par les karts d'une flotte.
+
+    Chaque réservation est un seul entier Python (t * nb_cases + indice de case) stocké
+    dans un set : pas de tuple par entrée, et un test d'occupation en O(1). Les
+    déplacements sont réservés de la même façon (clé de la case de départ * 9 + index du
+    mouvement) pour interdire à deux karts de se croiser en échangeant leurs places.
+    Un kart arrivé à destination y reste garé indéfiniment.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.cell_count = width * height
+        self._cells = set()
+        self._moves = set()
+        self._last_reserved = {}
+        self._parked = {}
+
+    def _cell_key(self, x, y, t):
+        return t * self.cell_count + y * self.width + x
+
+    def is_free(self, x, y, t):
+        """Indique si la case (x, y) est libre au temps t."""
+        parked_since = self._parked.get(y * self.width + x)
+        if parked_since is not None and t >= parked_since:
+            return False
+        return self._cell_key(x, y, t) not in self._cells
+
+    def is_swap(self, x, y, move, t):
+        """Indique si le mouvement depuis (x, y) entre t et t+1 croise un kart venant en sens inverse."""
+        dx, dy, _ = MOVES[move]
+        key = self._cell_key(x + dx, y + dy, t) * len(MOVES) + OPPOSITE_MOVE[move]
+        return key in self._moves
+
+    def last_reserved(self, x, y):
+        """Dernier instant où la case (x, y) est traversée par un kart (-1 si jamais)."""
+        return self._last_reserved.get(y * self.width + x, -1)
+
+    def reserve(self, timed_path):
+        """
+        Réserve le chemin d'un kart et le gare sur sa dernière case.
+
+        Args:
+            timed_path (list): Positions [(x, y), ...] du kart, une par pas de temps depuis t = 0
+        """
+        for t, (x, y) in enumerate(timed_path):
+            cell = y * self.width + x
+            self._cells.add(self._cell_key(x, y, t))
+            self._last_reserved[cell] = max(self._last_reserved.get(cell, -1), t)
+            if t + 1 < len(timed_path):
+                nx, ny = timed_path[t + 1]
+                move = _move_index(nx - x, ny - y)
+                self._moves.add(self._cell_key(x, y, t) * len(MOVES) + move)
+        x, y = timed_path[-1]
+        self.park(x, y, len(timed_path) - 1)
+
+    def park(self, x, y, t):
+        """Bloque la case (x, y) à partir du temps t (kart arrêté)."""
+        self._parked[y * self.width + x] = t
+
+    def is_parked(self, x, y):
+        """Indique si un kart est garé indéfiniment sur la case (x, y)."""
+        return y * self.width + x in self._parked
+
+    def unpark(self, x, y):
+        """Libère une case bloquée par park()."""
+        self._parked.pop(y * self.width + x, None)
+
+    def __len__(self):
+        return len(self._cells) + len(self._moves)
+
+
+def _move_index(dx, dy):
+    for index, (mx, my, _) in enumerate(MOVES):
+        if (mx, my) == (dx, dy):
+            return index
+    raise ValueError(f"Déplacement invalide ({dx}, {dy})")
+
+
+def space_time_astar(grid, start, goal, table, max_time, max_expansions=None, deadline=None, cancel_event=None):
+    """
+    A* dans l'espace (x, y, t) qui évite les réservations des autres karts.
+
+    Les règles de déplacement sont celles d'astar_pathfinding (8 directions, pas de coupe
+    de coin, coûts 1.0 / 1.4), avec en plus l'action "attendre" (coût 1.0). Chaque action
+    dure un pas de temps.
+
+    Args:
+        grid: Grille d'obstacles indexée grid[y, x] (1 = obstacle, 0 = libre)
+        start (tuple): Coordonnées (x, y) du départ
+        goal (tuple): Coordonnées (x, y) de l'arrivée
+        table (ReservationTable): Réservations des karts déjà planifiés
+        max_time (int): Horizon de temps maximum
+        max_expansions (int): Nombre maximum d'états développés (None = illimité)
+        deadline (float): Échéance time.monotonic() (None = illimitée)
+        cancel_event: threading.Event optionnel d'annulation
+
+    Returns:
+        list: Positions [(x, y), ...] par pas de temps, ou liste vide si aucun chemin
+
+    Raises:
+        PathfindingTimeout: Si le budget est épuisé ou la recherche annulée
+    """
+    height, width = grid.shape[:2]
+    gx, gy = goal
+
+    def heuristic(x, y):
+        return ((x - gx) ** 2 + (y - gy) ** 2) ** 0.5
+
+    start_state = (start[0], start[1], 0)
+    open_set = [(heuristic(*start), 0.0, start_state)]
+    g_score = {start_state: 0.0}
+    came_from = {}
+    closed_set = set()
+    expansions = 0
+
+    while open_set:
+        _, g, state = heappop(open_set)
+        if state in closed_set:
+            continue
+        closed_set.add(state)
+        x, y, t = state
+
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            raise PathfindingTimeout(f"Expansion budget exhausted ({max_expansions} nodes)")
+        if expansions % BUDGET_CHECK_INTERVAL == 0:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PathfindingTimeout("Search cancelled")
+            if deadline is not None and time.monotonic() > deadline:
+                raise PathfindingTimeout("Time budget exhausted")
+
+        # Arrivée valide seulement si aucun autre kart ne repasse ensuite par la case
+        if (x, y) == (gx, gy) and t >= table.last_reserved(gx, gy):
+            path = []
+            while state in came_from:
+                path.append(state[:2])
+                state = came_from[state]
+            path.append(state[:2])
+            path.reverse()
+            return path
+
+        if t >= max_time:
+            continue
+
+        for move, (dx, dy, cost) in enumerate(MOVES):
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            if move and grid[ny, nx] == 1:
+                continue
+            if dx and dy and (grid[y, nx] == 1 or grid[ny, x] == 1):
+                continue
+            if not table.is_free(nx, ny, t + 1) or (move and table.is_swap(x, y, move, t)):
+                continue
+
+            neighbor = (nx, ny, t + 1)
+            tentative_g_score = g + cost
+            if neighbor not in closed_set and tentative_g_score < g_score.get(neighbor, float('inf')):
+                g_score[neighbor] = tentative_g_score
+                came_from[neighbor] = state
+                heappush(open_set, (tentative_g_score + heuristic(nx, ny), tentative_g_score, neighbor))
+
+    return []
+
+
+def _planning_order(karts):
+    # Un kart dont l'arrivée est le départ d'un autre kart doit être planifié après lui,
+    # sinon il trouverait sa case d'arrivée occupée. Les cycles gardent l'ordre d'origine.
+    start_owner = {start: index for index, (start, _) in enumerate(karts)}
+    order, visited = [], set()
+    for first in range(len(karts)):
+        stack = []
+        index = first
+        while index is not None and index not in visited:
+            visited.add(index)
+            stack.append(index)
+            index = start_owner.get(karts[index][1])
+        order.extend(reversed(stack))
+    return order
+
+
+def plan_fleet(grid, karts, labels=None, max_time=None, max_expansions=None, time_limit=None, cancel_event=None):
+    """
+    Planifie sans collision les trajets d'une flotte de karts (A* coopératif).
+
+    Les karts sont planifiés dans l'ordre de la liste (ordre de priorité), chacun contre
+    la table de réservation remplie par les précédents ; un kart dont l'arrivée est le
+    départ d'un autre passe après celui-ci. Un kart pas encore planifié, ou qui n'a pas
+    pu l'être, reste garé sur sa case de départ : les autres l'évitent.
+
+    Args:
+        grid: Grille d'obstacles indexée grid[y, x] (1 = obstacle, 0 = libre)
+        karts (list): Liste de couples (départ, arrivée), chacun en coordonnées (x, y)
+        labels: Étiquettes des composantes connexes, pour rejeter d'emblée les arrivées inaccessibles
+        max_time (int): Horizon de temps (par défaut 2 * (hauteur + largeur))
+        max_expansions (int): Nombre maximum d'états développés par kart (None = illimité)
+        time_limit (float): Budget de temps total en secondes (None = illimité)
+        cancel_event: threading.Event optionnel d'annulation
+
+    Returns:
+        list: Pour chaque kart, dans l'ordre de karts, {'status': 'ok' | 'unreachable' | 'no_path'
+              | 'timeout' | 'invalid', 'path': [(x, y), ...]} où l'indice dans path est le pas de temps
+    """
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    height, width = grid.shape[:2]
+    if max_time is None:
+        max_time = 2 * (height + width)
+
+    karts = [((int(s[0]), int(s[1])), (int(e[0]), int(e[1]))) for s, e in karts]
+    results = [None] * len(karts)
+
+    # Deux karts ne peuvent partager ni un départ ni une arrivée
+    for endpoint in (0, 1):
+        seen = set()
+        for index, kart in enumerate(karts):
+            if kart[endpoint] in seen:
+                results[index] = {'status': 'invalid', 'path': []}
+            seen.add(kart[endpoint])
+
+    table = ReservationTable(width, height)
+    for start, _ in karts:
+        table.park(*start, 0)
+
+    for index in _planning_order(karts):
+        start, goal = karts[index]
+        if results[index] is not None:
+            continue
+        if labels is not None and not are_connected(labels, start, goal):
+            results[index] = {'status': 'unreachable', 'path': []}
+            continue
+
+        table.unpark(*start)
+
+        path = []
+        try:
+            # Une arrivée occupée indéfiniment par un kart garé ne sera jamais libre
+            if not table.is_parked(*goal):
+                path = space_time_astar(grid, start, goal, table, max_time, max_expansions=max_expansions,
+                                        deadline=deadline, cancel_event=cancel_event)
+        except PathfindingTimeout:
+            if cancel_event is not None and cancel_event.is_set():
+                raise
+            path = None
+
+        if path:
+            table.reserve(path)
+            results[index] = {'status': 'ok', 'path': path}
+        else:
+            table.park(*start, 0)
+            results[index] = {'status': 'timeout' if path is None else 'no_path', 'path': []}
+
+    return results
@@ -0,0 +1,105 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from backend import metrics
+from backend.pathfinding.a_star import astar_pathfinding, PathfindingTimeout
+
+# Pool de workers partagé, créé au premier appel
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=4):
+    """
+    Renvoie le pool de threads borné qui exécute les recherches de chemin.
+
+    Args:
+        max_workers (int): Nombre maximum de recherches simultanées (utilisé à la création)
+
+    Returns:
+        ThreadPoolExecutor: Le pool partagé
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pathfinding")
+        return _executor
+
+
+def run_in_pool(func, *args, time_limit=None, max_workers=4, metric='pathfinding', **kwargs):
+    """
+    Exécute une recherche dans le pool de workers avec un budget de temps, puis l'annule
+    si elle n'a pas abouti à l'échéance.
+
+    Le temps d'attente dans la file du pool est décompté du budget : func reçoit le temps
+    restant (time_limit) et un threading.Event (cancel_event) qu'elle doit surveiller.
+    Les requêtes, dépassements et durées sont enregistrés dans les métriques sous le
+    préfixe donné.
+
+    Args:
+        func (callable): Fonction de recherche acceptant time_limit et cancel_event
+        *args: Arguments positionnels transmis à func
+        time_limit (float): Budget de temps total en secondes (None = illimité)
+        max_workers (int): Taille du pool (utilisée à sa création)
+        metric (str): Préfixe des métriques
+        **kwargs: Arguments nommés transmis à func
+
+    Returns:
+        Le résultat de func
+
+    Raises:
+        PathfindingTimeout: Si le budget est épuisé
+    """
+    submitted_at = time.monotonic()
+    deadline = submitted_at + time_limit if time_limit is not None else None
+    cancel_event = threading.Event()
+
+    def search():
+        # Le budget restant tient compte du temps passé dans la file d'attente
+        remaining = None
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+        return func(*args, time_limit=remaining, cancel_event=cancel_event, **kwargs)
+
+    metrics.increment(f'{metric}.queries')
+    future = get_executor(max_workers).submit(search)
+    try:
+        result = future.result(timeout=time_limit)
+    except (FutureTimeout, PathfindingTimeout) as e:
+        cancel_event.set()
+        future.cancel()
+        metrics.increment(f'{metric}.timeouts')
+        metrics.observe(f'{metric}.duration', time.monotonic() - submitted_at)
+        if isinstance(e, PathfindingTimeout):
+            raise
+        raise PathfindingTimeout(f"Time budget exhausted ({time_limit} s)") from e
+
+    metrics.observe(f'{metric}.duration', time.monotonic() - submitted_at)
+    return result
+
+
+def run_path_query(grid, start, end, time_limit=None, max_expansions=None, max_workers=4, **kwargs):
+    """
+    Exécute une recherche A* dans le pool de workers, avec un budget de temps et d'expansions.
+
+    Args:
+        grid: Grille d'obstacles (1 = obstacle, 0 = libre)
+        start (tuple): Coordonnées (x, y) du départ
+        end (tuple): Coordonnées (x, y) de l'arrivée
+        time_limit (float): Budget de temps total en secondes (None = illimité)
+        max_expansions (int): Nombre maximum de noeuds développés (None = illimité)
+        max_workers (int): Taille du pool (utilisée à sa création)
+        **kwargs: Options supplémentaires transmises à astar_pathfinding
+
+    Returns:
+        list: Chemin [(x, y), ...] ou liste vide si aucun chemin n'existe
+
+    Raises:
+        PathfindingTimeout: Si le budget est épuisé
+    """
+    path = run_in_pool(astar_pathfinding, grid, start, end, time_limit=time_limit, max_workers=max_workers,
+                       max_expansions=max_expansions, **kwargs)
+    if not path:
+        metrics.increment('pathfinding.no_path')
+    return path
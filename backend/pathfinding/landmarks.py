@@ -0,0 +1,260 @@
+import os
+import threading
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from backend.grid_store import open_layer, write_layer, has_layer, delete_layer, get_store_dir
+from backend.obstacle_journal import map_lock
+
+# Nombre de landmarks par carte
+NUM_LANDMARKS = 8
+# Couche du stockage en tuiles : distances float32 de forme (landmarks, hauteur, largeur)
+LANDMARK_LAYER = 'landmark_distances'
+
+# Mises à jour en arrière-plan : un seul worker traite les cartes en attente (dict utilisé
+# comme ensemble ordonné), pour ne pas multiplier les calculs lourds en parallèle
+_pending = {}
+_pending_lock = threading.Lock()
+_worker = None
+
+# Distances chargées en mémoire, par chemin de carte : (version, tableau float32 dense)
+LANDMARK_CACHE_SIZE = 4
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def build_grid_graph(grid):
+    """
+    Construit le graphe des déplacements de l'A* sur l'espace libre d'une grille.
+
+    Mêmes règles que get_neighbors : 8 directions, coûts 1.0 / 1.4, et une diagonale
+    n'est permise que si les deux cases orthogonales sont libres.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles (True/1 = obstacle, False/0 = libre)
+
+    Returns:
+        scipy.sparse.csr_matrix: Matrice d'adjacence symétrique indexée par y * largeur + x
+    """
+    free = ~np.asarray(grid).astype(bool)
+    height, width = free.shape
+    index = np.arange(height * width).reshape(height, width)
+
+    sources, targets, costs = [], [], []
+
+    def add_edges(mask, source, target, cost):
+        # Les deux sens sont stockés : dijkstra(directed=True) évite de symétriser à chaque appel
+        sources.extend((source[mask], target[mask]))
+        targets.extend((target[mask], source[mask]))
+        costs.append(np.full(2 * int(mask.sum()), cost))
+
+    # Droite et bas (le sens inverse couvre gauche et haut)
+    add_edges(free[:, :-1] & free[:, 1:], index[:, :-1], index[:, 1:], 1.0)
+    add_edges(free[:-1, :] & free[1:, :], index[:-1, :], index[1:, :], 1.0)
+    # Diagonales bas-droite et bas-gauche, sans coupe de coin
+    square = free[:-1, :-1] & free[:-1, 1:] & free[1:, :-1] & free[1:, 1:]
+    add_edges(square, index[:-1, :-1], index[1:, 1:], 1.4)
+    add_edges(square, index[:-1, 1:], index[1:, :-1], 1.4)
+
+    size = height * width
+    return coo_matrix(
+        (np.concatenate(costs), (np.concatenate(sources), np.concatenate(targets))), shape=(size, size)
+    ).tocsr()
+
+
+def compute_landmarks(grid, labels, count=NUM_LANDMARKS, previous=None):
+    """
+    Choisit des landmarks par sélection du point le plus éloigné et calcule leurs cartes de distances.
+
+    Les landmarks sont pris dans la plus grande composante libre : chaque nouveau landmark
+    est la case la plus éloignée (en distance de chemin) des landmarks déjà choisis. Les
+    landmarks précédents encore valides sont conservés, pour que la couche puisse être
+    mise à jour sur place.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles
+        labels (np.ndarray): Étiquettes des composantes connexes (0 = obstacle)
+        count (int): Nombre de landmarks
+        previous (list): Cases [(x, y), ...] des landmarks précédents
+
+    Returns:
+        tuple: (cases np.int32 de forme (k, 2) en (x, y), distances float32 de forme (k, hauteur, largeur),
+               inf pour les cases inaccessibles)
+    """
+    labels = np.asarray(labels)
+    height, width = labels.shape
+    sizes = np.bincount(labels.ravel())
+    sizes[0] = 0
+    if not sizes.any():
+        return np.zeros((0, 2), dtype=np.int32), np.zeros((0, height, width), dtype=np.float32)
+    in_main = (labels == np.argmax(sizes)).ravel()
+
+    graph = build_grid_graph(grid)
+    chosen = [y * width + x for x, y in (previous or []) if in_main[y * width + x]][:count]
+    if not chosen:
+        # Point de départ arbitraire : le landmark initial est la case la plus éloignée de lui
+        seed = int(np.flatnonzero(in_main)[0])
+        distances = dijkstra(graph, indices=seed)
+        chosen = [int(np.argmax(np.where(in_main, distances, -1)))]
+
+    fields = []
+    nearest = np.full(height * width, np.inf)
+    while True:
+        for cell in chosen[len(fields):]:
+            distances = dijkstra(graph, indices=cell)
+            fields.append(distances.astype(np.float32).reshape(height, width))
+            nearest = np.minimum(nearest, distances)
+        if len(chosen) >= count:
+            break
+        candidate = int(np.argmax(np.where(in_main, nearest, -1)))
+        if nearest[candidate] <= 0:
+            break  # Plus aucune case distincte des landmarks existants
+        chosen.append(candidate)
+
+    cells = np.array([(cell % width, cell // width) for cell in chosen], dtype=np.int32)
+    return cells, np.stack(fields)
+
+
+def store_landmarks(map_path, count=NUM_LANDMARKS):
+    """
+    Calcule les landmarks d'une carte et les enregistre dans son stockage en tuiles.
+
+    Si les landmarks restent les mêmes, seules les tuiles dont les distances changent
+    sont réécrites (chaque tuile est remplacée de façon atomique). Rien n'est écrit si la
+    grille a changé pendant le calcul.
+
+    Returns:
+        bool: True si les landmarks ont été enregistrés
+    """
+    try:
+        if not os.path.exists(map_path):
+            return False
+        # Grille et composantes lues ensemble, sans édition en cours
+        with map_lock(map_path):
+            grid = open_layer(map_path, 'obstacle_grid').to_array()
+            labels = open_layer(map_path, 'component_labels').to_array()
+            previous = open_layer(map_path, LANDMARK_LAYER).meta.get('cells') if has_layer(map_path, LANDMARK_LAYER) else None
+
+        cells, fields = compute_landmarks(grid, labels, count, previous)
+
+        with map_lock(map_path):
+            # Une édition pendant le calcul (ajout, annulation, nouvelle rastérisation) rend ces
+            # distances fausses, voire non admissibles : elles ne sont pas écrites, et le calcul
+            # programmé par l'édition repartira de la nouvelle grille
+            if not np.array_equal(open_layer(map_path, 'obstacle_grid').to_array(), grid):
+                print(f"Grille de {map_path} modifiée pendant le calcul des landmarks : résultat ignoré")
+                return False
+            layer = open_layer(map_path, LANDMARK_LAYER) if has_layer(map_path, LANDMARK_LAYER) else None
+            if layer is not None and layer.meta.get('cells') == cells.tolist():
+                layer.write_array(fields)
+                layer.flush()
+            else:
+                write_layer(map_path, LANDMARK_LAYER, fields, extra_dims=1, fill=np.inf, meta={'cells': cells.tolist()})
+        with _cache_lock:
+            _cache.pop(map_path, None)
+        print(f"Landmarks calculés pour {map_path} : {len(cells)}")
+        return True
+    except Exception as e:
+        print(f"Erreur lors du calcul des landmarks: {str(e)}")
+        return False
+
+
+def _update_worker():
+    global _worker
+    while True:
+        with _pending_lock:
+            if not _pending:
+                _worker = None
+                return
+            map_path = next(iter(_pending))
+            del _pending[map_path]
+        store_landmarks(map_path)
+
+
+def schedule_landmark_update(map_path):
+    """
+    Recalcule les landmarks d'une carte dans un thread en arrière-plan.
+
+    Les cartes sont traitées une à une ; plusieurs demandes pour une carte encore en
+    attente sont regroupées en un seul calcul.
+    """
+    global _worker
+    with _pending_lock:
+        _pending[map_path] = True
+        if _worker is None:
+            _worker = threading.Thread(target=_update_worker, name="landmarks", daemon=True)
+            _worker.start()
+
+
+def invalidate_landmarks(map_path):
+    """
+    Supprime les landmarks d'une carte puis programme leur recalcul.
+
+    Des landmarks calculés avant l'ajout d'obstacles restent une borne inférieure valide
+    (les distances ne peuvent qu'augmenter), mais plus après un retrait d'obstacles :
+    il faut alors les invalider avec cette fonction.
+    """
+    with map_lock(map_path):
+        delete_layer(map_path, LANDMARK_LAYER)
+    with _cache_lock:
+        _cache.pop(map_path, None)
+    schedule_landmark_update(map_path)
+
+
+def _landmark_version(map_path):
+    # index.json change quand la couche est créée ou supprimée, et le dossier de la couche
+    # quand une tuile y est remplacée (renommage atomique)
+    store_dir = get_store_dir(map_path)
+    version = []
+    for path in (os.path.join(store_dir, "index.json"), os.path.join(store_dir, LANDMARK_LAYER)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        version.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(version)
+
+
+def load_landmarks(map_path):
+    """
+    Charge les distances aux landmarks d'une carte en un tableau dense, gardé en mémoire
+    tant que la couche ne change pas : l'A* lit alors les k distances d'une case par un
+    simple accès au tableau, sans passer par les tuiles à chaque expansion.
+
+    Returns:
+        np.ndarray: Distances float32 en lecture seule, de forme (landmarks, hauteur, largeur),
+                    ou None si elles n'ont pas encore été calculées
+    """
+    # Version lue avant la couche : une écriture faite pendant la lecture force un rechargement
+    version = _landmark_version(map_path)
+    if version is None:
+        return None
+    with _cache_lock:
+        cached = _cache.get(map_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    if not has_layer(map_path, LANDMARK_LAYER):
+        return None
+    fields = open_layer(map_path, LANDMARK_LAYER).to_array().astype(np.float32, copy=False)
+    fields.setflags(write=False)
+    with _cache_lock:
+        _cache.pop(map_path, None)
+        _cache[map_path] = (version, fields)
+        while len(_cache) > LANDMARK_CACHE_SIZE:
+            del _cache[next(iter(_cache))]
+    return fields
+
+
+def wait_for_landmark_updates(timeout=None):
+    """
+    Attend la fin des calculs de landmarks en cours (utile pour les scripts et les tests).
+
+    Returns:
+        bool: True si plus aucun calcul n'est en cours
+    """
+    worker = _worker
+    if worker is not None:
+        worker.join(timeout)
+    return _worker is None
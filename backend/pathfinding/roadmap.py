@@ -0,0 +1,656 @@
+import os
+import threading
+
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+from backend.grid_store import get_store_dir, open_layer, save_npz
+from backend.obstacle_journal import map_lock
+from backend.pathfinding.landmarks import build_grid_graph
+
+# Fichier de la roadmap, dans le dossier de tuiles de la carte
+ROADMAP_FILE = "roadmap.npz"
+# Écart minimal (au carré, en cases) entre les obstacles les plus proches de deux cases
+# voisines pour que l'une d'elles soit sur l'axe médian : élimine les branches parasites
+# dues aux marches d'escalier des contours rastérisés
+MIN_FEATURE_GAP2 = 5
+# Écart minimal relatif à la distance aux obstacles (au carré) : loin d'un contour courbe,
+# les obstacles les plus proches de deux cases voisines diffèrent de quelques cases sans
+# que ce soit un axe médian (un couloir donne un écart d'environ deux fois la distance)
+MIN_FEATURE_RATIO2 = 0.5
+# Nombre de cases de la roadmap testées (des plus proches aux plus éloignées) pour
+# raccorder un point de départ ou d'arrivée en ligne droite : un premier lot, puis un
+# lot élargi si aucune n'est visible (point derrière un coin)
+ATTACH_CANDIDATES = (16, 128)
+# Marge initiale (en cases) autour d'une édition pour la reconstruction locale
+LOCAL_MARGIN = 16
+
+# Déplacements de l'A* : (dx, dy, coût)
+_STEPS = [(1, 0, 1.0), (0, 1, 1.0), (1, 1, 1.4), (-1, 1, 1.4)]
+
+# Mises à jour en arrière-plan : un seul worker, comme pour les landmarks. Pour chaque carte
+# en attente, la liste des cases modifiées, ou None pour une reconstruction complète
+_pending = {}
+_pending_lock = threading.Lock()
+_worker = None
+
+# Roadmaps chargées en mémoire, par chemin de carte : (date de modification, Roadmap)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _roadmap_path(map_path):
+    return os.path.join(get_store_dir(map_path), ROADMAP_FILE)
+
+
+def medial_axis(grid):
+    """
+    Squelette de l'espace libre d'une grille (axe médian entier de Hesselink et Roerdink).
+
+    Pour chaque paire de cases libres voisines, on compare les obstacles les plus proches
+    de chacune (transformée de distance avec indices) : s'ils sont éloignés, l'axe médian
+    passe entre les deux cases, et on garde celle qui est la plus proche de la médiatrice
+    des deux obstacles.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles (True/1 = obstacle)
+
+    Returns:
+        np.ndarray: Masque booléen des cases du squelette
+    """
+    free = ~np.asarray(grid).astype(bool)
+    skeleton = np.zeros(free.shape, dtype=bool)
+    if free.all() or not free.any():
+        return skeleton
+    features = ndimage.distance_transform_edt(free, return_distances=False, return_indices=True)
+    fy, fx = features[0].astype(np.int64), features[1].astype(np.int64)
+    ys, xs = np.indices(free.shape)
+    distance2 = (fx - xs) ** 2 + (fy - ys) ** 2
+
+    # Paires (p, q = p + droite) puis (p, q = p + bas)
+    for axis in (1, 0):
+        p = (slice(None), slice(None, -1)) if axis == 1 else (slice(None, -1), slice(None))
+        q = (slice(None), slice(1, None)) if axis == 1 else (slice(1, None), slice(None))
+        dfx, dfy = fx[p] - fx[q], fy[p] - fy[q]
+        gap2 = dfx * dfx + dfy * dfy
+        threshold = np.maximum(MIN_FEATURE_GAP2, MIN_FEATURE_RATIO2 * np.minimum(distance2[p], distance2[q]))
+        candidate = free[p] & free[q] & (gap2 >= threshold)
+        # Signe de (fp - fq) . (fp + fq - p - q) : du côté de p si positif, de q si négatif
+        crit = dfx * (fx[p] + fx[q] - xs[p] - xs[q]) + dfy * (fy[p] + fy[q] - ys[p] - ys[q])
+        skeleton[p] |= candidate & (crit >= 0)
+        skeleton[q] |= candidate & (crit <= 0)
+    return skeleton
+
+
+def connect_skeleton(grid, skeleton):
+    """
+    Relie entre eux les morceaux du squelette d'une même zone libre (l'axe médian entier
+    n'est pas toujours connexe).
+
+    Un Dijkstra lancé depuis toutes les cases du squelette partage l'espace libre entre
+    les morceaux ; là où deux morceaux se touchent, le chemin le plus court qui passe par
+    la frontière est un pont candidat. Les ponts sont ajoutés du moins coûteux au plus
+    coûteux, tant qu'ils relient des morceaux encore séparés (arbre couvrant minimal).
+
+    Returns:
+        np.ndarray: Squelette complété par les cases des ponts
+    """
+    cells = np.flatnonzero(skeleton)
+    if not len(cells):
+        return skeleton
+    graph = build_grid_graph(grid)
+    count, component = connected_components(graph[cells][:, cells], directed=False)
+    if count <= 1:
+        return skeleton
+
+    distances, predecessors, sources = dijkstra(
+        graph, indices=cells, min_only=True, return_predecessors=True
+    )
+    local = np.full(graph.shape[0], -1, dtype=np.int64)
+    local[cells] = np.arange(len(cells))
+    owner = np.full(graph.shape[0], -1, dtype=np.int64)
+    reached = sources >= 0
+    owner[reached] = component[local[sources[reached]]]
+
+    edges = graph.tocoo()
+    u, v = edges.row, edges.col
+    crossing = (owner[u] >= 0) & (owner[v] >= 0) & (owner[u] < owner[v])
+    u, v = u[crossing], v[crossing]
+    costs = distances[u] + edges.data[crossing] + distances[v]
+    # Meilleur pont candidat pour chaque paire de morceaux
+    order = np.argsort(costs, kind='stable')
+    _, first = np.unique(owner[u[order]] * count + owner[v[order]], return_index=True)
+    order = order[np.sort(first)]
+
+    parent = list(range(count))
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    skeleton = skeleton.copy()
+    flat = skeleton.reshape(-1)
+    for i in order:
+        a, b = find(owner[u[i]]), find(owner[v[i]])
+        if a == b:
+            continue
+        parent[a] = b
+        for cell in (u[i], v[i]):
+            while cell >= 0 and not flat[cell]:
+                flat[cell] = True
+                cell = predecessors[cell]
+    return skeleton
+
+
+def _skeleton_edges(grid, skeleton):
+    # Arêtes entre cases voisines du squelette, avec les règles de déplacement de l'A*
+    free = ~np.asarray(grid).astype(bool)
+    height, width = free.shape
+    ys, xs = np.nonzero(skeleton)
+    sources, targets, costs = [], [], []
+    for dx, dy, cost in _STEPS:
+        nx, ny = xs + dx, ys + dy
+        inside = (nx >= 0) & (nx < width) & (ny < height)
+        keep = np.zeros(len(xs), dtype=bool)
+        keep[inside] = skeleton[ny[inside], nx[inside]]
+        if dx and dy:
+            # Diagonale sans coupe de coin, et inutile si une case du squelette fait déjà le coin
+            corner_free = np.zeros(len(xs), dtype=bool)
+            corner_free[keep] = free[ys[keep], nx[keep]] & free[ny[keep], xs[keep]]
+            corner_skeleton = np.zeros(len(xs), dtype=bool)
+            corner_skeleton[keep] = skeleton[ys[keep], nx[keep]] | skeleton[ny[keep], xs[keep]]
+            keep &= corner_free & ~corner_skeleton
+        sources.append(ys[keep] * width + xs[keep])
+        targets.append(ny[keep] * width + nx[keep])
+        costs.append(np.full(int(keep.sum()), cost))
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(costs)
+
+
+def build_roadmap(grid, skeleton=None):
+    """
+    Construit la roadmap d'une grille : le squelette de l'espace libre est réduit à un
+    graphe dont les nœuds sont les extrémités et les bifurcations, et les arêtes les
+    chaînes de cases qui les relient.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles
+        skeleton (np.ndarray): Squelette déjà calculé et connecté (calculé sinon)
+
+    Returns:
+        dict: Tableaux de la roadmap (voir Roadmap)
+    """
+    grid = np.asarray(grid).astype(bool)
+    if skeleton is None:
+        skeleton = connect_skeleton(grid, medial_axis(grid))
+    height, width = grid.shape
+    sources, targets, costs = _skeleton_edges(grid, skeleton)
+
+    # Voisinage de chaque case du squelette (graphe non orienté)
+    cell_ids = np.flatnonzero(skeleton)
+    local = np.full(height * width, -1, dtype=np.int64)
+    local[cell_ids] = np.arange(len(cell_ids))
+    count = len(cell_ids)
+    adjacency = coo_matrix(
+        (np.concatenate([costs, costs]),
+         (np.concatenate([local[sources], local[targets]]), np.concatenate([local[targets], local[sources]]))),
+        shape=(count, count)
+    ).tocsr()
+    indptr, indices, weights = adjacency.indptr, adjacency.indices, adjacency.data
+    degree = np.diff(indptr)
+
+    # Nœuds : toutes les cases sauf celles de degré 2 (milieux de chaînes)
+    is_node = degree != 2
+    node_of = np.full(count, -1, dtype=np.int64)
+    visited = np.zeros(count, dtype=bool)
+    chains, chain_costs, edges = [], [], []
+
+    def walk(start, first):
+        # Parcourt la chaîne depuis un nœud jusqu'au nœud suivant
+        neighbors = indices[indptr[start]:indptr[start + 1]]
+        cells = [start, first]
+        cumulative = [0.0, float(weights[indptr[start] + np.flatnonzero(neighbors == first)[0]])]
+        previous, current = start, first
+        while not is_node[current]:
+            visited[current] = True
+            a, b = indices[indptr[current]:indptr[current + 1]]
+            following, step = (b, weights[indptr[current] + 1]) if a == previous else (a, weights[indptr[current]])
+            cells.append(following)
+            cumulative.append(cumulative[-1] + float(step))
+            previous, current = current, following
+        return cells, cumulative
+
+    def add_chains(node):
+        for neighbor in indices[indptr[node]:indptr[node + 1]]:
+            if not is_node[neighbor] and visited[neighbor]:
+                continue
+            if is_node[neighbor] and neighbor < node:
+                continue  # Arête directe entre deux nœuds : ajoutée une seule fois
+            cells, cumulative = walk(node, neighbor)
+            if cells[-1] == node:
+                continue  # Boucle sur un même nœud : inutile pour les plus courts chemins
+            chains.append(np.array(cells, dtype=np.int64))
+            chain_costs.append(np.array(cumulative))
+            edges.append((node, cells[-1], cumulative[-1]))
+
+    for cell in np.flatnonzero(is_node):
+        add_chains(cell)
+    # Cycles sans bifurcation : une de leurs cases devient un nœud
+    for cell in range(count):
+        if not visited[cell] and not is_node[cell]:
+            is_node[cell] = True
+            add_chains(cell)
+
+    nodes = np.flatnonzero(is_node)
+    node_of[nodes] = np.arange(len(nodes))
+    offsets = np.cumsum([0] + [len(chain) for chain in chains])
+    chain_cells = np.concatenate(chains) if chains else np.zeros(0, dtype=np.int64)
+    return {
+        'skeleton': np.column_stack([cell_ids % width, cell_ids // width]).astype(np.int32),
+        'shape': np.array([height, width]),
+        'nodes': nodes,
+        'edges': np.array([(node_of[u], node_of[v]) for u, v, _ in edges], dtype=np.int64).reshape(-1, 2),
+        'edge_costs': np.array([cost for _, _, cost in edges]),
+        'chain_offsets': offsets.astype(np.int64),
+        'chain_cells': chain_cells,
+        'chain_costs': np.concatenate(chain_costs) if chain_costs else np.zeros(0)
+    }
+
+
+def _blocked(grid, xs, ys):
+    # Obstacles aux cases données, pour une grille NumPy ou un TiledGrid
+    if hasattr(grid, 'get_cells'):
+        return grid.get_cells(ys, xs)
+    return np.asarray(grid)[ys, xs]
+
+
+def line_of_sight(grid, start, end):
+    """
+    Cases d'une ligne droite (8 directions) entre deux cases, si elle ne traverse aucun
+    obstacle ni ne coupe de coin.
+
+    Returns:
+        tuple: (liste de cases [(x, y), ...], coût) ou (None, inf) si la ligne est bloquée
+    """
+    x0, y0 = start
+    x1, y1 = end
+    steps = max(abs(x1 - x0), abs(y1 - y0))
+    t = np.arange(steps + 1) / max(steps, 1)
+    xs = np.rint(x0 + t * (x1 - x0)).astype(np.int64)
+    ys = np.rint(y0 + t * (y1 - y0)).astype(np.int64)
+    diagonal = (xs[1:] != xs[:-1]) & (ys[1:] != ys[:-1])
+    # Cases de la ligne, puis les deux cases de coin de chaque pas en diagonale
+    check_x = np.concatenate([xs, xs[1:][diagonal], xs[:-1][diagonal]])
+    check_y = np.concatenate([ys, ys[:-1][diagonal], ys[1:][diagonal]])
+    if np.any(_blocked(grid, check_x, check_y)):
+        return None, float('inf')
+    cost = float(len(xs) - 1 + 0.4 * diagonal.sum())
+    return list(zip(xs.tolist(), ys.tolist())), cost
+
+
+def shortcut_path(grid, path):
+    """
+    Raccourcit un chemin : depuis chaque point, la portion jusqu'au point le plus lointain
+    visible en ligne droite (cherché par pas doublés) est remplacée par cette ligne.
+
+    Returns:
+        list: Chemin raccourci [(x, y), ...]
+    """
+    result = [path[0]]
+    i, last = 0, len(path) - 1
+    while i < last:
+        j, line = i + 1, path[i:i + 2]
+        step = 2
+        while j < last:
+            k = min(i + step, last)
+            candidate, _ = line_of_sight(grid, path[i], path[k])
+            if candidate is None:
+                break
+            j, line = k, candidate
+            step *= 2
+        result.extend(line[1:])
+        i = j
+    return result
+
+
+class Roadmap:
+    """
+    Roadmap d'une carte chargée en mémoire : graphe réduit du squelette de l'espace libre,
+    arbre k-d des cases du squelette, et position de chaque case sur les chaînes.
+    """
+
+    def __init__(self, arrays):
+        self.shape = tuple(int(v) for v in arrays['shape'])
+        self.skeleton = np.asarray(arrays['skeleton'])
+        self.nodes = np.asarray(arrays['nodes'])
+        self.edges = np.asarray(arrays['edges'])
+        self.edge_costs = np.asarray(arrays['edge_costs'])
+        self.chain_offsets = np.asarray(arrays['chain_offsets'])
+        self.chain_cells = np.asarray(arrays['chain_cells'])
+        self.chain_costs = np.asarray(arrays['chain_costs'])
+        self.tree = cKDTree(self.skeleton) if len(self.skeleton) else None
+
+        # Position de chaque case du squelette : nœud, ou (arête, indice dans la chaîne)
+        count = len(self.skeleton)
+        self.cell_node = np.full(count, -1, dtype=np.int64)
+        self.cell_node[self.nodes] = np.arange(len(self.nodes))
+        self.cell_edge = np.full(count, -1, dtype=np.int64)
+        self.cell_offset = np.zeros(count, dtype=np.int64)
+        for edge in range(len(self.edges)):
+            start, end = self.chain_offsets[edge], self.chain_offsets[edge + 1]
+            inner = self.chain_cells[start + 1:end - 1]
+            self.cell_edge[inner] = edge
+            self.cell_offset[inner] = np.arange(1, end - start - 1)
+
+        # Graphe des nœuds : entre deux nœuds, seule la chaîne la plus courte est gardée
+        best = {}
+        for edge, ((u, v), cost) in enumerate(zip(self.edges, self.edge_costs)):
+            key = (min(u, v), max(u, v))
+            if key not in best or cost < self.edge_costs[best[key]]:
+                best[key] = edge
+        self._pair_edge = best
+        pairs = np.array(list(best.keys()), dtype=np.int64).reshape(-1, 2)
+        pair_costs = self.edge_costs[list(best.values())] if best else np.zeros(0)
+        size = len(self.nodes)
+        self.graph = coo_matrix(
+            (np.concatenate([pair_costs, pair_costs]),
+             (np.concatenate([pairs[:, 0], pairs[:, 1]]), np.concatenate([pairs[:, 1], pairs[:, 0]]))),
+            shape=(size, size)
+        ).tocsr()
+
+    def _chain(self, edge):
+        start, end = self.chain_offsets[edge], self.chain_offsets[edge + 1]
+        return self.chain_cells[start:end], self.chain_costs[start:end]
+
+    def _cell_xy(self, local):
+        x, y = self.skeleton[local]
+        return int(x), int(y)
+
+    def _exits(self, local):
+        # Accès d'une case du squelette aux nœuds du graphe : [(nœud, coût, cases de la case au nœud)]
+        node = self.cell_node[local]
+        if node >= 0:
+            return [(int(node), 0.0, np.array([local]))]
+        edge, offset = self.cell_edge[local], self.cell_offset[local]
+        cells, cumulative = self._chain(edge)
+        u, v = self.edges[edge]
+        return [
+            (int(u), float(cumulative[offset]), cells[offset::-1]),
+            (int(v), float(cumulative[-1] - cumulative[offset]), cells[offset:])
+        ]
+
+    def _attach(self, grid, point):
+        # Case du squelette la plus proche reliée au point par une ligne droite
+        if self.tree is None:
+            return None
+        tested = 0
+        for k in ATTACH_CANDIDATES:
+            _, candidates = self.tree.query(point, k=min(k, len(self.skeleton)))
+            for local in np.atleast_1d(candidates)[tested:]:
+                if self.cell_node[local] < 0 and self.cell_edge[local] < 0:
+                    continue  # Case d'une boucle sans bifurcation, absente du graphe
+                line, cost = line_of_sight(grid, point, self._cell_xy(local))
+                if line is not None:
+                    return int(local), line, cost
+            tested = k
+        return None
+
+    def _edge_cells(self, u, v):
+        # Cases de la chaîne la plus courte du nœud u au nœud v
+        edge = self._pair_edge[(min(u, v), max(u, v))]
+        cells, _ = self._chain(edge)
+        return cells if self.edges[edge][0] == u else cells[::-1]
+
+    def query(self, grid, start, end):
+        """
+        Calcule un chemin entre deux cases libres en suivant la roadmap : chaque extrémité
+        est raccordée en ligne droite à une case proche du squelette, puis un Dijkstra sur
+        le graphe réduit relie les deux raccordements.
+
+        Args:
+            grid: Grille d'obstacles actuelle (np.ndarray ou TiledGrid)
+            start (tuple): Coordonnées (x, y) du départ
+            end (tuple): Coordonnées (x, y) de l'arrivée
+
+        Returns:
+            list: Chemin [(x, y), ...], ou None si la roadmap ne relie pas les deux points
+        """
+        start = (int(start[0]), int(start[1]))
+        end = (int(end[0]), int(end[1]))
+        if start == end:
+            return [start]
+        line, _ = line_of_sight(grid, start, end)
+        if line is not None:
+            return line
+        if not len(self.nodes):
+            return None
+        start_attach = self._attach(grid, start)
+        end_attach = self._attach(grid, end)
+        if start_attach is None or end_attach is None:
+            return None
+        start_local, start_line, start_cost = start_attach
+        end_local, end_line, end_cost = end_attach
+
+        best_cost, best_cells = float('inf'), None
+        # Les deux raccordements sur la même chaîne : chemin direct le long de la chaîne
+        same_edge = self.cell_edge[start_local] >= 0 and self.cell_edge[start_local] == self.cell_edge[end_local]
+        if same_edge:
+            cells, cumulative = self._chain(self.cell_edge[start_local])
+            i, j = self.cell_offset[start_local], self.cell_offset[end_local]
+            best_cost = abs(cumulative[j] - cumulative[i])
+            best_cells = cells[i:j + 1] if i <= j else cells[j:i + 1][::-1]
+
+        start_exits, end_exits = self._exits(start_local), self._exits(end_local)
+        distances, predecessors = dijkstra(
+            self.graph, indices=[node for node, _, _ in start_exits], return_predecessors=True
+        )
+        best_route = None
+        for row, (source, source_cost, _) in enumerate(start_exits):
+            for column, (target, target_cost, _) in enumerate(end_exits):
+                cost = source_cost + distances[row, target] + target_cost
+                if cost < best_cost:
+                    best_cost, best_route = cost, (row, column)
+
+        if best_route is not None:
+            row, column = best_route
+            source, _, source_cells = start_exits[row]
+            target, _, target_cells = end_exits[column]
+            node_path = [target]
+            while node_path[-1] != source:
+                node_path.append(predecessors[row, node_path[-1]])
+            node_path.reverse()
+            best_cells = np.concatenate(
+                [source_cells] + [self._edge_cells(u, v)[1:] for u, v in zip(node_path, node_path[1:])]
+                + [target_cells[::-1][1:]]
+            )
+        if best_cells is None:
+            return None
+
+        path = np.concatenate([np.array(start_line), self.skeleton[best_cells], np.array(end_line[::-1])])
+        # Suppression des cases répétées aux raccordements
+        path = path[np.concatenate([[True], (path[1:] != path[:-1]).any(axis=1)])]
+        # Roadmap en retard sur les éditions : le chemin ne doit traverser aucun obstacle actuel
+        if np.any(_blocked(grid, path[:, 0], path[:, 1])):
+            return None
+        return shortcut_path(grid, [tuple(cell) for cell in path.tolist()])
+
+
+def store_roadmap(map_path, rows=None, cols=None):
+    """
+    Calcule la roadmap d'une carte et l'enregistre dans son stockage en tuiles.
+
+    Si des cases modifiées sont données, seul le squelette autour de ces cases est
+    recalculé (voir update_skeleton), puis le graphe est reconstruit ; sans roadmap
+    existante, il n'y a rien à mettre à jour. Rien n'est écrit si la grille a changé
+    pendant le calcul : le calcul est alors reprogrammé.
+
+    Returns:
+        bool: True si la roadmap a été enregistrée
+    """
+    try:
+        if not os.path.exists(map_path):
+            return False
+        path = _roadmap_path(map_path)
+        if rows is not None and not has_roadmap(map_path):
+            return False
+        with map_lock(map_path):
+            grid = open_layer(map_path, 'obstacle_grid').to_array().astype(bool)
+
+        skeleton = None
+        if rows is not None and len(rows):
+            with np.load(path) as data:
+                stored_shape = tuple(data['shape'])
+                cells = data['skeleton']
+            if stored_shape == grid.shape:
+                skeleton = np.zeros(grid.shape, dtype=bool)
+                skeleton[cells[:, 1], cells[:, 0]] = True
+                skeleton = update_skeleton(grid, skeleton, rows, cols)
+        if skeleton is None:
+            skeleton = connect_skeleton(grid, medial_axis(grid))
+        arrays = build_roadmap(grid, skeleton)
+
+        with map_lock(map_path):
+            # Une édition pendant le calcul : les cases de ce calcul sont regroupées avec les
+            # siennes, pour que la mise à jour suivante couvre les deux
+            if not np.array_equal(open_layer(map_path, 'obstacle_grid').to_array(), grid):
+                print(f"Grille de {map_path} modifiée pendant le calcul de la roadmap : calcul reprogrammé")
+                schedule_roadmap_update(map_path, rows, cols)
+                return False
+            save_npz(path, arrays)
+        with _cache_lock:
+            _cache.pop(map_path, None)
+        print(f"Roadmap calculée pour {map_path} : {int(skeleton.sum())} cases de squelette")
+        return True
+    except Exception as e:
+        print(f"Erreur lors du calcul de la roadmap: {str(e)}")
+        return False
+
+
+def update_skeleton(grid, skeleton, rows, cols):
+    """
+    Met à jour le squelette autour de cases modifiées (ajoutées ou retirées des obstacles).
+
+    Le squelette est recalculé dans une fenêtre autour des cases, agrandie jusqu'à ce que
+    la distance aux obstacles y soit partout inférieure à la marge : les obstacles les plus
+    proches sont alors dans la zone calculée, et les cases hors de la fenêtre ne peuvent pas
+    avoir changé. La fenêtre est évaluée sans les cases modifiées, ce qui couvre la grille
+    d'avant comme celle d'après l'édition.
+
+    Returns:
+        np.ndarray: Squelette mis à jour
+    """
+    height, width = grid.shape
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    top, bottom, left, right = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+    margin = LOCAL_MARGIN
+
+    while True:
+        inner = (max(0, top - margin), min(height, bottom + margin), max(0, left - margin), min(width, right + margin))
+        outer = (max(0, inner[0] - margin), min(height, inner[1] + margin),
+                 max(0, inner[2] - margin), min(width, inner[3] + margin))
+        if outer == (0, height, 0, width):
+            return connect_skeleton(grid, medial_axis(grid))
+        window = grid[outer[0]:outer[1], outer[2]:outer[3]]
+        relaxed = window.copy()
+        relaxed[rows - outer[0], cols - outer[2]] = False
+        distances = ndimage.distance_transform_edt(~relaxed)
+        core = distances[inner[0] - outer[0]:inner[1] - outer[0], inner[2] - outer[2]:inner[3] - outer[2]]
+        if core.max() <= margin - 2:
+            break
+        margin *= 2
+
+    # Les cases au bord de la fenêtre intérieure dépendent de voisines hors fenêtre : exclues,
+    # sauf au bord de la grille
+    y0 = inner[0] + (1 if inner[0] > 0 else 0) - outer[0]
+    y1 = inner[1] - (1 if inner[1] < height else 0) - outer[0]
+    x0 = inner[2] + (1 if inner[2] > 0 else 0) - outer[2]
+    x1 = inner[3] - (1 if inner[3] < width else 0) - outer[2]
+    local = skeleton[outer[0]:outer[1], outer[2]:outer[3]].copy()
+    local[y0:y1, x0:x1] = medial_axis(window)[y0:y1, x0:x1]
+
+    # Les ponts sont recalculés dans la fenêtre extérieure
+    skeleton = skeleton.copy()
+    skeleton[outer[0]:outer[1], outer[2]:outer[3]] = connect_skeleton(window, local)
+    return skeleton
+
+
+def has_roadmap(map_path):
+    """
+    Indique si la roadmap d'une carte a déjà été calculée.
+    """
+    return os.path.exists(_roadmap_path(map_path))
+
+
+def load_roadmap(map_path):
+    """
+    Charge la roadmap d'une carte (gardée en mémoire tant que le fichier ne change pas).
+
+    Returns:
+        Roadmap: La roadmap, ou None si elle n'a pas encore été calculée
+    """
+    path = _roadmap_path(map_path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(map_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with np.load(path) as data:
+        roadmap = Roadmap({key: data[key] for key in data.files})
+    with _cache_lock:
+        _cache[map_path] = (mtime, roadmap)
+    return roadmap
+
+
+def _update_worker():
+    global _worker
+    while True:
+        with _pending_lock:
+            if not _pending:
+                _worker = None
+                return
+            map_path = next(iter(_pending))
+            edits = _pending.pop(map_path)
+        if edits is None:
+            store_roadmap(map_path)
+        else:
+            store_roadmap(map_path, np.concatenate([r for r, _ in edits]), np.concatenate([c for _, c in edits]))
+
+
+def schedule_roadmap_update(map_path, rows=None, cols=None):
+    """
+    Recalcule la roadmap d'une carte dans un thread en arrière-plan : entièrement, ou
+    seulement autour des cases modifiées si elles sont données.
+
+    Les demandes pour une carte encore en attente sont regroupées en un seul calcul.
+    """
+    global _worker
+    with _pending_lock:
+        if rows is None:
+            _pending[map_path] = None
+        elif map_path not in _pending:
+            _pending[map_path] = [(np.asarray(rows), np.asarray(cols))]
+        elif _pending[map_path] is not None:
+            _pending[map_path].append((np.asarray(rows), np.asarray(cols)))
+        if _worker is None:
+            _worker = threading.Thread(target=_update_worker, name="roadmap", daemon=True)
+            _worker.start()
+
+
+def wait_for_roadmap_updates(timeout=None):
+    """
+    Attend la fin des calculs de roadmap en cours (utile pour les scripts et les tests).
+
+    Returns:
+        bool: True si plus aucun calcul n'est en cours
+    """
+    worker = _worker
+    if worker is not None:
+        worker.join(timeout)
+    return _worker is None
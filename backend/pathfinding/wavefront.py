@@ -0,0 +1,185 @@
+import time
+
+import numpy as np
+
+from backend.pathfinding.a_star import PathfindingTimeout
+
+# Coûts entiers des déplacements : 5 et 7 unités valent exactement les coûts 1.0 et 1.4
+# de l'A*, sans erreur d'arrondi sur les sommes (une unité = 0.2 case)
+STRAIGHT_COST = 5
+DIAGONAL_COST = 7
+COST_UNIT = 1 / STRAIGHT_COST
+
+# Déplacements (dx, dy, coût) : mêmes règles que get_neighbors
+_MOVES = [
+    (1, 0, STRAIGHT_COST), (-1, 0, STRAIGHT_COST), (0, 1, STRAIGHT_COST), (0, -1, STRAIGHT_COST),
+    (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST), (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST)
+]
+
+_UNREACHED = np.iinfo(np.int64).max
+
+
+def _allowed_moves(free):
+    # Pour chaque déplacement, masque (aplati) des cases d'où il est permis : case
+    # d'arrivée dans la grille et libre, et pas de coupe de coin en diagonale
+    height, width = free.shape
+    allowed = []
+    for dx, dy, _ in _MOVES:
+        mask = np.zeros((height, width), dtype=bool)
+        target = free
+        if dx:
+            target = np.roll(target, -dx, axis=1)
+        if dy:
+            target = np.roll(target, -dy, axis=0)
+        mask[:] = free & target
+        if dx and dy:
+            mask &= np.roll(free, -dx, axis=1) & np.roll(free, -dy, axis=0)
+        # Les déplacements qui sortent de la grille ne reviennent pas de l'autre côté
+        if dx == 1:
+            mask[:, -1] = False
+        elif dx == -1:
+            mask[:, 0] = False
+        if dy == 1:
+            mask[-1, :] = False
+        elif dy == -1:
+            mask[0, :] = False
+        allowed.append(mask.ravel())
+    return allowed
+
+
+def multi_source_distances(grid, sources, max_distance=None, time_limit=None, cancel_event=None):
+    """
+    Calcule en une seule passe, pour chaque case de la grille, la source la plus proche
+    et la distance de chemin jusqu'à elle (mêmes déplacements et coûts que l'A*).
+
+    Toutes les sources progressent ensemble, par lots : à chaque étape, toutes les cases
+    ouvertes dont la distance est inférieure au minimum + 1.0 sont définitives (aucun
+    déplacement ne coûte moins de 1.0) et leurs voisins sont relâchés d'un seul coup avec
+    des tableaux NumPy, au lieu d'une extraction de tas par case. Le nombre d'étapes suit
+    la distance maximale atteinte, pas le nombre de cases.
+
+    En cas d'égalité de distance, la case est attribuée à la source de plus petit indice.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles (True/1 = obstacle, False/0 = libre)
+        sources (list): Coordonnées [(x, y), ...] des sources ; celles hors de la grille ou
+                        sur un obstacle sont ignorées
+        max_distance (float): Distance au-delà de laquelle la propagation s'arrête (None = illimitée)
+        time_limit (float): Budget de temps en secondes (None = illimité)
+        cancel_event (threading.Event): La propagation s'arrête dès qu'il est levé
+
+    Returns:
+        tuple: (labels, distances) où labels est une matrice int32 des indices de source
+               (-1 = non atteinte) et distances une matrice float32 (inf = non atteinte)
+
+    Raises:
+        PathfindingTimeout: Si le budget est épuisé ou la propagation annulée
+    """
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    free = ~np.asarray(grid).astype(bool)
+    height, width = free.shape
+    size = height * width
+
+    distance = np.full(size, _UNREACHED, dtype=np.int64)
+    label = np.full(size, -1, dtype=np.int32)
+
+    # Sources valides, la première gardant une case partagée par plusieurs sources
+    cells, indices = [], []
+    for index, (x, y) in enumerate(sources):
+        x, y = int(x), int(y)
+        if 0 <= x < width and 0 <= y < height and free[y, x]:
+            cells.append(y * width + x)
+            indices.append(index)
+    cells = np.array(cells, dtype=np.int64)
+    indices = np.array(indices, dtype=np.int32)
+    if len(cells):
+        cells, first = np.unique(cells, return_index=True)
+        distance[cells] = 0
+        label[cells] = indices[first]
+
+    limit = _UNREACHED - 1 if max_distance is None else int(np.floor(max_distance / COST_UNIT + 1e-9))
+    allowed = _allowed_moves(free) if len(cells) else []
+    offsets = [dy * width + dx for dx, dy, _ in _MOVES]
+    open_cells = cells
+
+    while len(open_cells):
+        if cancel_event is not None and cancel_event.is_set():
+            raise PathfindingTimeout("Search cancelled")
+        if deadline is not None and time.monotonic() > deadline:
+            raise PathfindingTimeout(f"Time budget exhausted ({time_limit} s)")
+        open_distances = distance[open_cells]
+        lowest = open_distances.min()
+        if lowest > limit:
+            break
+        batch = open_distances < lowest + STRAIGHT_COST
+        frontier = np.unique(open_cells[batch])
+        open_cells = open_cells[~batch]
+
+        # Relâchement des 8 voisins de toutes les cases du lot
+        targets, candidates, owners = [], [], []
+        frontier_distance = distance[frontier]
+        frontier_label = label[frontier]
+        for move, offset, (_, _, cost) in zip(allowed, offsets, _MOVES):
+            can_move = move[frontier]
+            targets.append(frontier[can_move] + offset)
+            candidates.append(frontier_distance[can_move] + cost)
+            owners.append(frontier_label[can_move])
+        targets = np.concatenate(targets)
+        candidates = np.concatenate(candidates)
+        owners = np.concatenate(owners)
+
+        # Les cases déjà définitives ont une distance < lowest + 5 <= candidate : seules les
+        # cases ouvertes ou non atteintes peuvent être améliorées
+        current = distance[targets]
+        better = (candidates < current) | ((candidates == current) & (owners < label[targets]))
+        targets, candidates, owners = targets[better], candidates[better], owners[better]
+        if not len(targets):
+            continue
+
+        # Une seule mise à jour par case : la plus petite distance, puis la plus petite source
+        order = np.lexsort((owners, candidates, targets))
+        targets, candidates, owners = targets[order], candidates[order], owners[order]
+        first = np.concatenate([[True], targets[1:] != targets[:-1]])
+        targets, candidates, owners = targets[first], candidates[first], owners[first]
+
+        distance[targets] = candidates
+        label[targets] = owners
+        open_cells = np.concatenate([open_cells, targets])
+
+    reached = distance <= limit
+    distances = np.where(reached, distance * COST_UNIT, np.inf).astype(np.float32).reshape(height, width)
+    labels = np.where(reached, label, -1).astype(np.int32).reshape(height, width)
+    return labels, distances
+
+
+def nearest_sources(grid, sources, targets, max_distance=None, time_limit=None, cancel_event=None,
+                    return_fields=False):
+    """
+    Associe chaque cible à sa source la plus proche, en une seule propagation.
+
+    Args:
+        grid (np.ndarray): Grille d'obstacles
+        sources (list): Coordonnées [(x, y), ...] des sources
+        targets (list): Coordonnées [(x, y), ...] des cibles
+        max_distance (float): Distance maximale de recherche (None = illimitée)
+        time_limit (float): Budget de temps en secondes (None = illimité)
+        cancel_event (threading.Event): La propagation s'arrête dès qu'il est levé
+        return_fields (bool): Renvoie aussi les matrices de la propagation (voir multi_source_distances)
+
+    Returns:
+        list: Pour chaque cible, (indice de la source la plus proche, distance),
+              ou (None, None) si aucune source ne l'atteint ; avec return_fields,
+              tuple (résultats, labels, distances)
+    """
+    labels, distances = multi_source_distances(grid, sources, max_distance, time_limit, cancel_event)
+    height, width = labels.shape
+    result = []
+    for x, y in targets:
+        x, y = int(x), int(y)
+        if 0 <= x < width and 0 <= y < height and labels[y, x] >= 0:
+            result.append((int(labels[y, x]), float(distances[y, x])))
+        else:
+            result.append((None, None))
+    if return_fields:
+        return result, labels, distances
+    return result
@@ -0,0 +1,211 @@
+import numpy as np
+
+# Clés du NPZ utilisées par la table des POIs
+POI_KEYS = ('poi_x', 'poi_y', 'poi_types', 'poi_name_bytes', 'poi_name_offsets')
+# Ancien format : noms stockés dans un tableau '<U50' (tronqués à 50 caractères)
+LEGACY_NAME_KEY = 'poi_names'
+POI_TYPES = ('start', 'end')
+
+
+def encode_strings(strings):
+    """
+    Encode une liste de chaînes de longueur quelconque en deux tableaux simples :
+    les octets UTF-8 concaténés et les positions de début de chaque chaîne (n + 1 valeurs).
+    Aucun pickle n'est nécessaire pour les relire.
+    """
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(chunk) for chunk in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def decode_strings(data_bytes, offsets):
+    """
+    Décode les chaînes produites par encode_strings.
+    """
+    raw = np.asarray(data_bytes, dtype=np.uint8).tobytes()
+    return [raw[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+class PoiTable:
+    """
+    Table en colonnes des points d'intérêt d'une carte.
+
+    Les coordonnées et les types sont dans des tableaux NumPy à capacité doublée (ajout
+    en O(1) amorti), les noms dans une liste Python indexée par un dictionnaire
+    nom -> ligne (recherche en O(1)). Les noms sont uniques et de longueur quelconque.
+    """
+
+    def __init__(self, capacity=16):
+        self._x = np.empty(capacity, dtype=float)
+        self._y = np.empty(capacity, dtype=float)
+        self._types = np.empty(capacity, dtype='<U10')
+        self._names = []
+        self._index = {}
+
+    @classmethod
+    def from_npz(cls, data):
+        """
+        Construit la table à partir du contenu d'un fichier NPZ (dict ou NpzFile).
+        Les cartes à l'ancien format (poi_names en '<U50') sont lues de la même façon.
+        """
+        table = cls()
+        if 'poi_x' not in data:
+            return table
+        if 'poi_name_bytes' in data:
+            names = decode_strings(data['poi_name_bytes'], data['poi_name_offsets'])
+        else:
+            names = [str(name) for name in data[LEGACY_NAME_KEY]]
+        table.extend(names, data['poi_types'], data['poi_x'], data['poi_y'])
+        return table
+
+    def to_npz(self, data):
+        """
+        Écrit la table dans un dictionnaire destiné à np.savez (en retirant l'ancien format).
+        """
+        count = len(self)
+        data.pop(LEGACY_NAME_KEY, None)
+        data['poi_x'] = self._x[:count].copy()
+        data['poi_y'] = self._y[:count].copy()
+        data['poi_types'] = self._types[:count].copy()
+        data['poi_name_bytes'], data['poi_name_offsets'] = encode_strings(self._names)
+        return data
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def _reserve(self, capacity):
+        if capacity <= len(self._x):
+            return
+        new_capacity = max(capacity, 2 * len(self._x))
+        for attribute in ('_x', '_y', '_types'):
+            old = getattr(self, attribute)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:len(self)] = old[:len(self)]
+            setattr(self, attribute, new)
+
+    def append(self, name, poi_type, x, y):
+        """
+        Ajoute un POI.
+
+        Raises:
+            ValueError: Si le nom est déjà utilisé
+        """
+        self.extend([name], [poi_type], [x], [y])
+
+    def extend(self, names, poi_types, xs, ys):
+        """
+        Ajoute plusieurs POIs en une seule opération.
+
+        Raises:
+            ValueError: Si un nom est déjà utilisé (aucun POI n'est alors ajouté)
+        """
+        names = [str(name) for name in names]
+        seen = set()
+        for name in names:
+            if name in self._index or name in seen:
+                raise ValueError(f"Le nom de POI '{name}' est déjà utilisé")
+            seen.add(name)
+
+        start = len(self)
+        end = start + len(names)
+        self._reserve(end)
+        self._x[start:end] = xs
+        self._y[start:end] = ys
+        self._types[start:end] = poi_types
+        for row, name in enumerate(names, start):
+            self._index[name] = row
+        self._names.extend(names)
+
+    def find(self, name):
+        """
+        Renvoie la ligne du POI portant ce nom, ou None.
+        """
+        return self._index.get(name)
+
+    def get(self, name):
+        """
+        Renvoie le POI portant ce nom sous forme de dictionnaire, ou None.
+        """
+        row = self.find(name)
+        return None if row is None else self._record(row)
+
+    def first_of_type(self, poi_type):
+        """
+        Renvoie le premier POI d'un type donné, ou None.
+        """
+        rows = np.flatnonzero(self._types[:len(self)] == poi_type)
+        return self._record(rows[0]) if len(rows) else None
+
+    def delete(self, name):
+        """
+        Supprime un POI.
+
+        Returns:
+            dict: Le POI supprimé, ou None s'il n'existe pas
+        """
+        row = self.find(name)
+        if row is None:
+            return None
+        record = self._record(row)
+        count = len(self)
+        for column in (self._x, self._y, self._types):
+            column[row:count - 1] = column[row + 1:count]
+        del self._names[row]
+        del self._index[name]
+        for shifted_row in range(row, count - 1):
+            self._index[self._names[shifted_row]] = shifted_row
+        return record
+
+    def rename(self, old_name, new_name):
+        """
+        Renomme un POI.
+
+        Returns:
+            bool: False si l'ancien nom n'existe pas
+
+        Raises:
+            ValueError: Si le nouveau nom est déjà utilisé
+        """
+        row = self.find(old_name)
+        if row is None:
+            return False
+        if new_name != old_name and new_name in self._index:
+            raise ValueError(f"Le nom de POI '{new_name}' est déjà utilisé")
+        del self._index[old_name]
+        self._index[new_name] = row
+        self._names[row] = new_name
+        return True
+
+    def _record(self, row):
+        return {
+            'name': self._names[row],
+            'type': str(self._types[row]),
+            'x': float(self._x[row]),
+            'y': float(self._y[row])
+        }
+
+    def records(self):
+        """
+        Renvoie tous les POIs : [{'name': str, 'type': str, 'x': float, 'y': float}, ...]
+        """
+        return [self._record(row) for row in range(len(self))]
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    @property
+    def x(self):
+        return self._x[:len(self)]
+
+    @property
+    def y(self):
+        return self._y[:len(self)]
+
+    @property
+    def types(self):
+        return self._types[:len(self)]
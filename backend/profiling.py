@@ -0,0 +1,187 @@
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from backend import metrics
+
+# Un seul profilage à la fois : cProfile ne supporte pas deux profileurs actifs,
+# et les échantillons des workers du pool seraient mélangés entre requêtes
+_active_lock = threading.Lock()
+
+# Préfixe des threads du pool de recherche de chemin (voir backend/pathfinding/executor.py)
+POOL_THREAD_PREFIX = "pathfinding"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse_stack(frame):
+    # Pile de la racine vers la feuille, au format "a;b;c" des flamegraphs
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _is_busy_worker(frame):
+    # Un worker du pool inoccupé attend dans la file : seule une tâche en cours nous intéresse
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'run' and code.co_filename.endswith(os.path.join('concurrent', 'futures', 'thread.py')):
+            return True
+        frame = frame.f_back
+    return False
+
+
+class RequestProfile:
+    """
+    Profilage d'une requête : cProfile sur le thread de la requête, plus un thread
+    échantillonneur qui relève périodiquement les piles (sys._current_frames) du thread
+    de la requête et des workers du pool de recherche de chemin. Les piles échantillonnées
+    sont écrites au format "collapsed" (une ligne "a;b;c nombre"), lisible par
+    flamegraph.pl, speedscope ou inferno.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.started_at = None
+        self.duration = None
+        self._profiler = cProfile.Profile()
+        self._stop_event = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            pool_threads = [
+                thread.ident for thread in threading.enumerate()
+                if thread.name.startswith(POOL_THREAD_PREFIX)
+            ]
+            request_frame = frames.get(self.thread_id)
+            if request_frame is not None:
+                self.stacks["request;" + _collapse_stack(request_frame)] += 1
+            for ident in pool_threads:
+                frame = frames.get(ident)
+                if frame is not None and _is_busy_worker(frame):
+                    self.stacks[f"{POOL_THREAD_PREFIX};" + _collapse_stack(frame)] += 1
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._sampler.start()
+        self._profiler.enable()
+
+    def stop(self):
+        """
+        Arrête le profilage (sans effet s'il est déjà arrêté).
+        """
+        if self.duration is not None:
+            return
+        self._profiler.disable()
+        self._stop_event.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def save(self, output_dir, tags, max_bytes=None):
+        """
+        Écrit le profil (.prof, lisible par pstats ou snakeviz), les piles échantillonnées
+        (.folded) et les métadonnées de la requête (.json).
+
+        Args:
+            output_dir (str): Dossier de sortie
+            tags (dict): Métadonnées de la requête (route, carte, taille de grille...)
+            max_bytes (int): Taille maximale du dossier (les plus anciens profils sont supprimés)
+
+        Returns:
+            str: Chemin du profil, sans extension
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        parts = [time.strftime("%Y%m%d-%H%M%S"), f"{int(time.time() * 1000) % 1000:03d}"]
+        parts += [str(tags[key]) for key in ('endpoint', 'map_name', 'grid_size') if tags.get(key)]
+        parts.append(f"{self.duration * 1000:.0f}ms")
+        base_path = os.path.join(output_dir, re.sub(r'[^\w.-]', '_', "_".join(parts)))
+
+        self._profiler.dump_stats(base_path + ".prof")
+        with open(base_path + ".folded", 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with open(base_path + ".json", 'w') as f:
+            json.dump(dict(tags, duration=self.duration, samples=sum(self.stacks.values())), f, indent=2)
+
+        metrics.increment('profiling.profiles')
+        if max_bytes is not None:
+            enforce_size_cap(output_dir, max_bytes)
+        return base_path
+
+
+def start_request_profile(interval=0.005):
+    """
+    Démarre le profilage de la requête courante si aucun autre n'est en cours.
+
+    Returns:
+        RequestProfile: Le profil démarré, ou None si un profilage est déjà actif
+    """
+    if not _active_lock.acquire(blocking=False):
+        metrics.increment('profiling.skipped_busy')
+        return None
+    try:
+        profile = RequestProfile(interval)
+        profile.start()
+    except Exception:
+        _active_lock.release()
+        raise
+    return profile
+
+
+def finish_request_profile(profile):
+    """
+    Arrête un profil démarré par start_request_profile et libère le verrou.
+    """
+    try:
+        profile.stop()
+    finally:
+        if _active_lock.locked():
+            _active_lock.release()
+
+
+def enforce_size_cap(output_dir, max_bytes):
+    """
+    Supprime les profils les plus anciens jusqu'à ce que le dossier tienne dans max_bytes.
+    Les fichiers d'un même profil (.prof, .folded, .json) sont supprimés ensemble ; le
+    profil le plus récent est toujours conservé.
+
+    Returns:
+        int: Nombre de profils supprimés
+    """
+    groups = {}
+    for filename in os.listdir(output_dir):
+        path = os.path.join(output_dir, filename)
+        if os.path.isfile(path):
+            group = groups.setdefault(os.path.splitext(path)[0], {'size': 0, 'mtime': 0.0, 'paths': []})
+            stat = os.stat(path)
+            group['size'] += stat.st_size
+            group['mtime'] = max(group['mtime'], stat.st_mtime)
+            group['paths'].append(path)
+
+    total = sum(group['size'] for group in groups.values())
+    removed = 0
+    for _, group in sorted(groups.items(), key=lambda item: item[1]['mtime'])[:-1]:
+        if total <= max_bytes:
+            break
+        for path in group['paths']:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= group['size']
+        removed += 1
+    return removed
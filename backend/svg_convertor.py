@@ -1,31 +1,126 @@
 import numpy as np
 import sys
-from svgpathtools import svg2paths
+from svgpathtools import svg2paths, Line, QuadraticBezier, CubicBezier
+
+from backend.grid_store import write_layer, delete_store, save_npz
+from backend.pathfinding.components import compute_component_labels
 
 # Cette partie traitement du svg faudra repasser dessus, c'est la structure de base avec ChatGPT pour le moment
-def svg_to_occupancy(svg_filename, resolution=20.0, samples_per_segment=500):
+def fill_polygons_even_odd(obstacle_grid, rings):
     """
-    Lit le fichier SVG et produit une matrice (obstacle_grid)
-    qui indique où se trouvent les obstacles (True) et où c'est libre (False).
-    
+    Remplit l'intérieur d'un ensemble de contours fermés selon la règle pair-impair,
+    par un balayage ligne à ligne entièrement vectorisé.
+
+    Une case est remplie si son centre est à l'intérieur : on compte, sur chaque ligne,
+    les arêtes croisées à gauche du centre. Les intersections arête/ligne sont calculées
+    d'un coup pour toutes les arêtes, puis chaque intersection inverse l'état des cases
+    situées à sa droite (somme cumulée modulo 2).
+
     Paramètres
     ----------
-    svg_filename : str
-        Chemin vers le fichier SVG.
-    resolution : float
-        Nombre de 'pixels' par unité SVG. Plus c'est grand, plus la grille est fine.
-    samples_per_segment : int
-        Nombre d'échantillons par segment de chemin (pour discrétiser le dessin).
-    
+    obstacle_grid : np.ndarray (2D, bool)
+        Matrice d'occupation, modifiée en place.
+    rings : list of np.ndarray
+        Contours fermés en coordonnées de grille (colonnes x, lignes y), de forme (n, 2).
+        Tous les contours d'une même forme doivent être passés ensemble pour que les trous
+        soient respectés.
+
     Retourne
     --------
     obstacle_grid : np.ndarray (2D, bool)
-    bounds : tuple (min_x, max_x, min_y, max_y)
     """
+    height, width = obstacle_grid.shape
+    rings = [np.asarray(ring, dtype=float) for ring in rings if len(ring) >= 3]
+    if not rings:
+        return obstacle_grid
+
+    # Arêtes de tous les contours (chaque contour est refermé sur son premier point)
+    starts = np.concatenate(rings)
+    ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+    x0, y0 = starts[:, 0], starts[:, 1]
+    x1, y1 = ends[:, 0], ends[:, 1]
+
+    # Lignes r dont le centre r + 0.5 est dans [min(y0, y1), max(y0, y1)[
+    first_row = np.ceil(np.minimum(y0, y1) - 0.5).astype(np.int64)
+    last_row = np.ceil(np.maximum(y0, y1) - 0.5).astype(np.int64)
+    counts = np.maximum(last_row - first_row, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return obstacle_grid
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    rows = first_row[edge] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Abscisse de l'intersection avec la ligne centrale, puis première colonne à sa droite
+    yc = rows + 0.5
+    xc = x0[edge] + (yc - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    cols = np.clip(np.floor(xc - 0.5).astype(np.int64) + 1, 0, width)
+
+    valid = (rows >= 0) & (rows < height)
+    rows, cols = rows[valid], cols[valid]
+    if len(rows) == 0:
+        return obstacle_grid
+
+    # Inversions limitées aux lignes concernées
+    row_min, row_max = rows.min(), rows.max()
+    toggles = np.zeros((row_max - row_min + 1, width + 1), dtype=np.int32)
+    np.add.at(toggles, (rows - row_min, cols), 1)
+    inside = (np.cumsum(toggles, axis=1)[:, :width] % 2).astype(bool)
+    obstacle_grid[row_min:row_max + 1] |= inside
+    return obstacle_grid
+
+def is_filled_shape(attributes):
+    """
+    Indique si un élément SVG est rempli, d'après son attribut fill ou son style.
+    En SVG, une forme sans indication de remplissage est remplie (noir par défaut).
+    """
+    fill = attributes.get('fill')
+    for declaration in attributes.get('style', '').split(';'):
+        name, _, value = declaration.partition(':')
+        if name.strip() == 'fill':
+            fill = value
+    return fill is None or fill.strip().lower() not in ('none', 'transparent')
 
-    paths, _ = svg2paths(svg_filename)
+def _as_cubic_control_points(segment):
+    # Points de contrôle (4, 2) des courbes de Bézier cubiques équivalentes à un segment SVG
+    if isinstance(segment, Line):
+        p0, p3 = segment.start, segment.end
+        points = [(p0, p0 + (p3 - p0) / 3, p0 + 2 * (p3 - p0) / 3, p3)]
+    elif isinstance(segment, QuadraticBezier):
+        p0, q, p3 = segment.start, segment.control, segment.end
+        points = [(p0, p0 + 2 * (q - p0) / 3, p3 + 2 * (q - p3) / 3, p3)]
+    elif isinstance(segment, CubicBezier):
+        points = [segment.bpoints()]
+    else:
+        # Arc : approché par une cubique par quart de tour au plus
+        curves = max(1, int(np.ceil(abs(segment.delta) / 90.0)))
+        points = [cubic.bpoints() for cubic in segment.as_cubic_curves(curves)]
+    return [[(p.real, p.imag) for p in bpoints] for bpoints in points]
 
-    # 1) Déterminer la bounding box globale
+def extract_geometry(svg_filename):
+    """
+    Lit le fichier SVG une fois pour toutes et le réduit à des tableaux NumPy indépendants
+    de la résolution : chaque segment (droite, courbe de Bézier, arc) devient une ou
+    plusieurs courbes de Bézier cubiques, décrites par leurs 4 points de contrôle.
+
+    Paramètres
+    ----------
+    svg_filename : str
+        Chemin vers le fichier SVG.
+
+    Retourne
+    --------
+    geometry : dict
+        'bounds' (4,) : min_x, max_x, min_y, max_y des segments d'origine
+        'control_points' (n, 4, 2) : points de contrôle des cubiques
+        'segment_subpath' (n,) : sous-chemin de chaque cubique (cubiques rangées dans l'ordre)
+        'segment_is_line' (n,) : True pour les cubiques issues d'une droite
+        'subpath_path' (s,) et 'subpath_closed' (s,) : chemin d'origine et fermeture de chaque sous-chemin
+        'path_filled' (p,) et 'path_bbox' (p, 4) : remplissage et bounding box de chaque chemin
+    """
+    paths, attributes = svg2paths(svg_filename)
+
+    # Bounding box globale, calculée sur les segments d'origine
     min_x, max_x = float('inf'), float('-inf')
     min_y, max_y = float('inf'), float('-inf')
     for path in paths:
@@ -36,42 +131,143 @@ def svg_to_occupancy(svg_filename, resolution=20.0, samples_per_segment=500):
             min_y = min(min_y, seg_min_y)
             max_y = max(max_y, seg_max_y)
 
-    # 2) Créer la matrice d’occupation
+    control_points, segment_subpath, segment_is_line = [], [], []
+    subpath_path, subpath_closed = [], []
+    path_filled, path_bbox = [], []
+    for path_index, (path, path_attributes) in enumerate(zip(paths, attributes)):
+        path_filled.append(is_filled_shape(path_attributes))
+        path_bbox.append(path.bbox() if len(path) else (np.nan,) * 4)
+        for subpath in path.continuous_subpaths():
+            subpath_index = len(subpath_path)
+            subpath_path.append(path_index)
+            subpath_closed.append(subpath.isclosed())
+            for segment in subpath:
+                cubics = _as_cubic_control_points(segment)
+                control_points.extend(cubics)
+                segment_subpath.extend([subpath_index] * len(cubics))
+                segment_is_line.extend([isinstance(segment, Line)] * len(cubics))
+
+    return {
+        'bounds': np.array([min_x, max_x, min_y, max_y], dtype=float),
+        'control_points': np.array(control_points, dtype=float).reshape(-1, 4, 2),
+        'segment_subpath': np.array(segment_subpath, dtype=np.int32),
+        'segment_is_line': np.array(segment_is_line, dtype=bool),
+        'subpath_path': np.array(subpath_path, dtype=np.int32),
+        'subpath_closed': np.array(subpath_closed, dtype=bool),
+        'path_filled': np.array(path_filled, dtype=bool),
+        'path_bbox': np.array(path_bbox, dtype=float).reshape(-1, 4)
+    }
+
+def sample_cubics(control_points, t, is_line=None):
+    """
+    Évalue d'un coup des courbes de Bézier cubiques aux paramètres t.
+
+    Les formules sont celles de svgpathtools (schéma de Horner, interpolation directe
+    pour les droites), pour retrouver exactement les mêmes points qu'en évaluant les
+    segments un par un.
+
+    Retourne
+    --------
+    points : np.ndarray de forme (n, len(t), 2)
+    """
+    t = np.asarray(t, dtype=float)[None, :, None]
+    p0, p1, p2, p3 = (control_points[:, None, k] for k in range(4))
+    points = p0 + t * (3 * (p1 - p0) + t * (3 * (p0 + p2) - 6 * p1 + t * (-p0 + 3 * (p1 - p2) + p3)))
+    if is_line is not None and is_line.any():
+        points[is_line] = p0[is_line] + (p3[is_line] - p0[is_line]) * t[0]
+    return points
+
+def rasterize_geometry(geometry, resolution=20.0, samples_per_segment=500, fill_closed=False):
+    """
+    Produit la matrice d'occupation d'une géométrie extraite par extract_geometry,
+    sans relire le SVG. Voir svg_to_occupancy pour les paramètres.
+
+    Retourne
+    --------
+    obstacle_grid : np.ndarray (2D, bool)
+    bounds : tuple (min_x, max_x, min_y, max_y)
+    """
+    min_x, max_x, min_y, max_y = (float(v) for v in geometry['bounds'])
+    control_points = geometry['control_points']
+    is_line = geometry['segment_is_line']
+
+    # 1) Créer la matrice d’occupation
     width  = int((max_x - min_x) * resolution) + 1
     height = int((max_y - min_y) * resolution) + 1
     obstacle_grid = np.zeros((height, width), dtype=bool)
 
-    # 3) Échantillonner les chemins et remplir obstacle_grid
-    for path in paths:
-        for segment in path:
-            for i in range(samples_per_segment + 1):
-                t = i / samples_per_segment
-                point = segment.point(t)
-                x = point.real
-                y = point.imag
-
-                # Convertir en indices de la matrice
-                grid_x = int((x - min_x) * resolution)
-                grid_y = int((y - min_y) * resolution)
-                # Sécuriser les bornes
-                if 0 <= grid_x < width and 0 <= grid_y < height:
-                    obstacle_grid[grid_y, grid_x] = True
+    # 2) Échantillonner les cubiques et marquer les cases, par paquets pour borner la mémoire
+    t = np.arange(samples_per_segment + 1) / samples_per_segment
+    chunk = max(1, 1_000_000 // len(t))
+    for first in range(0, len(control_points), chunk):
+        points = sample_cubics(control_points[first:first + chunk], t, is_line[first:first + chunk]).reshape(-1, 2)
+        # Conversion en indices (troncature vers zéro, comme int())
+        grid_x = ((points[:, 0] - min_x) * resolution).astype(np.int64)
+        grid_y = ((points[:, 1] - min_y) * resolution).astype(np.int64)
+        inside = (grid_x >= 0) & (grid_x < width) & (grid_y >= 0) & (grid_y < height)
+        obstacle_grid[grid_y[inside], grid_x[inside]] = True
+
+    # 3) Remplir l'intérieur des sous-chemins fermés des formes pleines
+    if fill_closed:
+        t = np.linspace(0.0, 1.0, samples_per_segment + 1)[:-1]
+        subpath_path = geometry['subpath_path']
+        subpath_closed = geometry['subpath_closed']
+        segment_subpath = geometry['segment_subpath']
+        segment_offsets = np.searchsorted(segment_subpath, np.arange(len(subpath_path) + 1))
+        bounds = np.array([min_x, max_x, min_y, max_y])
+        for path_index, (filled, bbox) in enumerate(zip(geometry['path_filled'], geometry['path_bbox'])):
+            if not filled or np.array_equal(bbox, bounds):
+                continue
+            rings = []
+            for subpath_index in np.flatnonzero((subpath_path == path_index) & subpath_closed):
+                first, last = segment_offsets[subpath_index], segment_offsets[subpath_index + 1]
+                points = sample_cubics(control_points[first:last], t, is_line[first:last]).reshape(-1, 2)
+                rings.append(np.column_stack([
+                    (points[:, 0] - min_x) * resolution,
+                    (points[:, 1] - min_y) * resolution
+                ]))
+            fill_polygons_even_odd(obstacle_grid, rings)
 
     return obstacle_grid, (min_x, max_x, min_y, max_y)
 
-def save_occupancy_data(grid, bounds, output_filename):
+def svg_to_occupancy(svg_filename, resolution=20.0, samples_per_segment=500, fill_closed=False):
+    """
+    Lit le fichier SVG et produit une matrice (obstacle_grid)
+    qui indique où se trouvent les obstacles (True) et où c'est libre (False).
+    
+    Paramètres
+    ----------
+    svg_filename : str
+        Chemin vers le fichier SVG.
+    resolution : float
+        Nombre de 'pixels' par unité SVG. Plus c'est grand, plus la grille est fine.
+    samples_per_segment : int
+        Nombre d'échantillons par segment de chemin (pour discrétiser le dessin).
+    fill_closed : bool
+        Si True, l'intérieur des chemins fermés (racks, piliers, ...) est aussi marqué
+        comme obstacle (règle pair-impair), et pas seulement leur contour. Les formes
+        explicitement sans remplissage (fill="none") et le contour englobant toute la carte
+        (murs extérieurs) restent vides.
+    
+    Retourne
+    --------
+    obstacle_grid : np.ndarray (2D, bool)
+    bounds : tuple (min_x, max_x, min_y, max_y)
+    """
+    return rasterize_geometry(extract_geometry(svg_filename), resolution, samples_per_segment, fill_closed)
+
+def save_occupancy_data(grid, bounds, output_filename, metadata=None):
     """
-    Sauvegarde la matrice d’occupation et les limites de la bounding box dans un fichier .npz.
+    Sauvegarde les limites de la bounding box dans un fichier .npz, et la matrice d’occupation
+    ainsi que les composantes connexes de l'espace libre dans le stockage en tuiles associé.
+    Les métadonnées éventuelles (empreinte du SVG, paramètres de rastérisation) sont
+    enregistrées dans le .npz.
     """
     min_x, max_x, min_y, max_y = bounds
-    np.savez(
-        output_filename,
-        obstacle_grid=grid,
-        min_x=min_x,
-        max_x=max_x,
-        min_y=min_y,
-        max_y=max_y
-    )
+    save_npz(output_filename, dict(metadata or {}, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y))
+    delete_store(output_filename)
+    write_layer(output_filename, 'obstacle_grid', grid.astype(bool), fill=False)
+    write_layer(output_filename, 'component_labels', compute_component_labels(grid))
     print(f"Matrice d’occupation sauvegardée dans {output_filename}.")
 
 
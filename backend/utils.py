@@ -1,6 +1,27 @@
+import csv
+import io
+import json
 import os
+import shutil
+import threading
 import numpy as np
 
+from backend import metrics
+from backend.geometry_cache import get_raster, raster_metadata
+from backend.grid_store import open_layer, delete_store, has_layer, get_grid_shape, get_store_dir, save_npz
+from backend.obstacle_journal import map_lock, append_edit, read_journal, active_edits, forget_journal, grid_version, EDIT_ADD, EDIT_UNDO
+from backend.path_encoding import encode_path, pack_paths, unpack_paths, migrate_legacy_paths, LEGACY_PATH_KEY
+from backend.poi_table import PoiTable, POI_TYPES
+from backend.pathfinding.components import compute_component_labels, update_component_labels
+from backend.pathfinding.landmarks import LANDMARK_LAYER, load_landmarks, schedule_landmark_update, invalidate_landmarks
+from backend.pathfinding.roadmap import has_roadmap, load_roadmap, schedule_roadmap_update
+from backend.svg_convertor import save_occupancy_data
+
+# Grilles d'obstacles complètes gardées en mémoire : {chemin de la carte: (version, tableau)}
+OBSTACLE_ARRAY_CACHE_SIZE = 8
+_obstacle_arrays = {}
+_obstacle_arrays_lock = threading.Lock()
+
 def list_npz_files(directory="data/NPZ-output/"):
     """
     Liste tous les fichiers NPZ dans le répertoire spécifié sans l'extension .npz.
@@ -40,7 +61,8 @@ def get_latest_file(directory, extension=".svg"):
 
 def delete_map_files(map_name):
     """
-    Supprime les fichiers associés à une map dans les répertoires SVG-input, NPZ-output et map_previews.
+    Supprime les fichiers associés à une map dans les répertoires SVG-input, NPZ-output et map_previews,
+    ainsi que le stockage en tuiles de sa grille.
 
     Args:
         map_name (str): Nom de la map (sans extension).
@@ -58,6 +80,32 @@ def delete_map_files(map_name):
         else:
             print(f"Fichier introuvable dans {dir_name} : {file_path}")
 
+    # Supprime les tuiles de la grille
+    delete_store(directories["NPZ-output"])
+
+def load_map_data(map_path):
+    """
+    Charge tout le contenu du fichier NPZ d'une carte dans un dictionnaire, sans pickle.
+    Une carte dont les chemins sont encore à l'ancien format (dictionnaire picklé) est
+    convertie au format compact puis réenregistrée : c'est le seul chargement avec pickle.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        dict: Contenu du fichier NPZ
+    """
+    with np.load(map_path) as npz:
+        if LEGACY_PATH_KEY not in npz.files:
+            return dict(npz)
+
+    print(f"Conversion des chemins de {map_path} au format compact")
+    with np.load(map_path, allow_pickle=True) as npz:
+        data = dict(npz)
+    migrate_legacy_paths(data)
+    save_npz(map_path, data)
+    return data
+
 def add_poi_to_map(map_path, x, y, poi_type='start', poi_name='Point'):
     """
     Ajoute un point d'intérêt à la carte.
@@ -67,29 +115,105 @@ def add_poi_to_map(map_path, x, y, poi_type='start', poi_name='Point'):
         x (float): Coordonnée X du point
         y (float): Coordonnée Y du point
         poi_type (str): Type du point d'intérêt
-        poi_name (str): Nom du point d'intérêt
+        poi_name (str): Nom du point d'intérêt (unique dans la carte)
+
+    Returns:
+        bool: True si l'ajout a réussi, False sinon (notamment si le nom existe déjà)
     """
     try:
-        data = dict(np.load(map_path, allow_pickle=True))
-        
-        if 'poi_x' not in data:
-            data['poi_x'] = np.array([], dtype=float)
-            data['poi_y'] = np.array([], dtype=float)
-            data['poi_types'] = np.array([], dtype='<U10')
-            data['poi_names'] = np.array([], dtype='<U50')  # Pour stocker les noms
+        # Lecture-modification-écriture du NPZ : une seule édition à la fois par carte
+        with map_lock(map_path):
+            data = load_map_data(map_path)
         
-        data['poi_x'] = np.append(data['poi_x'], x)
-        data['poi_y'] = np.append(data['poi_y'], y)
-        data['poi_types'] = np.append(data['poi_types'], poi_type)
-        data['poi_names'] = np.append(data['poi_names'], poi_name)
+            pois = PoiTable.from_npz(data)
+            pois.append(poi_name, poi_type, x, y)
+            pois.to_npz(data)
         
-        np.savez(map_path, **data)
+            save_npz(map_path, data)
         return True
         
     except Exception as e:
         print(f"Erreur lors de l'ajout du POI: {str(e)}")
         return False
 
+def import_pois_to_map(map_path, records, paths=None):
+    """
+    Ajoute plusieurs points d'intérêt (et éventuellement leurs chemins) en une seule écriture.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        records (list): Liste de dictionnaires {'name': str, 'type': str, 'x': float, 'y': float}
+        paths (dict): Chemins à ajouter {nom du chemin: [(x, y), ...]}
+
+    Returns:
+        bool: True si l'import a réussi, False sinon (aucun POI n'est alors ajouté)
+    """
+    try:
+        # Lecture-modification-écriture du NPZ : une seule édition à la fois par carte
+        with map_lock(map_path):
+            data = load_map_data(map_path)
+
+            pois = PoiTable.from_npz(data)
+            pois.extend(
+                [record['name'] for record in records],
+                [record['type'] for record in records],
+                [record['x'] for record in records],
+                [record['y'] for record in records]
+            )
+            pois.to_npz(data)
+            if paths:
+                store_paths(data, paths)
+
+            save_npz(map_path, data)
+        return True
+
+    except Exception as e:
+        print(f"Erreur lors de l'import des POIs: {str(e)}")
+        return False
+
+def parse_poi_records(content, filename=None):
+    """
+    Lit une liste de points d'intérêt à importer, au format CSV (colonnes name, type, x, y)
+    ou JSON (liste d'objets, ou objet avec une clé "pois").
+
+    Args:
+        content (str | list): Contenu du fichier, ou liste de dictionnaires déjà décodée
+        filename (str): Nom du fichier, dont l'extension indique le format
+
+    Returns:
+        list: Liste de dictionnaires {'name': str, 'type': str, 'x': float, 'y': float}
+
+    Raises:
+        ValueError: Si le contenu est invalide
+    """
+    if isinstance(content, str):
+        if filename and filename.lower().endswith('.csv'):
+            rows = list(csv.DictReader(io.StringIO(content)))
+        else:
+            rows = json.loads(content)
+            if isinstance(rows, dict):
+                rows = rows.get('pois', [])
+    else:
+        rows = content
+
+    records = []
+    for line, row in enumerate(rows, 1):
+        try:
+            record = {
+                'name': str(row['name']).strip(),
+                'type': str(row['type']).strip(),
+                'x': float(row['x']),
+                'y': float(row['y'])
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"POI n°{line} invalide ({e})")
+        if not record['name']:
+            raise ValueError(f"POI n°{line} sans nom")
+        if record['type'] not in POI_TYPES:
+            raise ValueError(f"POI n°{line} : type '{record['type']}' inconnu")
+        records.append(record)
+    return records
+
 def get_poi_map(map_path):
     """
     Récupère tous les points d'intérêt d'une carte.
@@ -102,23 +226,8 @@ def get_poi_map(map_path):
               [{'name': str, 'type': str, 'x': float, 'y': float}, ...]
     """
     try:
-        data = np.load(map_path, allow_pickle=True)
-        if all(key in data for key in ['poi_x', 'poi_y', 'poi_types', 'poi_names']):
-            return [
-                {
-                    'name': name,
-                    'type': poi_type,
-                    'x': float(x),
-                    'y': float(y)
-                }
-                for name, poi_type, x, y in zip(
-                    data['poi_names'],
-                    data['poi_types'],
-                    data['poi_x'],
-                    data['poi_y']
-                )
-            ]
-        return []
+        with np.load(map_path) as data:
+            return PoiTable.from_npz(data).records()
     except Exception as e:
         print(f"Erreur lors de la récupération des POIs: {str(e)}")
         return []
@@ -135,27 +244,22 @@ def delete_poi_from_map(map_path, poi_name):
         bool: True si la suppression a réussi, False sinon
     """
     try:
-        data = dict(np.load(map_path, allow_pickle=True))
+        # Lecture-modification-écriture du NPZ : une seule édition à la fois par carte
+        with map_lock(map_path):
+            data = load_map_data(map_path)
         
-        if all(key in data for key in ['poi_x', 'poi_y', 'poi_types', 'poi_names']):
-            # Trouver l'index du POI à supprimer
-            idx = np.where(data['poi_names'] == poi_name)[0]
-            if len(idx) > 0:
-                poi_type = data['poi_types'][idx[0]]
-                # Appel de la nouvelle fonction pour supprimer les chemins associés
-                delete_paths_associated_with_poi(data, poi_name, poi_type)
-
-                # Supprimer le POI de tous les arrays
-                data['poi_x'] = np.delete(data['poi_x'], idx)
-                data['poi_y'] = np.delete(data['poi_y'], idx)
-                data['poi_types'] = np.delete(data['poi_types'], idx)
-                data['poi_names'] = np.delete(data['poi_names'], idx)
-                
-                # Sauvegarder les modifications
-                np.savez(map_path, **data)
-                return True
-                
-        return False
+            pois = PoiTable.from_npz(data)
+            deleted = pois.delete(poi_name)
+            if deleted is None:
+                return False
+
+            # Supprimer les chemins associés au point
+            delete_paths_associated_with_poi(data, poi_name, deleted['type'])
+            pois.to_npz(data)
+        
+            # Sauvegarder les modifications
+            save_npz(map_path, data)
+        return True
     except Exception as e:
         print(f"Erreur lors de la suppression du POI: {str(e)}")
         return False
@@ -166,43 +270,175 @@ def delete_paths_associated_with_poi(data, poi_name, poi_type):
     - Si c'est un 'start', supprime tous les chemins.
     - Si c'est un 'end', supprime le chemin 'path_to_<poi_name>'.
     """
-    if 'paths' not in data:
-        return
-    paths_dict = data['paths'].item() if isinstance(data['paths'], np.ndarray) else {}
+    paths = unpack_paths(data)
     if poi_type == 'start':
-        paths_dict.clear()
+        paths.clear()
     elif poi_type == 'end':
-        path_key = f"path_to_{poi_name}"
-        if path_key in paths_dict:
-            del paths_dict[path_key]
-    data['paths'] = np.array(paths_dict)
+        paths.pop(f"path_to_{poi_name}", None)
+    data.update(pack_paths(paths))
 
 def rename_poi_in_map(map_path, old_name, new_name):
     """
-    Renomme un point d'intérêt dans la carte.
+    Renomme un point d'intérêt dans la carte, ainsi que le chemin qui y mène.
     
     Args:
         map_path (str): Chemin vers le fichier NPZ
         old_name (str): Ancien nom du point
-        new_name (str): Nouveau nom du point
+        new_name (str): Nouveau nom du point (ne doit pas déjà exister)
 
     Returns:
         bool: True si le renommage a réussi, False sinon
     """
     try:
-        data = dict(np.load(map_path, allow_pickle=True))
+        # Lecture-modification-écriture du NPZ : une seule édition à la fois par carte
+        with map_lock(map_path):
+            data = load_map_data(map_path)
         
-        if all(key in data for key in ['poi_names']):
-            idx = np.where(data['poi_names'] == old_name)[0]
-            if len(idx) > 0:
-                data['poi_names'][idx[0]] = new_name
-                np.savez(map_path, **data)
-                return True
-        return False
+            pois = PoiTable.from_npz(data)
+            if not pois.rename(old_name, new_name):
+                return False
+            pois.to_npz(data)
+
+            paths = unpack_paths(data)
+            if f"path_to_{old_name}" in paths:
+                paths[f"path_to_{new_name}"] = paths.pop(f"path_to_{old_name}")
+                data.update(pack_paths(paths))
+
+            save_npz(map_path, data)
+        return True
     except Exception as e:
         print(f"Erreur lors du renommage du POI: {str(e)}")
         return False
 
+def get_component_labels(map_path):
+    """
+    Récupère les étiquettes des composantes connexes de l'espace libre d'une carte.
+    Les tuiles sont chargées à la demande : tester deux points n'en lit que deux.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        TiledGrid: Étiquettes des composantes (0 = obstacle) ou None en cas d'erreur
+    """
+    try:
+        return open_layer(map_path, 'component_labels')
+    except Exception as e:
+        print(f"Erreur lors de la récupération des composantes: {str(e)}")
+        return None
+
+def get_obstacle_array(map_path):
+    """
+    Récupère la grille d'obstacles complète d'une carte (journal appliqué) sous forme de
+    tableau NumPy, pour les recherches qui lisent les voisins case par case.
+    Le tableau est gardé en mémoire tant que la grille ne change pas : les requêtes suivantes
+    ne décompressent plus les tuiles. Il est partagé entre requêtes, donc en lecture seule.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        np.ndarray: Grille d'obstacles (True = obstacle) ou None en cas d'erreur
+    """
+    # Version lue avant la grille : une édition faite pendant la lecture force un rechargement
+    version = grid_version(map_path)
+    with _obstacle_arrays_lock:
+        cached = _obstacle_arrays.get(map_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    try:
+        grid = open_layer(map_path, 'obstacle_grid').to_array()
+    except Exception as e:
+        print(f"Erreur lors du chargement de la grille d'obstacles: {str(e)}")
+        return None
+    grid.setflags(write=False)
+    with _obstacle_arrays_lock:
+        _obstacle_arrays.pop(map_path, None)
+        _obstacle_arrays[map_path] = (version, grid)
+        while len(_obstacle_arrays) > OBSTACLE_ARRAY_CACHE_SIZE:
+            del _obstacle_arrays[next(iter(_obstacle_arrays))]
+    return grid
+
+def get_landmarks(map_path):
+    """
+    Récupère les distances aux landmarks d'une carte, pour l'heuristique de l'A*.
+    Si elles n'ont pas encore été calculées, leur calcul est lancé en arrière-plan.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        np.ndarray: Distances aux landmarks en lecture seule, de forme (landmarks, hauteur, largeur),
+                    ou None si elles ne sont pas disponibles
+    """
+    try:
+        if not has_layer(map_path, LANDMARK_LAYER):
+            schedule_landmark_update(map_path)
+            return None
+        return load_landmarks(map_path)
+    except Exception as e:
+        print(f"Erreur lors de la récupération des landmarks: {str(e)}")
+        return None
+
+def get_roadmap(map_path):
+    """
+    Récupère la roadmap d'une carte, pour les recherches de chemin rapides.
+    Si elle n'a pas encore été calculée, son calcul est lancé en arrière-plan.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        Roadmap: La roadmap, ou None si elle n'est pas disponible
+    """
+    try:
+        roadmap = load_roadmap(map_path)
+        if roadmap is None:
+            schedule_roadmap_update(map_path)
+        return roadmap
+    except Exception as e:
+        print(f"Erreur lors de la récupération de la roadmap: {str(e)}")
+        return None
+
+def is_free_cell(map_path, x, y):
+    """
+    Indique si la case contenant le point (x, y) est libre (dans la grille et hors obstacle).
+    Seule la tuile contenant le point est chargée.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        x (float): Coordonnée X du point
+        y (float): Coordonnée Y du point
+
+    Returns:
+        bool: True si la case est libre, False sinon
+    """
+    try:
+        grid = open_layer(map_path, 'obstacle_grid')
+        col, row = int(round(float(x))), int(round(float(y)))
+        height, width = grid.shape
+        if not (0 <= col < width and 0 <= row < height):
+            return False
+        return not grid[row, col]
+    except Exception as e:
+        print(f"Erreur lors de la vérification de la case: {str(e)}")
+        return False
+
+def store_paths(data, paths):
+    """
+    Ajoute des chemins au contenu d'un fichier NPZ chargé en dictionnaire.
+    Chaque chemin est stocké sous forme compacte : case de départ et codes de direction sur 3 bits.
+
+    Args:
+        data (dict): Contenu du fichier NPZ, modifié en place
+        paths (dict): Chemins à ajouter {nom du chemin: [(x, y), ...]}
+    """
+    encoded = unpack_paths(data)
+    for path_name, path_points in paths.items():
+        encoded[path_name] = encode_path(path_points)
+    data.update(pack_paths(encoded))
+
 def add_new_path_to_map(map_path, path_points, path_name="path"):
     """
     Ajoute un nouveau chemin à la carte.
@@ -216,32 +452,15 @@ def add_new_path_to_map(map_path, path_points, path_name="path"):
         bool: True si l'ajout a réussi, False sinon
     """
     try:
-        # Charger les données existantes
-        with np.load(map_path, allow_pickle=True) as npz:
-            data = dict(npz)
-        
-        # Initialiser le dictionnaire paths s'il n'existe pas
-        if 'paths' not in data:
-            data['paths'] = np.array(dict(), dtype=object)
-        
-        # Convertir le dictionnaire paths en dictionnaire Python standard
-        paths_dict = data['paths'].item() if isinstance(data['paths'], np.ndarray) else {}
+        # Lecture-modification-écriture du NPZ : une seule édition à la fois par carte
+        with map_lock(map_path):
+            # Charger les données existantes
+            data = load_map_data(map_path)
         
-        # Convertir les points en arrays numpy
-        path_x = np.array([float(p[0]) for p in path_points])
-        path_y = np.array([float(p[1]) for p in path_points])
+            store_paths(data, {path_name: path_points})
         
-        # Mettre à jour le dictionnaire avec le nouveau chemin
-        paths_dict[path_name] = {
-            'x': path_x,
-            'y': path_y
-        }
-        
-        # Convertir le dictionnaire mis à jour en array numpy
-        data['paths'] = np.array(paths_dict)
-        
-        # Sauvegarder les données mises à jour
-        np.savez(map_path, **data)
+            # Sauvegarder les données mises à jour
+            save_npz(map_path, data)
         return True
         
     except Exception as e:
@@ -251,6 +470,8 @@ def add_new_path_to_map(map_path, path_points, path_name="path"):
 def add_obstacle_to_map(map_path, points):
     """
     Ajoute un obstacle linéaire constitué d'une séquence de points à la carte.
+    Les cases modifiées sont ajoutées au journal des obstacles de la carte, sans réécrire
+    la grille (voir backend/obstacle_journal.py).
     
     Args:
         map_path (str): Chemin vers le fichier NPZ
@@ -260,27 +481,21 @@ def add_obstacle_to_map(map_path, points):
         bool: True si l'ajout a réussi, False sinon
     """
     try:
-        # Charger les données existantes
+        # Charger les limites de la carte et la taille de la grille sans charger ses tuiles
         print(f"Chargement du fichier NPZ: {map_path}")
-        with np.load(map_path, allow_pickle=True) as npz_file:
-            # Convertir en dictionnaire Python standard pour modifications
-            data = dict(npz_file)
-        
-        # Récupérer la grille d'obstacles et les limites
-        obstacle_grid = data['obstacle_grid'].copy()  # Créer une copie pour la modification
-        min_x = data['min_x']
-        max_x = data['max_x']
-        min_y = data['min_y']
-        max_y = data['max_y']
+        with np.load(map_path) as npz_file:
+            min_x = npz_file['min_x']
+            max_x = npz_file['max_x']
+            min_y = npz_file['min_y']
+            max_y = npz_file['max_y']
         
         # Afficher l'état initial
-        height, width = obstacle_grid.shape
+        height, width = get_grid_shape(map_path)
         print(f"Dimensions de la grille: {width}x{height}")
         print(f"Limites: X({min_x}, {max_x}), Y({min_y}, {max_y})")
-        print(f"Nombre d'obstacles avant: {np.sum(obstacle_grid)}")
         
         # Pour chaque paire de points consécutifs, tracer une ligne
-        total_pixels_modified = 0
+        rows, cols = [], []
         
         for i in range(len(points) - 1):
             p1, p2 = points[i], points[i+1]
@@ -317,7 +532,8 @@ def add_obstacle_to_map(map_path, points):
                 x, y = grid_x1, grid_y1
                 for _ in range(dx + 1):
                     if 0 <= x < width and 0 <= y < height:
-                        obstacle_grid[y, x] = True
+                        rows.append(y)
+                        cols.append(x)
                         pixels_modified += 1
                     err -= dy
                     if err < 0:
@@ -330,7 +546,8 @@ def add_obstacle_to_map(map_path, points):
                 x, y = grid_x1, grid_y1
                 for _ in range(dy + 1):
                     if 0 <= x < width and 0 <= y < height:
-                        obstacle_grid[y, x] = True
+                        rows.append(y)
+                        cols.append(x)
                         pixels_modified += 1
                     err -= dx
                     if err < 0:
@@ -339,38 +556,258 @@ def add_obstacle_to_map(map_path, points):
                     y += sy
             
             print(f"Pixels modifiés dans ce segment: {pixels_modified}")
-            total_pixels_modified += pixels_modified
         
         # Vérifier s'il y a eu des modifications
-        print(f"Total des pixels modifiés: {total_pixels_modified}")
-        print(f"Nombre d'obstacles après: {np.sum(obstacle_grid)}")
+        print(f"Total des pixels modifiés: {len(rows)}")
         
-        if total_pixels_modified == 0:
+        if not rows:
             print("Aucun pixel n'a été modifié!")
             return False
         
-        # Mettre à jour le dictionnaire avec la nouvelle grille
-        data['obstacle_grid'] = obstacle_grid
+        # Cases distinctes (les segments consécutifs partagent leurs extrémités)
+        cells = np.unique(np.array(rows) * width + np.array(cols))
+        rows, cols = cells // width, cells % width
         
-        # Sauvegarder le dictionnaire mis à jour dans le fichier NPZ
-        print(f"Sauvegarde des modifications dans {map_path}")
-        np.savez(map_path, **data)
-        
-        # Vérifier que la sauvegarde a bien fonctionné
-        with np.load(map_path, allow_pickle=True) as check_file:
-            check_grid = check_file['obstacle_grid']
-            check_count = np.sum(check_grid)
-            print(f"Vérification: {check_count} obstacles dans le fichier sauvegardé")
-            
-            if check_count == np.sum(obstacle_grid):
-                print("Sauvegarde réussie!")
+        # Les éditions d'une carte sont sérialisées (lecture de la grille, journal, composantes)
+        with map_lock(map_path):
+            obstacle_grid = open_layer(map_path, 'obstacle_grid')
+            was_obstacle = obstacle_grid.get_cells(rows, cols)
+            new_rows, new_cols = rows[~was_obstacle], cols[~was_obstacle]
+            if len(new_rows) == 0:
+                print("Toutes les cases sont déjà des obstacles")
                 return True
-            else:
-                print("ERREUR: La sauvegarde ne contient pas le bon nombre d'obstacles!")
-                return False
+            
+            # Ajout au journal : seules les cases qui changent sont écrites, les tuiles
+            # seront mises à jour par la compaction
+            edit_id = append_edit(map_path, EDIT_ADD, new_rows, new_cols)
+            print(f"Édition {edit_id} ajoutée au journal ({len(new_rows)} cases)")
+            
+            # Mettre à jour les composantes connexes de l'espace libre
+            component_labels = open_layer(map_path, 'component_labels')
+            labels = update_component_labels(component_labels.to_array(), (new_rows, new_cols))
+            component_labels.write_array(labels)
+            component_labels.flush()
+        
+        # Les anciens landmarks restent admissibles en attendant le recalcul
+        schedule_landmark_update(map_path)
+        # Roadmap reconstruite autour des nouvelles cases, si elle existe : désactivée ou pas
+        # encore calculée, il n'y a rien à mettre à jour
+        if has_roadmap(map_path):
+            schedule_roadmap_update(map_path, new_rows, new_cols)
+        return True
         
     except Exception as e:
         print(f"Erreur lors de l'ajout de l'obstacle: {str(e)}")
         import traceback
         traceback.print_exc()
         return False
+
+def undo_last_obstacle(map_path):
+    """
+    Annule le dernier ajout d'obstacle encore actif d'une carte (les annulations se font
+    de la plus récente à la plus ancienne).
+
+    Retirer des obstacles peut reconnecter des zones : les composantes connexes sont
+    entièrement recalculées et les landmarks, qui ne sont plus une borne valide, invalidés.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+
+    Returns:
+        int: Identifiant de l'édition annulée, ou None si aucune édition n'a été annulée
+    """
+    try:
+        with map_lock(map_path):
+            edits = active_edits(read_journal(map_path))
+            if not edits:
+                print("Aucun ajout d'obstacle à annuler")
+                return None
+            edit = edits[-1]
+            append_edit(map_path, EDIT_UNDO, edit['rows'], edit['cols'], target=edit['id'])
+            
+            grid = open_layer(map_path, 'obstacle_grid').to_array()
+            component_labels = open_layer(map_path, 'component_labels')
+            component_labels.write_array(compute_component_labels(grid))
+            component_labels.flush()
+            invalidate_landmarks(map_path)
+            if has_roadmap(map_path):
+                schedule_roadmap_update(map_path, edit['rows'], edit['cols'])
+        
+        print(f"Édition {edit['id']} annulée ({len(edit['rows'])} cases libérées)")
+        return edit['id']
+    
+    except Exception as e:
+        print(f"Erreur lors de l'annulation de l'obstacle: {str(e)}")
+        return None
+
+def get_drawn_obstacles(map_path, raster=None):
+    """
+    Renvoie les obstacles ajoutés à la main à une carte et encore actifs, pour les
+    conserver lors d'une nouvelle rastérisation.
+
+    Les ajouts du journal sont renvoyés un par un. Les plus anciens, sortis du journal
+    après compaction, ne sont plus que dans les tuiles : si la grille rastérisée d'origine
+    est fournie, ils sont retrouvés par différence et renvoyés en premier, en un seul ajout.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        raster (np.ndarray): Grille issue de la rastérisation, sans obstacle ajouté (optionnel)
+
+    Returns:
+        tuple: (forme de la grille, ajouts [(lignes, colonnes), ...] du plus ancien au plus récent)
+    """
+    with map_lock(map_path):
+        edits = [(edit['rows'], edit['cols']) for edit in active_edits(read_journal(map_path))]
+        grid = open_layer(map_path, 'obstacle_grid').to_array()
+
+    if raster is not None and raster.shape == grid.shape:
+        older = grid & ~raster
+        for rows, cols in edits:
+            older[rows, cols] = False
+        if older.any():
+            edits.insert(0, np.nonzero(older))
+    return grid.shape, edits
+
+def scale_cells(rows, cols, old_shape, new_shape):
+    """
+    Met des cases à l'échelle d'une grille d'une autre taille : chaque case devient toutes
+    les cases qu'elle recouvre, pour qu'un obstacle fin reste continu.
+
+    Returns:
+        tuple: (lignes, colonnes) des cases dans la nouvelle grille, sans doublon
+    """
+    mask = np.zeros(new_shape, dtype=bool)
+    ranges = []
+    for indices, old_size, new_size in ((rows, old_shape[0], new_shape[0]), (cols, old_shape[1], new_shape[1])):
+        scale = new_size / old_size
+        indices = np.asarray(indices, dtype=np.int64)
+        first = np.minimum(np.floor(indices * scale).astype(np.int64), new_size - 1)
+        last = np.minimum(np.maximum(first, np.ceil((indices + 1) * scale).astype(np.int64) - 1), new_size - 1)
+        ranges.append((first, last))
+    (row_first, row_last), (col_first, col_last) = ranges
+    for r0, r1, c0, c1 in zip(row_first, row_last, col_first, col_last):
+        mask[r0:r1 + 1, c0:c1 + 1] = True
+    return np.nonzero(mask)
+
+def restore_drawn_obstacles(map_path, edits, old_shape):
+    """
+    Rejoue sur une carte rastérisée à nouveau les obstacles ajoutés avant la rastérisation
+    (voir get_drawn_obstacles), mis à l'échelle de la nouvelle grille.
+
+    Chaque ajout redevient une édition du journal : ils restent annulables un par un, du
+    plus récent au plus ancien. Les landmarks et la roadmap ne sont pas mis à jour : la
+    carte rastérisée à nouveau (voir rasterize_map) les recalcule entièrement.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        edits (list): Ajouts [(lignes, colonnes), ...] du plus ancien au plus récent
+        old_shape (tuple): Forme de la grille sur laquelle les ajouts ont été faits
+
+    Returns:
+        int: Nombre d'ajouts rejoués
+    """
+    with map_lock(map_path):
+        obstacle_grid = open_layer(map_path, 'obstacle_grid')
+        changed_rows, changed_cols = [], []
+        for rows, cols in edits:
+            rows, cols = scale_cells(rows, cols, old_shape, obstacle_grid.shape)
+            was_obstacle = obstacle_grid.get_cells(rows, cols)
+            rows, cols = rows[~was_obstacle], cols[~was_obstacle]
+            if len(rows) == 0:
+                continue
+            append_edit(map_path, EDIT_ADD, rows, cols)
+            obstacle_grid.set_cells(rows, cols, True, persist=False)
+            changed_rows.append(rows)
+            changed_cols.append(cols)
+        if not changed_rows:
+            return 0
+
+        component_labels = open_layer(map_path, 'component_labels')
+        component_labels.write_array(compute_component_labels(obstacle_grid.to_array()))
+        component_labels.flush()
+
+    print(f"{len(changed_rows)} ajouts d'obstacles rejoués sur la nouvelle grille de {map_path}")
+    return len(changed_rows)
+
+def _staging_path(map_path):
+    # Carte en construction : dans un sous-dossier, pour ne pas apparaître dans la liste des cartes
+    return os.path.join(os.path.dirname(map_path), ".staging", os.path.basename(map_path))
+
+def _discard_map(map_path):
+    if os.path.exists(map_path):
+        os.remove(map_path)
+    delete_store(map_path)
+    with _obstacle_arrays_lock:
+        _obstacle_arrays.pop(map_path, None)
+
+def _replace_map(staging_path, map_path):
+    # Met en place le stockage en tuiles puis le NPZ construits sous staging_path. En cas
+    # d'échec, l'ancien stockage est remis en place et l'ancien NPZ n'a pas été touché
+    store_dir = get_store_dir(map_path)
+    backup_dir = store_dir + ".old"
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    had_store = os.path.exists(store_dir)
+    if had_store:
+        os.rename(store_dir, backup_dir)
+    try:
+        os.rename(get_store_dir(staging_path), store_dir)
+        os.replace(staging_path, map_path)
+    except BaseException:
+        shutil.rmtree(store_dir, ignore_errors=True)
+        if had_store:
+            os.rename(backup_dir, store_dir)
+        raise
+    finally:
+        forget_journal(map_path)
+        forget_journal(staging_path)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+
+def rasterize_map(map_path, svg_hash, geometry, resolution, samples_per_segment, fill_closed, prepare=None, roadmap=True):
+    """
+    Rastérise la géométrie d'un SVG (grille en cache si déjà calculée avec ces paramètres)
+    et enregistre la carte, en remplaçant d'un coup celle qui existe déjà.
+
+    La nouvelle carte (NPZ et stockage en tuiles) est entièrement construite à côté, puis
+    mise en place sous le verrou de la carte : un lecteur voit l'ancienne carte ou la
+    nouvelle, avec ses POIs et ses chemins, jamais une carte vide. Si la construction
+    échoue, l'ancienne carte reste intacte.
+
+    Args:
+        map_path (str): Chemin vers le fichier NPZ
+        svg_hash (str): Empreinte du SVG
+        geometry (dict): Géométrie extraite du SVG (voir get_geometry)
+        resolution (float): Nombre de cases par unité SVG
+        samples_per_segment (int): Nombre d'échantillons par segment
+        fill_closed (bool): Remplir l'intérieur des formes fermées
+        prepare (callable): Complète la nouvelle carte avant sa mise en place (obstacles
+            dessinés, POIs, chemins) : appelée avec le chemin de la carte en construction,
+            sa valeur de retour est renvoyée
+        roadmap (bool): Programmer le calcul de la roadmap de la nouvelle carte
+
+    Returns:
+        tuple: (grid, bounds, valeur renvoyée par prepare)
+    """
+    staging_path = _staging_path(map_path)
+    os.makedirs(os.path.dirname(staging_path), exist_ok=True)
+    with map_lock(map_path):
+        _discard_map(staging_path)
+        try:
+            grid, bounds, cached = get_raster(svg_hash, geometry, resolution, samples_per_segment, fill_closed)
+            metrics.increment('geometry_cache.raster_hits' if cached else 'geometry_cache.raster_misses')
+            save_occupancy_data(grid, bounds, staging_path,
+                                metadata=raster_metadata(svg_hash, resolution, samples_per_segment, fill_closed))
+            result = prepare(staging_path) if prepare is not None else None
+            _replace_map(staging_path, map_path)
+        finally:
+            _discard_map(staging_path)
+    schedule_landmark_update(map_path)
+    if roadmap:
+        schedule_roadmap_update(map_path)
+
+    # Génère et sauvegarde une preview PNG
+    from backend.viewer import generate_plot_preview  # Import local pour éviter les dépendances circulaires
+    preview_directory = "app/static/map_previews"
+    os.makedirs(preview_directory, exist_ok=True)
+    map_name = os.path.splitext(os.path.basename(map_path))[0]
+    generate_plot_preview(grid, bounds, os.path.join(preview_directory, map_name + ".png"))
+    return grid, bounds, result
@@ -1,6 +1,11 @@
 import numpy as np
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from backend.grid_store import open_layer
+from backend.path_encoding import decode_paths
+from backend.poi_table import PoiTable
+from backend.utils import load_map_data
 
 def visualize_occupancy_data(file_path):
     """
@@ -15,8 +20,8 @@ def visualize_occupancy_data(file_path):
     try:
         # Chargement des données
         print(f"Chargement des données pour la visualisation: {file_path}")
-        data = np.load(file_path, allow_pickle=True)
-        obstacle_grid = data["obstacle_grid"]
+        obstacle_grid = open_layer(file_path, 'obstacle_grid').to_array()
+        data = load_map_data(file_path)
         min_x = data["min_x"]
         max_x = data["max_x"]
         min_y = data["min_y"]
@@ -47,11 +52,12 @@ def visualize_occupancy_data(file_path):
         }
 
         # Ajout des POIs s'ils existent
-        if 'poi_x' in data:
-            poi_x = data['poi_x']
-            poi_y = data['poi_y']
-            poi_types = data['poi_types']
-            poi_names = data.get('poi_names', [f'Point {i+1}' for i in range(len(poi_x))])
+        pois = PoiTable.from_npz(data)
+        if len(pois) > 0:
+            poi_x = pois.x
+            poi_y = pois.y
+            poi_types = pois.types
+            poi_names = pois.names
             
             # Créer un scatter plot pour chaque type de POI
             for poi_type in np.unique(poi_types):
@@ -74,20 +80,18 @@ def visualize_occupancy_data(file_path):
                 ))
 
         # Ajout des chemins s'ils existent
-        if 'paths' in data:
-            paths = data['paths'].item()  # Convertir l'array numpy en dictionnaire Python
-            for path_name, path_data in paths.items():
-                fig.add_trace(go.Scatter(
-                    x=path_data['x'],
-                    y=path_data['y'],
-                    mode='lines',
-                    line=dict(
-                        color='red',
-                        width=2
-                    ),
-                    name=path_name,
-                    visible=True
-                ))
+        for path_name, path_points in decode_paths(data).items():
+            fig.add_trace(go.Scatter(
+                x=path_points[:, 0],
+                y=path_points[:, 1],
+                mode='lines',
+                line=dict(
+                    color='red',
+                    width=2
+                ),
+                name=path_name,
+                visible=True
+            ))
 
         # Mise à jour des axes et du titre
         fig.update_layout(
@@ -120,14 +124,16 @@ def generate_plot_preview(grid, bounds, output_path):
         bounds (tuple): Limites de la bounding box (min_x, max_x, min_y, max_y).
         output_path (str): Chemin où sauvegarder l'image PNG.
     """
-    plt.figure(figsize=(8, 8))
-    plt.imshow(grid, cmap='Greys', origin='lower')
-    plt.axis('off')  # Supprime les axes
-    plt.gca().set_xticks([])  # Supprime les ticks sur l'axe X
-    plt.gca().set_yticks([])  # Supprime les ticks sur l'axe Y
-    plt.gca().set_frame_on(False)  # Supprime le cadre autour du graphique
-    plt.savefig(output_path, dpi=300, bbox_inches='tight', pad_inches=0)  # Supprime les marges
-    plt.close()
+    # Figure créée sans pyplot : son état global n'est pas sûr quand plusieurs imports
+    # de carte génèrent leur preview en même temps
+    figure = Figure(figsize=(8, 8))
+    axes = figure.add_subplot()
+    axes.imshow(grid, cmap='Greys', origin='lower')
+    axes.axis('off')  # Supprime les axes
+    axes.set_xticks([])  # Supprime les ticks sur l'axe X
+    axes.set_yticks([])  # Supprime les ticks sur l'axe Y
+    axes.set_frame_on(False)  # Supprime le cadre autour du graphique
+    figure.savefig(output_path, dpi=300, bbox_inches='tight', pad_inches=0)  # Supprime les marges
 
 def get_map_data(file_path, start_name=None, end_name=None):
     """
@@ -140,37 +146,26 @@ def get_map_data(file_path, start_name=None, end_name=None):
 
     Returns:
         tuple: (grid, start_point, end_point) où:
-            - grid: np.ndarray - Matrice binaire (0 = libre, 1 = obstacle)
+            - grid: TiledGrid - Grille d'obstacles (0 = libre, 1 = obstacle), tuiles chargées à la demande
             - start_point: tuple - Coordonnées (x, y) du point de départ ou None
             - end_point: tuple - Coordonnées (x, y) du point d'arrivée ou None
     """
     try:
-        data = np.load(file_path, allow_pickle=True)
-        
-        # Convertir la grille en matrice binaire (0 et 1)
-        grid = data["obstacle_grid"].astype(int)
+        # Ouvrir la grille sans la charger : le pathfinding ne lit que les tuiles qu'il atteint
+        grid = open_layer(file_path, 'obstacle_grid')
+        with np.load(file_path) as data:
+            pois = PoiTable.from_npz(data)
         
         start_point = None
         end_point = None
         
-        if all(key in data for key in ['poi_x', 'poi_y', 'poi_names']):
-            poi_x = data['poi_x']
-            poi_y = data['poi_y']
-            poi_names = data['poi_names']
-            
-            # Rechercher le point de départ par son nom
-            if start_name:
-                start_indices = np.where(poi_names == start_name)[0]
-                if len(start_indices) > 0:
-                    idx = start_indices[0]
-                    start_point = (int(round(poi_x[idx])), int(round(poi_y[idx])))
-            
-            # Rechercher le point d'arrivée par son nom
-            if end_name:
-                end_indices = np.where(poi_names == end_name)[0]
-                if len(end_indices) > 0:
-                    idx = end_indices[0]
-                    end_point = (int(round(poi_x[idx])), int(round(poi_y[idx])))
+        # Rechercher les points par leur nom (index de la table des POIs)
+        start_poi = pois.get(start_name) if start_name else None
+        if start_poi is not None:
+            start_point = (int(round(start_poi['x'])), int(round(start_poi['y'])))
+        end_poi = pois.get(end_name) if end_name else None
+        if end_poi is not None:
+            end_point = (int(round(end_poi['x'])), int(round(end_poi['y'])))
         
         return grid, start_point, end_point
         
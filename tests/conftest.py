@@ -0,0 +1,131 @@
+import heapq
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from app import create_app
+from backend.load_test import wait_for_background_work
+from backend.svg_convertor import save_occupancy_data
+from backend.utils import add_poi_to_map
+
+# Noms de cartes uniques sur toute la session : certains caches sont indexés par chemin relatif
+_map_ids = itertools.count()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Dossier de travail temporaire : l'application lit et écrit ses cartes dans data/NPZ-output.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/NPZ-output")
+    yield tmp_path
+    # Les calculs en arrière-plan utilisent des chemins relatifs : ils doivent finir
+    # avant le retour au dossier d'origine
+    assert wait_for_background_work()
+
+
+@pytest.fixture
+def make_map(workdir):
+    """
+    Crée une carte à partir d'une grille d'obstacles, avec un point de départ si demandé.
+
+    Returns:
+        callable: make(grid, start=None) -> (nom de la carte, chemin du NPZ)
+    """
+    def make(grid, start=None):
+        grid = np.asarray(grid, dtype=bool)
+        name = f"test_map_{next(_map_ids)}"
+        path = os.path.join("data/NPZ-output", f"{name}.npz")
+        height, width = grid.shape
+        save_occupancy_data(grid, (0.0, width / 20.0, 0.0, height / 20.0), path)
+        if start is not None:
+            add_poi_to_map(path, float(start[0]), float(start[1]), 'start', 'Départ')
+        return name, path
+    return make
+
+
+@pytest.fixture
+def app(workdir):
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def two_rooms(height=20, width=30):
+    """
+    Grille de deux pièces séparées par un mur plein (colonne du milieu).
+    """
+    grid = np.zeros((height, width), dtype=bool)
+    grid[:, width // 2] = True
+    return grid
+
+
+def random_grid(seed, height=40, width=50, density=0.3):
+    """
+    Grille d'obstacles aléatoire, coins haut-gauche et bas-droite libres.
+    """
+    grid = np.random.default_rng(seed).random((height, width)) < density
+    grid[0, 0] = grid[-1, -1] = False
+    return grid
+
+
+def cell_point(x, y):
+    """
+    Coordonnées carte (en unités de la carte, 20 cases par unité) du centre de la case (x, y).
+    """
+    return {'x': (x + 0.5) / 20.0, 'y': (y + 0.5) / 20.0}
+
+
+def path_cost(path):
+    return sum(1.4 if x0 != x1 and y0 != y1 else 1.0 for (x0, y0), (x1, y1) in zip(path, path[1:]))
+
+
+def reference_distances(grid, sources):
+    """
+    Distances de référence depuis la source la plus proche (Dijkstra naïf, mêmes règles que l'A* :
+    8 directions, coûts 1.0 / 1.4, pas de coupe de coin).
+
+    Returns:
+        np.ndarray: Distance de chaque case (inf si non atteinte)
+    """
+    grid = np.asarray(grid, dtype=bool)
+    height, width = grid.shape
+    distances = np.full((height, width), np.inf)
+    heap = [(0.0, x, y) for x, y in sources]
+    while heap:
+        d, x, y = heapq.heappop(heap)
+        if d >= distances[y, x]:
+            continue
+        distances[y, x] = d
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                nx, ny = x + dx, y + dy
+                if (dx or dy) and 0 <= nx < width and 0 <= ny < height and not grid[ny, nx]:
+                    if dx and dy and (grid[y, nx] or grid[ny, x]):
+                        continue
+                    heapq.heappush(heap, (d + (1.4 if dx and dy else 1.0), nx, ny))
+    return distances
+
+
+def assert_valid_path(grid, path, start=None, end=None):
+    """
+    Vérifie qu'un chemin relie start à end par des pas d'une case (ou des attentes sur place),
+    sans traverser d'obstacle ni couper de coin.
+    """
+    if start is not None:
+        assert path[0] == start
+    if end is not None:
+        assert path[-1] == end
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert max(abs(x1 - x0), abs(y1 - y0)) <= 1
+        assert not grid[y1, x1]
+        if x0 != x1 and y0 != y1:
+            assert not grid[y0, x1] and not grid[y1, x0]
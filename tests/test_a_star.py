@@ -0,0 +1,33 @@
+import numpy as np
+
+from backend.pathfinding.a_star import astar_pathfinding, get_neighbors, multi_target_pathfinding
+from conftest import path_cost, random_grid, reference_distances
+
+
+def test_get_neighbors_forbids_corner_cutting():
+    grid = np.array([[0, 1], [0, 0]], dtype=bool)
+    assert sorted(get_neighbors(grid, (0, 0), 2, 2)) == [((0, 1), 1.0)]
+    assert sorted(get_neighbors(grid, (0, 1), 2, 2)) == [((0, 0), 1.0), ((1, 1), 1.0)]
+
+
+def test_a_star_costs_match_dijkstra():
+    for seed in range(5):
+        grid = random_grid(seed)
+        distances = reference_distances(grid, [(0, 0)])
+        free = np.argwhere(np.isfinite(distances))
+        for y, x in free[np.random.default_rng(seed).choice(len(free), 10)]:
+            path = astar_pathfinding(grid, (0, 0), (int(x), int(y)))
+            assert abs(path_cost(path) - distances[y, x]) < 1e-6
+
+
+def test_multi_target_paths_are_shortest():
+    grid = random_grid(7)
+    distances = reference_distances(grid, [(0, 0)])
+    reachable = [tuple(int(v) for v in cell[::-1]) for cell in np.argwhere(np.isfinite(distances))[::37]]
+    unreachable = [tuple(int(v) for v in cell[::-1]) for cell in np.argwhere(~grid & np.isinf(distances))[:3]]
+
+    paths = multi_target_pathfinding(grid, (0, 0), reachable + unreachable)
+    assert set(paths) == set(reachable)
+    for (x, y), path in paths.items():
+        assert path[0] == (0, 0) and path[-1] == (x, y)
+        assert abs(path_cost(path) - distances[y, x]) < 1e-6
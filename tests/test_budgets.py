@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend import metrics
+from backend.pathfinding.a_star import PathfindingTimeout, astar_pathfinding
+from backend.pathfinding.executor import run_in_pool, run_path_query
+from backend.utils import get_poi_map
+from conftest import two_rooms
+
+
+def test_expansion_budget_raises():
+    grid = np.zeros((100, 100), dtype=bool)
+    with pytest.raises(PathfindingTimeout):
+        astar_pathfinding(grid, (0, 0), (99, 99), max_expansions=10)
+
+
+def test_cancelled_search_raises():
+    # Mur avec un passage en bas : la recherche développe bien plus que BUDGET_CHECK_INTERVAL noeuds
+    grid = np.zeros((100, 100), dtype=bool)
+    grid[:-1, 50] = True
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(PathfindingTimeout):
+        astar_pathfinding(grid, (0, 0), (99, 0), cancel_event=cancel_event)
+
+
+def test_search_within_budget_finds_path():
+    grid = np.zeros((20, 20), dtype=bool)
+    path = astar_pathfinding(grid, (0, 0), (19, 19), time_limit=5.0, max_expansions=10_000)
+    assert path[0] == (0, 0) and path[-1] == (19, 19)
+
+
+def test_pool_timeout_sets_cancel_event():
+    metrics.reset()
+    received = {}
+
+    def slow_search(time_limit=None, cancel_event=None):
+        received['event'] = cancel_event
+        cancel_event.wait(5)
+        raise PathfindingTimeout("Search cancelled")
+
+    with pytest.raises(PathfindingTimeout):
+        run_in_pool(slow_search, time_limit=0.05, metric='test')
+    assert received['event'].wait(1)
+    counters = metrics.snapshot()['counters']
+    assert counters['test.queries'] == 1
+    assert counters['test.timeouts'] == 1
+
+
+def test_pool_passes_remaining_budget():
+    remaining = run_in_pool(lambda time_limit=None, cancel_event=None: time_limit, time_limit=2.0)
+    assert 0 < remaining <= 2.0
+
+
+def test_no_path_is_counted():
+    metrics.reset()
+    assert run_path_query(two_rooms(), (0, 0), (29, 0)) == []
+    assert metrics.snapshot()['counters']['pathfinding.no_path'] == 1
+
+
+def test_add_poi_timeout_removes_point(make_map, app, client):
+    app.config['PATHFINDING_MAX_EXPANSIONS'] = 10
+    name, path = make_map(np.zeros((100, 100), dtype=bool), start=(0, 0))
+    response = client.post(f'/add_poi/{name}', json={'x': 99, 'y': 99, 'type': 'end', 'name': 'Loin'}).get_json()
+    assert response['success'] is False and response['timeout'] is True
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ']
+    assert client.get('/metrics').get_json()['counters']['pathfinding.timeouts'] >= 1
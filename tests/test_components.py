@@ -0,0 +1,68 @@
+import numpy as np
+
+from backend.pathfinding.components import are_connected, compute_component_labels, update_component_labels
+from backend.utils import get_component_labels, get_poi_map
+from conftest import two_rooms
+
+
+def test_two_rooms_get_different_labels():
+    labels = compute_component_labels(two_rooms())
+    assert labels[0, 0] != labels[0, -1]
+    assert labels[:, 15].max() == 0
+    assert are_connected(labels, (0, 0), (14, 19))
+    assert not are_connected(labels, (0, 0), (29, 0))
+
+
+def test_diagonal_between_two_walls_does_not_connect():
+    # Les deux cases libres ne se touchent que par un coin bordé d'obstacles
+    grid = np.array([[0, 1], [1, 0]], dtype=bool)
+    labels = compute_component_labels(grid)
+    assert not are_connected(labels, (0, 0), (1, 1))
+
+
+def test_start_on_obstacle_uses_free_neighbours():
+    labels = compute_component_labels(two_rooms())
+    assert are_connected(labels, (15, 5), (0, 5))
+    assert are_connected(labels, (15, 5), (29, 5))
+    assert not are_connected(labels, (0, 0), (15, 5))
+
+
+def test_end_outside_grid_is_unreachable():
+    labels = compute_component_labels(two_rooms())
+    assert not are_connected(labels, (0, 0), (30, 0))
+
+
+def test_update_matches_full_recompute():
+    grid = np.zeros((20, 30), dtype=bool)
+    labels = compute_component_labels(grid)
+    rows, cols = np.arange(20), np.full(20, 10)
+    labels = update_component_labels(labels, (rows, cols))
+    grid[rows, cols] = True
+    expected = compute_component_labels(grid)
+
+    # Mêmes partitions, aux numéros d'étiquettes près
+    assert np.array_equal(labels == 0, expected == 0)
+    assert len(np.unique(labels)) == len(np.unique(expected)) == 3
+    pairs = set(zip(labels.ravel().tolist(), expected.ravel().tolist()))
+    assert len(pairs) == 3
+
+
+def test_labels_are_stored_with_the_map(make_map):
+    _, path = make_map(two_rooms())
+    labels = get_component_labels(path)
+    assert labels[0, 0] != labels[0, 29]
+
+
+def test_add_poi_rejects_unreachable_point(make_map, client):
+    name, path = make_map(two_rooms(), start=(2, 2))
+    response = client.post(f'/add_poi/{name}', json={'x': 25, 'y': 5, 'type': 'end', 'name': 'Loin'})
+    assert response.get_json()['success'] is False
+    assert 'inaccessible' in response.get_json()['message']
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ']
+
+
+def test_add_poi_routes_reachable_point(make_map, client):
+    name, path = make_map(two_rooms(), start=(2, 2))
+    response = client.post(f'/add_poi/{name}', json={'x': 10, 'y': 15, 'type': 'end', 'name': 'Proche'})
+    assert response.get_json()['success'] is True
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ', 'Proche']
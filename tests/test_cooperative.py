@@ -0,0 +1,76 @@
+import numpy as np
+
+from backend.pathfinding.components import compute_component_labels
+from backend.pathfinding.cooperative import ReservationTable, plan_fleet
+from conftest import assert_valid_path, two_rooms
+
+
+def position(path, t):
+    # Un kart arrivé reste garé sur sa dernière case
+    return path[min(t, len(path) - 1)]
+
+
+def assert_collision_free(results):
+    paths = [result['path'] for result in results if result['status'] == 'ok']
+    horizon = max(len(path) for path in paths)
+    for t in range(horizon):
+        cells = [position(path, t) for path in paths]
+        assert len(set(cells)) == len(cells), f"collision au temps {t}"
+        for i, a in enumerate(paths):
+            for b in paths[i + 1:]:
+                swapped = position(a, t) == position(b, t + 1) and position(b, t) == position(a, t + 1)
+                assert not swapped, f"échange de places au temps {t}"
+
+
+def test_reservation_table_blocks_cells_swaps_and_parking():
+    table = ReservationTable(10, 10)
+    table.reserve([(0, 0), (1, 0), (2, 0)])
+    assert not table.is_free(1, 0, 1)
+    assert table.is_free(1, 0, 2)
+    # Garé sur sa dernière case à partir de t = 2
+    assert table.is_free(2, 0, 1)
+    assert not table.is_free(2, 0, 50)
+    # (1, 0) -> (0, 0) entre t = 0 et 1 croise le kart qui fait (0, 0) -> (1, 0)
+    assert table.is_swap(1, 0, 2, 0)
+    assert not table.is_swap(1, 0, 2, 1)
+
+
+def test_head_on_karts_do_not_collide():
+    grid = np.zeros((5, 12), dtype=bool)
+    karts = [((0, 2), (10, 2)), ((11, 2), (1, 2)), ((5, 0), (5, 4))]
+    results = plan_fleet(grid, karts)
+    assert [result['status'] for result in results] == ['ok', 'ok', 'ok']
+    for (start, goal), result in zip(karts, results):
+        assert_valid_path(grid, result['path'], start, goal)
+    assert_collision_free(results)
+
+
+def test_kart_heading_to_another_start_waits_for_it():
+    grid = np.zeros((3, 10), dtype=bool)
+    # Le premier kart va sur le départ du second : il doit être planifié après lui
+    karts = [((0, 1), (5, 1)), ((5, 1), (9, 1))]
+    results = plan_fleet(grid, karts)
+    assert [result['status'] for result in results] == ['ok', 'ok']
+    assert_collision_free(results)
+
+
+def test_unreachable_and_duplicate_karts_are_reported():
+    grid = two_rooms()
+    labels = compute_component_labels(grid)
+    karts = [((0, 0), (29, 0)), ((1, 1), (3, 3)), ((1, 1), (4, 4))]
+    results = plan_fleet(grid, karts, labels=labels)
+    assert [result['status'] for result in results] == ['unreachable', 'ok', 'invalid']
+
+
+def test_plan_fleet_route(make_map, client):
+    name, _ = make_map(np.zeros((10, 20), dtype=bool), start=(0, 5))
+    response = client.post(f'/plan_fleet/{name}', json={'karts': [
+        {'start': 'Départ', 'end': {'x': 19, 'y': 5}},
+        {'start': {'x': 19, 'y': 4}, 'end': {'x': 0, 'y': 4}}
+    ]}).get_json()
+    assert response['success'] is True
+    paths = [[(step['x'], step['y']) for step in kart['path']] for kart in response['karts']]
+    assert_collision_free([{'status': 'ok', 'path': path} for path in paths])
+
+    response = client.post(f'/plan_fleet/{name}', json={'karts': [{'start': 'Inconnu', 'end': 'Départ'}]})
+    assert response.get_json()['success'] is False
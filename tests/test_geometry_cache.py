@@ -0,0 +1,185 @@
+import io
+import os
+import threading
+
+import numpy as np
+
+from app import routes
+from backend import metrics
+from backend.geometry_cache import get_geometry, get_raster, hash_svg, read_raster_metadata
+from backend.grid_store import get_store_dir, open_layer
+from backend.obstacle_journal import JOURNAL_FILE, active_edits, compact_journal, map_lock, read_journal
+from backend.utils import add_obstacle_to_map, add_poi_to_map, get_poi_map, list_npz_files, scale_cells, undo_last_obstacle
+
+# Murs extérieurs (10 x 10 unités) et un rack plein
+SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">
+  <path d="M 0 0 L 10 0 L 10 10 L 0 10 Z" fill="none" stroke="black"/>
+  <path d="M 1 1 L 3 1 L 3 3 L 1 3 Z"/>
+</svg>
+"""
+
+
+def upload(client, name="entrepot", content=SVG, fill_closed=False):
+    data = {'svg_file': (io.BytesIO(content.encode()), f"{name}.svg")}
+    if fill_closed:
+        data['fill_closed'] = 'on'
+    return client.post('/upload_and_process_svg', data=data, content_type='multipart/form-data')
+
+
+def counter(name):
+    return metrics.snapshot()['counters'].get(name, 0)
+
+
+def test_geometry_is_parsed_once_per_content(workdir):
+    with open("a.svg", 'w') as f:
+        f.write(SVG)
+    with open("b.svg", 'w') as f:
+        f.write(SVG)
+    svg_hash, geometry, cached = get_geometry("a.svg")
+    assert not cached and svg_hash == hash_svg("a.svg")
+    other_hash, other, cached = get_geometry("b.svg")
+    assert cached and other_hash == svg_hash
+    assert np.array_equal(other['control_points'], geometry['control_points'])
+
+
+def test_raster_is_cached_per_parameters(workdir):
+    with open("a.svg", 'w') as f:
+        f.write(SVG)
+    svg_hash, geometry, _ = get_geometry("a.svg")
+    grid, bounds, cached = get_raster(svg_hash, geometry, 20.0, 500, True)
+    assert not cached
+    again, again_bounds, cached = get_raster(svg_hash, geometry, 20.0, 500, True)
+    assert cached and np.array_equal(again, grid) and np.allclose(again_bounds, bounds)
+    _, _, cached = get_raster(svg_hash, geometry, 20.0, 500, False)
+    assert not cached
+
+
+def test_duplicate_upload_keeps_pois(client):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    metadata = read_raster_metadata(path)
+    assert metadata == {'svg_hash': metadata['svg_hash'], 'resolution': 20.0,
+                        'samples_per_segment': 500, 'fill_closed': False}
+    assert add_poi_to_map(path, 160.0, 140.0, 'start', 'Départ')
+
+    duplicates = counter('geometry_cache.duplicate_uploads')
+    assert upload(client).status_code == 302
+    assert counter('geometry_cache.duplicate_uploads') == duplicates + 1
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ']
+
+    # Autres paramètres : la carte est rastérisée à nouveau, depuis le cache de géométrie
+    hits = counter('geometry_cache.raster_hits')
+    assert upload(client, fill_closed=True).status_code == 302
+    assert read_raster_metadata(path)['fill_closed'] is True
+    assert counter('geometry_cache.raster_hits') == hits
+    assert upload(client, name="copie", fill_closed=True).status_code == 302
+    assert counter('geometry_cache.raster_hits') == hits + 1
+
+
+def test_rerasterize_rescales_pois_and_keeps_obstacles(client):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    assert add_poi_to_map(path, 160.0, 140.0, 'start', 'Départ')
+    assert add_poi_to_map(path, 160.0, 60.0, 'end', 'Arrivée')
+    assert add_obstacle_to_map(path, [{'x': 5.0, 'y': 4.0}, {'x': 5.0, 'y': 6.0}])
+    assert add_obstacle_to_map(path, [{'x': 6.0, 'y': 8.0}, {'x': 8.0, 'y': 8.0}])
+    old_grid = open_layer(path, 'obstacle_grid').to_array()
+    old_edits = active_edits(read_journal(path))
+
+    response = client.post('/rerasterize/entrepot', json={'resolution': 10.0})
+    body = response.get_json()
+    assert body['success'] and body['grid_size'] == [101, 101] and body['rejected'] == []
+    assert body['pois'] == 2 and body['routes'] == 1
+    assert {poi['name']: (poi['x'], poi['y']) for poi in get_poi_map(path)} == \
+        {'Départ': (80.0, 70.0), 'Arrivée': (80.0, 30.0)}
+
+    # Les deux obstacles dessinés sont rejoués à la nouvelle échelle, toujours annulables un par un
+    grid = open_layer(path, 'obstacle_grid').to_array()
+    for edit in old_edits:
+        rows, cols = scale_cells(edit['rows'], edit['cols'], old_grid.shape, grid.shape)
+        assert grid[rows, cols].all()
+    assert len(active_edits(read_journal(path))) == 2
+    svg_hash = read_raster_metadata(path)['svg_hash']
+    raster, _, _ = get_raster(svg_hash, None, 10.0, 500, False)
+    assert undo_last_obstacle(path) and undo_last_obstacle(path)
+    assert np.array_equal(open_layer(path, 'obstacle_grid').to_array(), raster)
+
+
+def test_rerasterize_keeps_obstacles_older_than_the_journal(client):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    assert add_obstacle_to_map(path, [{'x': 5.0, 'y': 4.0}, {'x': 5.0, 'y': 6.0}])
+    # Édition intégrée aux tuiles puis sortie du journal, comme après HISTORY_LIMIT éditions
+    compact_journal(path)
+    open(os.path.join(get_store_dir(path), JOURNAL_FILE), 'wb').close()
+    assert open_layer(path, 'obstacle_grid').to_array()[80:121, 100].all()
+
+    assert client.post('/rerasterize/entrepot', json={'resolution': 10.0}).get_json()['success']
+    assert open_layer(path, 'obstacle_grid').to_array()[40:61, 50].all()
+    assert len(active_edits(read_journal(path))) == 1
+
+
+def test_map_is_replaced_at_once_during_rerasterize(client, monkeypatch):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    assert add_poi_to_map(path, 160.0, 140.0, 'start', 'Départ')
+    restore = routes.restore_drawn_obstacles
+    seen = []
+
+    def restore_and_read(*args):
+        # Lecteur sans verrou pendant la construction : l'ancienne carte est toujours là
+        seen.append(([poi['name'] for poi in get_poi_map(path)], read_raster_metadata(path)['resolution'],
+                     open_layer(path, 'obstacle_grid').shape, list_npz_files()))
+        return restore(*args)
+
+    monkeypatch.setattr(routes, 'restore_drawn_obstacles', restore_and_read)
+    assert client.post('/rerasterize/entrepot', json={'resolution': 10.0}).get_json()['success']
+    assert seen == [(['Départ'], 20.0, (201, 201), ['entrepot'])]
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ']
+    assert open_layer(path, 'obstacle_grid').shape == (101, 101)
+    assert os.listdir("data/NPZ-output/.staging") == []
+
+
+def test_failed_rerasterize_keeps_the_map(client, monkeypatch):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    assert add_poi_to_map(path, 160.0, 140.0, 'start', 'Départ')
+    assert add_poi_to_map(path, 160.0, 60.0, 'end', 'Arrivée')
+    assert add_obstacle_to_map(path, [{'x': 5.0, 'y': 4.0}, {'x': 5.0, 'y': 6.0}])
+    grid = open_layer(path, 'obstacle_grid').to_array()
+
+    def failing_route(*args, **kwargs):
+        raise RuntimeError("panne")
+
+    monkeypatch.setattr(routes, 'route_end_points', failing_route)
+    response = client.post('/rerasterize/entrepot', json={'resolution': 10.0})
+    assert response.status_code == 500 and response.get_json()['success'] is False
+
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ', 'Arrivée']
+    assert read_raster_metadata(path)['resolution'] == 20.0
+    assert np.array_equal(open_layer(path, 'obstacle_grid').to_array(), grid)
+    assert len(active_edits(read_journal(path))) == 1
+    assert os.listdir("data/NPZ-output/.staging") == []
+
+
+def test_upload_waits_for_the_map_lock(client):
+    assert upload(client).status_code == 302
+    path = os.path.join("data/NPZ-output", "entrepot.npz")
+    responses = []
+    with map_lock(path):
+        thread = threading.Thread(target=lambda: responses.append(upload(client, fill_closed=True)))
+        thread.start()
+        thread.join(0.5)
+        # Une édition en cours sur la carte : le remplacement attend la fin de l'édition
+        assert thread.is_alive()
+        assert read_raster_metadata(path)['fill_closed'] is False
+    thread.join()
+    assert responses[0].status_code == 302
+    assert read_raster_metadata(path)['fill_closed'] is True
+
+
+def test_scale_cells_keeps_lines_continuous():
+    rows, cols = scale_cells(np.array([1, 1, 1]), np.array([0, 1, 2]), (4, 4), (8, 8))
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(r, c) for r in (2, 3) for c in range(6)]
+    rows, cols = scale_cells(np.array([0, 1, 2, 3]), np.array([3, 3, 3, 3]), (4, 4), (2, 2))
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 1)]
@@ -0,0 +1,118 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from backend.grid_store import (TILE_SIZE, TiledGrid, atomic_write, delete_layer, get_store_dir, has_layer,
+                                migrate_map_to_tiles, open_layer, write_layer)
+from backend.obstacle_journal import compact_journal
+from backend.utils import add_obstacle_to_map, get_component_labels, get_obstacle_array
+from conftest import cell_point, two_rooms
+
+
+def test_layer_round_trip_and_sparse_tiles(workdir):
+    map_path = "data/NPZ-output/grid.npz"
+    grid = np.zeros((TILE_SIZE + 10, 2 * TILE_SIZE + 5), dtype=bool)
+    grid[3, 4] = True
+    grid[-1, -1] = True
+    layer = write_layer(map_path, 'obstacle_grid', grid, fill=False)
+
+    assert np.array_equal(layer.to_array(), grid)
+    # Seules les deux tuiles contenant un obstacle sont stockées
+    stored = sorted(os.listdir(os.path.join(get_store_dir(map_path), 'obstacle_grid')))
+    assert stored == ['0_0.npz', '1_2.npz']
+
+
+def test_cells_are_loaded_lazily(workdir):
+    map_path = "data/NPZ-output/grid.npz"
+    grid = np.random.default_rng(0).random((3 * TILE_SIZE, 3 * TILE_SIZE)) < 0.2
+    write_layer(map_path, 'obstacle_grid', grid, fill=False)
+
+    layer = TiledGrid(get_store_dir(map_path), 'obstacle_grid')
+    assert layer[TILE_SIZE + 1, 2] == grid[TILE_SIZE + 1, 2]
+    assert layer.loaded_tiles == 1
+    rows, cols = np.array([0, 5, 2 * TILE_SIZE]), np.array([0, 7, 2 * TILE_SIZE + 3])
+    assert np.array_equal(layer.get_cells(rows, cols), grid[rows, cols])
+    assert layer.loaded_tiles == 3
+
+
+def test_set_cells_rewrites_only_touched_tiles(workdir):
+    map_path = "data/NPZ-output/grid.npz"
+    layer = write_layer(map_path, 'obstacle_grid', np.zeros((2 * TILE_SIZE, 2 * TILE_SIZE), dtype=bool), fill=False)
+    layer.set_cells([1, 2], [TILE_SIZE + 1, TILE_SIZE + 2], True)
+    assert layer.flush() == 1
+
+    reopened = TiledGrid(get_store_dir(map_path), 'obstacle_grid')
+    assert reopened[1, TILE_SIZE + 1] and reopened[2, TILE_SIZE + 2]
+    assert reopened.to_array().sum() == 2
+
+
+def test_extra_dimension_layer(workdir):
+    map_path = "data/NPZ-output/grid.npz"
+    fields = np.arange(3 * 20 * 30, dtype=np.float32).reshape(3, 20, 30)
+    layer = write_layer(map_path, 'fields', fields, extra_dims=1, fill=np.inf, meta={'cells': [[1, 2]]})
+    assert np.array_equal(layer[4, 5], fields[:, 4, 5])
+    assert TiledGrid(get_store_dir(map_path), 'fields').meta == {'cells': [[1, 2]]}
+    assert delete_layer(map_path, 'fields')
+    assert not has_layer(map_path, 'fields')
+    assert not delete_layer(map_path, 'fields')
+
+
+def test_concurrent_layer_writes_keep_every_index_entry(workdir):
+    map_path = "data/NPZ-output/grid.npz"
+    write_layer(map_path, 'obstacle_grid', np.zeros((50, 50), dtype=bool), fill=False)
+    layers = [f"layer_{i}" for i in range(16)]
+    threads = [
+        threading.Thread(target=write_layer, args=(map_path, layer, np.full((50, 50), i, dtype=np.int32)))
+        for i, layer in enumerate(layers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(has_layer(map_path, layer) for layer in layers)
+
+
+def test_atomic_write_leaves_no_temporary_file(workdir):
+    atomic_write("file.bin", b"first")
+    atomic_write("file.bin", b"second")
+    # Écriture qui échoue : l'ancien contenu reste en place
+    with pytest.raises(TypeError):
+        atomic_write("file.bin", None)
+    with open("file.bin", 'rb') as f:
+        assert f.read() == b"second"
+    assert [name for name in os.listdir(".") if name.startswith("file.bin")] == ["file.bin"]
+
+
+def test_legacy_map_is_migrated_once(workdir):
+    map_path = "data/NPZ-output/legacy.npz"
+    grid = np.zeros((30, 40), dtype=bool)
+    grid[:, 20] = True
+    np.savez(map_path, obstacle_grid=grid, min_x=0.0, max_x=2.0, min_y=0.0, max_y=1.5)
+
+    assert np.array_equal(open_layer(map_path).to_array(), grid)
+    with np.load(map_path) as npz:
+        assert 'obstacle_grid' not in npz.files
+    labels = get_component_labels(map_path)
+    assert labels[0, 0] != labels[0, 39]
+
+    # Une carte migrée n'est plus relue pour le savoir
+    os.remove(map_path)
+    assert migrate_map_to_tiles(map_path) is False
+
+
+def test_obstacle_array_is_cached_until_the_grid_changes(make_map):
+    _, path = make_map(two_rooms())
+    grid = get_obstacle_array(path)
+    assert get_obstacle_array(path) is grid
+    assert not grid.flags.writeable
+
+    assert add_obstacle_to_map(path, [cell_point(2, 2), cell_point(2, 8)])
+    edited = get_obstacle_array(path)
+    assert edited is not grid and edited[5, 2] and not grid[5, 2]
+    assert np.array_equal(edited, open_layer(path).to_array())
+
+    # La compaction ne change pas le contenu de la grille
+    compact_journal(path)
+    assert np.array_equal(get_obstacle_array(path), edited)
@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+
+from backend.grid_store import open_layer, has_layer
+from backend.pathfinding import a_star, landmarks as landmarks_module
+from backend.pathfinding.a_star import astar_pathfinding
+from backend.pathfinding.components import compute_component_labels
+from backend.pathfinding.landmarks import (
+    LANDMARK_LAYER, compute_landmarks, load_landmarks, store_landmarks, invalidate_landmarks,
+    wait_for_landmark_updates
+)
+from backend.utils import add_obstacle_to_map, get_landmarks
+from conftest import cell_point, path_cost, random_grid, reference_distances, two_rooms
+
+
+def maze(seed):
+    return random_grid(seed, height=30, width=40, density=0.25)
+
+
+def test_fields_match_dijkstra():
+    grid = maze(1)
+    cells, fields = compute_landmarks(grid, compute_component_labels(grid), count=4)
+    assert fields.shape == (len(cells),) + grid.shape
+    for (x, y), field in zip(cells, fields):
+        expected = reference_distances(grid, [(int(x), int(y))])
+        assert np.allclose(field, expected.astype(np.float32))
+
+
+def test_landmark_heuristic_keeps_paths_shortest():
+    grid = maze(2)
+    _, fields = compute_landmarks(grid, compute_component_labels(grid))
+    distances = reference_distances(grid, [(0, 0)])
+    reachable = np.argwhere(np.isfinite(distances))
+    for y, x in reachable[np.random.default_rng(2).choice(len(reachable), 15)]:
+        path = astar_pathfinding(grid, (0, 0), (int(x), int(y)), landmarks=fields)
+        assert abs(path_cost(path) - distances[y, x]) < 1e-4
+
+
+def test_landmarks_expand_fewer_nodes_and_finish_faster(monkeypatch):
+    grid = random_grid(5, height=60, width=80, density=0.3)
+    _, fields = compute_landmarks(grid, compute_component_labels(grid))
+    distances = reference_distances(grid, [(0, 0)])
+    reachable = np.argwhere(np.isfinite(distances))
+    ends = [(int(x), int(y)) for y, x in reachable[np.random.default_rng(5).choice(len(reachable), 20)]]
+
+    expansions = {}
+    get_neighbors = a_star.get_neighbors
+
+    def counting_neighbors(*args):
+        expansions[mode] += 1
+        return get_neighbors(*args)
+
+    monkeypatch.setattr(a_star, 'get_neighbors', counting_neighbors)
+    durations, costs = {}, {}
+    for mode, heuristic in (('euclidean', None), ('alt', fields)):
+        # Meilleur de trois passes, pour ne pas dépendre de la charge de la machine
+        runs = []
+        for _ in range(3):
+            expansions[mode] = 0
+            started = time.perf_counter()
+            costs[mode] = [path_cost(astar_pathfinding(grid, (0, 0), end, landmarks=heuristic)) for end in ends]
+            runs.append(time.perf_counter() - started)
+        durations[mode] = min(runs)
+
+    assert np.allclose(costs['alt'], costs['euclidean'])
+    assert expansions['alt'] < expansions['euclidean'] / 2
+    assert durations['alt'] < durations['euclidean']
+
+
+def test_loaded_fields_are_cached_until_rewritten(make_map, monkeypatch):
+    grid = maze(4)
+    _, path = make_map(grid)
+    assert load_landmarks(path) is None
+    assert store_landmarks(path, count=3)
+
+    fields = get_landmarks(path)
+    assert fields.dtype == np.float32 and not fields.flags.writeable
+    assert np.array_equal(fields, open_layer(path, LANDMARK_LAYER).to_array())
+    assert get_landmarks(path) is fields
+
+    # Un obstacle ajouté change les distances : la couche est réécrite sur place
+    assert add_obstacle_to_map(path, [cell_point(10, 0), cell_point(10, 29)])
+    wait_for_landmark_updates()
+    updated = load_landmarks(path)
+    assert updated is not fields
+    assert np.array_equal(updated, open_layer(path, LANDMARK_LAYER).to_array())
+
+    monkeypatch.setattr(landmarks_module, 'schedule_landmark_update', lambda map_path: None)
+    invalidate_landmarks(path)
+    assert load_landmarks(path) is None
+
+
+def test_stored_layer_is_read_by_cell(make_map):
+    grid = maze(3)
+    _, path = make_map(grid)
+    assert store_landmarks(path, count=3)
+    layer = open_layer(path, LANDMARK_LAYER)
+    cells, fields = compute_landmarks(grid, compute_component_labels(grid), count=3)
+    assert layer.meta['cells'] == cells.tolist()
+    assert np.array_equal(layer[..., 5, 7], fields[:, 5, 7])
+    end = (int(cells[0][0]), int(cells[0][1]))
+    path = astar_pathfinding(grid, (0, 0), end, landmarks=layer)
+    assert abs(path_cost(path) - fields[0, 0, 0]) < 1e-4
+
+
+def test_stale_fields_are_not_written(make_map, monkeypatch):
+    _, path = make_map(two_rooms())
+    compute = landmarks_module.compute_landmarks
+
+    def compute_during_edit(*args, **kwargs):
+        # Obstacle ajouté pendant le calcul, comme par une requête concurrente
+        assert add_obstacle_to_map(path, [cell_point(0, 0), cell_point(0, 9)])
+        return compute(*args, **kwargs)
+
+    monkeypatch.setattr(landmarks_module, 'compute_landmarks', compute_during_edit)
+    assert not store_landmarks(path)
+    monkeypatch.setattr(landmarks_module, 'compute_landmarks', compute)
+    wait_for_landmark_updates()
+
+    # Le calcul programmé par l'édition part de la nouvelle grille
+    layer = open_layer(path, LANDMARK_LAYER)
+    grid = open_layer(path, 'obstacle_grid').to_array()
+    cells, fields = compute_landmarks(grid, compute_component_labels(grid), previous=layer.meta['cells'])
+    assert np.allclose(layer.to_array(), fields)
+
+
+def test_invalidate_deletes_layer(make_map, monkeypatch):
+    _, path = make_map(two_rooms())
+    assert store_landmarks(path, count=2)
+    monkeypatch.setattr(landmarks_module, 'schedule_landmark_update', lambda map_path: None)
+    invalidate_landmarks(path)
+    assert not has_layer(path, LANDMARK_LAYER)
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.image import imread
+
+from backend.load_test import check_map_integrity, main, make_synthetic_grid, seed_maps
+from backend.utils import add_new_path_to_map
+from backend.viewer import generate_plot_preview
+
+
+def test_seeded_map_passes_integrity_check(workdir):
+    maps = seed_maps(np.random.default_rng(0), 1, 60, 80)
+    map_path = "data/NPZ-output/load_test_0.npz"
+    assert check_map_integrity(map_path) == []
+
+    # POI confirmé mais absent, et chemin sans point d'arrivée
+    free = np.argwhere(~maps['load_test_0']['grid'])
+    y, x = free[0]
+    assert add_new_path_to_map(map_path, [(int(x), int(y))], "path_to_fantome")
+    issues = check_map_integrity(map_path, expected_pois=['perdu'])
+    assert any('perdu' in issue for issue in issues)
+    assert any('orphelin' in issue for issue in issues)
+
+
+def test_synthetic_grid_has_walls_and_free_space():
+    grid = make_synthetic_grid(np.random.default_rng(1), 50, 70, obstacle_count=5)
+    assert grid.shape == (50, 70)
+    assert grid.any() and (~grid).any()
+
+
+def test_load_test_run_is_clean(tmp_path, capsys):
+    workdir = tmp_path / "load"
+    code = main(['--requests', '40', '--concurrency', '4', '--maps', '1', '--grid-size', '60', '80',
+                 '--workdir', str(workdir),
+                 '--mix', 'viewer=30,add_poi=30,delete_poi=15,add_obstacle=25'])
+    report = capsys.readouterr().out
+    assert code == 0, report
+
+
+def test_previews_render_concurrently(tmp_path):
+    grids = [make_synthetic_grid(np.random.default_rng(i), 40, 60, obstacle_count=3) for i in range(8)]
+    outputs = [str(tmp_path / f"preview_{i}.png") for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda args: generate_plot_preview(args[0], (0, 3, 0, 2), args[1]), zip(grids, outputs)))
+    assert all(imread(output).size > 0 for output in outputs)
@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+
+from backend import obstacle_journal
+from backend.grid_store import TiledGrid, delete_store, get_store_dir, open_layer, has_layer
+from backend.obstacle_journal import (
+    COMPACTION_THRESHOLD, EDIT_ADD, HISTORY_LIMIT, JOURNAL_FILE, append_edit, compact_journal,
+    get_history, read_journal, wait_for_compaction
+)
+from backend.pathfinding.landmarks import LANDMARK_LAYER, store_landmarks
+from backend.utils import add_obstacle_to_map, undo_last_obstacle
+from conftest import cell_point, two_rooms
+
+
+def base_grid(path):
+    # Tuiles seules, sans rejouer le journal
+    return TiledGrid(get_store_dir(path), 'obstacle_grid').to_array()
+
+
+def test_edits_are_replayed_without_rewriting_tiles(make_map):
+    _, path = make_map(np.zeros((10, 12), dtype=bool))
+    assert add_obstacle_to_map(path, [cell_point(2, 3), cell_point(6, 3)])
+
+    records = read_journal(path)
+    assert len(records) == 1
+    assert records[0]['kind'] == EDIT_ADD
+    assert sorted(records[0]['cols'].tolist()) == [2, 3, 4, 5, 6]
+    assert set(records[0]['rows'].tolist()) == {3}
+
+    assert not base_grid(path).any()
+    grid = open_layer(path, 'obstacle_grid').to_array()
+    assert grid[3, 2:7].all() and grid.sum() == 5
+
+
+def test_only_changed_cells_are_recorded(make_map):
+    _, path = make_map(two_rooms())
+    assert add_obstacle_to_map(path, [cell_point(13, 5), cell_point(17, 5)])
+    # La colonne 15 était déjà un mur
+    assert sorted(read_journal(path)[0]['cols'].tolist()) == [13, 14, 16, 17]
+    # Un obstacle déjà présent n'ajoute pas d'édition
+    assert add_obstacle_to_map(path, [cell_point(13, 5), cell_point(17, 5)])
+    assert len(read_journal(path)) == 1
+
+
+def test_undo_is_last_in_first_out(make_map):
+    _, path = make_map(two_rooms())
+    assert add_obstacle_to_map(path, [cell_point(2, 2), cell_point(2, 8)])
+    first_id = read_journal(path)[-1]['id']
+    # Mur en travers de la pièce de gauche, qui est coupée en deux
+    assert add_obstacle_to_map(path, [cell_point(0, 10), cell_point(14, 10)])
+    second_id = read_journal(path)[-1]['id']
+    labels = open_layer(path, 'component_labels').to_array()
+    assert labels[0, 0] != labels[19, 0]
+
+    assert undo_last_obstacle(path) == second_id
+    grid = open_layer(path, 'obstacle_grid').to_array()
+    assert not grid[10, :15].any() and grid[2:9, 2].all()
+    labels = open_layer(path, 'component_labels').to_array()
+    assert labels[0, 0] == labels[19, 0]
+
+    assert undo_last_obstacle(path) == first_id
+    assert not open_layer(path, 'obstacle_grid').to_array()[:, :15].any()
+    assert undo_last_obstacle(path) is None
+
+
+def test_undo_invalidates_landmarks(make_map, monkeypatch):
+    _, path = make_map(two_rooms())
+    assert add_obstacle_to_map(path, [cell_point(2, 2), cell_point(2, 8)])
+    assert store_landmarks(path, count=2)
+    monkeypatch.setattr('backend.pathfinding.landmarks.schedule_landmark_update', lambda map_path: None)
+    undo_last_obstacle(path)
+    assert not has_layer(path, LANDMARK_LAYER)
+
+
+def test_history(make_map):
+    _, path = make_map(two_rooms())
+    assert add_obstacle_to_map(path, [cell_point(2, 2), cell_point(2, 4)])
+    assert add_obstacle_to_map(path, [cell_point(5, 2), cell_point(5, 5)])
+    undone = undo_last_obstacle(path)
+
+    history = get_history(path)
+    assert [entry['kind'] for entry in history] == ['add', 'add', 'undo']
+    assert [entry['cells'] for entry in history] == [3, 4, 4]
+    assert [entry['undone'] for entry in history] == [False, True, False]
+    assert history[0]['target'] is None and history[2]['target'] == undone
+
+
+def test_truncated_record_is_ignored(make_map):
+    _, path = make_map(two_rooms())
+    assert add_obstacle_to_map(path, [cell_point(2, 2), cell_point(2, 4)])
+    with open(os.path.join(get_store_dir(path), JOURNAL_FILE), 'ab') as f:
+        f.write(b'\x02\x00\x00\x00\x00\x00')
+    assert len(read_journal(path)) == 1
+    assert open_layer(path, 'obstacle_grid').to_array()[2:5, 2].all()
+
+
+def test_only_the_appended_tail_is_decoded(make_map, monkeypatch):
+    _, path = make_map(np.zeros((20, 20), dtype=bool))
+    monkeypatch.setattr(obstacle_journal, 'schedule_compaction', lambda map_path: None)
+    decoded = []
+    decode = obstacle_journal._decode_records
+
+    def counting_decode(raw):
+        decoded.append(len(raw))
+        return decode(raw)
+
+    monkeypatch.setattr(obstacle_journal, '_decode_records', counting_decode)
+    append_edit(path, EDIT_ADD, np.array([1, 2]), np.array([3, 4]))
+    assert len(read_journal(path)) == 1
+    full = decoded[-1]
+
+    append_edit(path, EDIT_ADD, np.array([5]), np.array([6]))
+    open_layer(path, 'obstacle_grid')
+    records = read_journal(path)
+    assert [record['id'] for record in records] == [1, 2]
+    # Seule la nouvelle entrée (une case) a été décodée, et une relecture ne décode rien
+    assert decoded[-2:] == [full - 8, 0]
+    assert not records[0]['rows'].flags.writeable
+
+    # Un stockage supprimé puis recréé repart d'un journal vide
+    delete_store(path)
+    assert read_journal(path) == []
+
+
+def test_compaction_folds_edits_into_tiles(make_map):
+    _, path = make_map(np.zeros((20, 20), dtype=bool))
+    for y in range(COMPACTION_THRESHOLD):
+        append_edit(path, EDIT_ADD, np.array([y]), np.array([y]))
+    assert wait_for_compaction()
+
+    expected = np.eye(20, dtype=bool)
+    expected[COMPACTION_THRESHOLD:] = False
+    assert np.array_equal(base_grid(path), expected)
+    assert np.array_equal(open_layer(path, 'obstacle_grid').to_array(), expected)
+    # Les éditions restent dans le journal pour l'historique et l'annulation
+    assert len(get_history(path)) == COMPACTION_THRESHOLD
+    # Rejouer une édition déjà intégrée ne change rien
+    assert compact_journal(path) == 0
+    assert np.array_equal(base_grid(path), expected)
+
+
+def test_compaction_trims_history(make_map, monkeypatch):
+    _, path = make_map(np.zeros((20, 20), dtype=bool))
+    monkeypatch.setattr(obstacle_journal, 'schedule_compaction', lambda map_path: None)
+    for i in range(HISTORY_LIMIT + 10):
+        append_edit(path, EDIT_ADD, np.array([i % 20]), np.array([i // 20]))
+    assert compact_journal(path) == HISTORY_LIMIT + 10
+
+    records = read_journal(path)
+    assert len(records) == HISTORY_LIMIT
+    assert records[0]['id'] == 11 and records[-1]['id'] == HISTORY_LIMIT + 10
+    assert base_grid(path).sum() == HISTORY_LIMIT + 10
+    # Les nouvelles éditions continuent la numérotation
+    assert append_edit(path, EDIT_ADD, np.array([0]), np.array([19])) == HISTORY_LIMIT + 11
+    assert [record['id'] for record in read_journal(path)[-2:]] == [HISTORY_LIMIT + 10, HISTORY_LIMIT + 11]
+    # Aucun fichier temporaire ne reste après les réécritures
+    assert not [name for name in os.listdir(get_store_dir(path)) if name.endswith('.tmp')]
+
+
+def test_undo_and_history_routes(client, make_map):
+    name, path = make_map(two_rooms())
+    assert client.post(f'/undo_obstacle/{name}').get_json()['success'] is False
+
+    response = client.post(f'/add_obstacle/{name}', json={'points': [cell_point(2, 2), cell_point(2, 4)]})
+    assert response.get_json()['success']
+    edit_id = read_journal(path)[-1]['id']
+
+    assert client.post(f'/undo_obstacle/{name}').get_json() == {'success': True, 'undone': edit_id}
+    history = client.get(f'/obstacle_history/{name}').get_json()['history']
+    assert [(entry['kind'], entry['undone']) for entry in history] == [('add', True), ('undo', False)]
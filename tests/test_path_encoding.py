@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from backend.path_encoding import decode_path, decode_paths, encode_path, pack_paths, unpack_paths
+from backend.pathfinding.a_star import astar_pathfinding
+from backend.utils import add_new_path_to_map, add_poi_to_map, delete_poi_from_map, load_map_data
+
+
+def random_walk(seed, length):
+    rng = np.random.default_rng(seed)
+    steps = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy])
+    return np.cumsum(np.vstack([[(100, 100)], steps[rng.integers(8, size=length)]]), axis=0)
+
+
+def test_encode_decode_round_trip():
+    path = random_walk(0, 500)
+    start, codes = encode_path(path)
+    assert codes.max() < 8
+    assert np.array_equal(decode_path(start, codes), path)
+
+
+def test_single_cell_path():
+    start, codes = encode_path([(4, 5)])
+    assert start == (4, 5) and len(codes) == 0
+    assert decode_path(start, codes).tolist() == [[4, 5]]
+
+
+@pytest.mark.parametrize('points', [[(0, 0), (2, 0)], [(0, 0), (0, 0)]])
+def test_invalid_steps_are_rejected(points):
+    with pytest.raises(ValueError):
+        encode_path(points)
+
+
+def test_packed_paths_take_three_bits_per_step():
+    paths = {f"path_to_{i}": random_walk(i, 100 + 50 * i) for i in range(5)}
+    packed = pack_paths({name: encode_path(path) for name, path in paths.items()})
+    steps = sum(len(path) - 1 for path in paths.values())
+    assert packed['path_codes'].nbytes == -(-3 * steps // 8)
+    assert all(array.dtype != object for array in packed.values())
+
+    decoded = decode_paths(packed)
+    assert list(decoded) == list(paths)
+    for name, path in paths.items():
+        assert np.array_equal(decoded[name], path)
+        start, codes = unpack_paths(packed)[name]
+        assert np.array_equal(decode_path(start, codes), path)
+
+
+def test_paths_are_stored_without_pickle(make_map):
+    grid = np.zeros((30, 30), dtype=bool)
+    grid[5:25, 15] = True
+    _, map_path = make_map(grid, start=(2, 15))
+    assert add_poi_to_map(map_path, 28.0, 15.0, 'end', 'B')
+    path = astar_pathfinding(grid, (2, 15), (28, 15))
+    assert add_new_path_to_map(map_path, path, "path_to_B")
+
+    with np.load(map_path) as npz:
+        assert [tuple(p) for p in decode_paths(npz)['path_to_B']] == path
+
+    assert delete_poi_from_map(map_path, "B")
+    assert decode_paths(load_map_data(map_path)) == {}
+
+
+def test_legacy_pickled_paths_are_converted(workdir):
+    map_path = "data/NPZ-output/legacy.npz"
+    legacy = {'path_to_A': {'x': np.array([0.0, 1.0, 2.0]), 'y': np.array([0.0, 1.0, 1.0])}}
+    np.savez(map_path, min_x=0.0, max_x=1.0, min_y=0.0, max_y=1.0, paths=np.array(legacy, dtype=object))
+
+    data = load_map_data(map_path)
+    assert 'paths' not in data
+    assert decode_paths(data)['path_to_A'].tolist() == [[0, 0], [1, 1], [2, 1]]
+    # Le fichier converti se relit sans pickle
+    with np.load(map_path) as npz:
+        assert 'paths' not in npz.files
@@ -0,0 +1,98 @@
+import io
+
+import numpy as np
+import pytest
+
+from backend.path_encoding import decode_paths
+from backend.poi_table import PoiTable
+from backend.utils import add_poi_to_map, get_poi_map, load_map_data, parse_poi_records
+from conftest import two_rooms
+
+
+def test_append_lookup_delete_and_rename():
+    table = PoiTable(capacity=2)
+    for i in range(10):
+        table.append(f"p{i}", 'end', i, 2 * i)
+    assert len(table) == 10 and 'p7' in table
+    assert table.get('p7') == {'name': 'p7', 'type': 'end', 'x': 7.0, 'y': 14.0}
+
+    assert table.delete('p3')['name'] == 'p3'
+    assert table.delete('p3') is None
+    assert table.get('p9')['x'] == 9.0
+    assert table.rename('p9', 'last')
+    assert table.get('last')['y'] == 18.0 and table.get('p9') is None
+    with pytest.raises(ValueError):
+        table.rename('p1', 'last')
+    with pytest.raises(ValueError):
+        table.append('p1', 'end', 0, 0)
+
+
+def test_round_trip_keeps_long_names():
+    name = "Quai de chargement n°12 — zone frigorifique, allée B, niveau 3"
+    table = PoiTable()
+    table.append(name, 'start', 1.5, 2.5)
+    table.append('Arrivée', 'end', 3, 4)
+    restored = PoiTable.from_npz(table.to_npz({}))
+    assert restored.records() == table.records()
+    assert restored.get(name)['type'] == 'start'
+    assert restored.first_of_type('end')['name'] == 'Arrivée'
+
+
+def test_legacy_name_column_is_read_and_rewritten(workdir):
+    map_path = "data/NPZ-output/legacy.npz"
+    np.savez(map_path, obstacle_grid=np.zeros((10, 10), dtype=bool), min_x=0.0, max_x=1.0, min_y=0.0, max_y=1.0,
+             poi_names=np.array(['Départ'], dtype='<U50'), poi_types=np.array(['start'], dtype='<U10'),
+             poi_x=np.array([1.0]), poi_y=np.array([2.0]))
+    assert get_poi_map(map_path) == [{'name': 'Départ', 'type': 'start', 'x': 1.0, 'y': 2.0}]
+
+    assert add_poi_to_map(map_path, 3.0, 3.0, 'end', 'Arrivée')
+    data = load_map_data(map_path)
+    assert 'poi_names' not in data and 'poi_name_bytes' in data
+    assert [poi['name'] for poi in get_poi_map(map_path)] == ['Départ', 'Arrivée']
+
+
+def test_parse_csv_and_json():
+    csv_content = "name,type,x,y\nA,end,1,2\nB,start,3.5,4\n"
+    assert parse_poi_records(csv_content, 'pois.csv') == [
+        {'name': 'A', 'type': 'end', 'x': 1.0, 'y': 2.0},
+        {'name': 'B', 'type': 'start', 'x': 3.5, 'y': 4.0}
+    ]
+    assert parse_poi_records('{"pois": [{"name": "A", "type": "end", "x": 1, "y": 2}]}')[0]['x'] == 1.0
+    with pytest.raises(ValueError):
+        parse_poi_records([{'name': 'A', 'type': 'parking', 'x': 1, 'y': 2}])
+    with pytest.raises(ValueError):
+        parse_poi_records([{'name': 'A', 'type': 'end', 'x': 'loin', 'y': 2}])
+
+
+def test_bulk_import_validates_and_routes(make_map, client):
+    name, path = make_map(two_rooms(), start=(2, 2))
+    response = client.post(f'/import_pois/{name}', json={'compute_routes': True, 'pois': [
+        {'name': 'A', 'type': 'end', 'x': 10, 'y': 10},
+        {'name': 'B', 'type': 'end', 'x': 5, 'y': 18},
+        {'name': 'Départ', 'type': 'end', 'x': 4, 'y': 4},
+        {'name': 'Mur', 'type': 'end', 'x': 15, 'y': 3},
+        {'name': 'Autre pièce', 'type': 'end', 'x': 25, 'y': 3},
+        {'name': 'Second départ', 'type': 'start', 'x': 1, 'y': 1}
+    ]}).get_json()
+
+    assert response['success'] is True
+    assert response['imported'] == 2 and response['routes'] == 2
+    reasons = {item['name']: item['reason'] for item in response['rejected']}
+    assert reasons == {'Départ': 'duplicate', 'Mur': 'obstacle', 'Autre pièce': 'unreachable',
+                       'Second départ': 'start_exists'}
+    assert [poi['name'] for poi in get_poi_map(path)] == ['Départ', 'A', 'B']
+    paths = decode_paths(load_map_data(path))
+    assert set(paths) == {'path_to_A', 'path_to_B'}
+    assert tuple(paths['path_to_B'][0]) == (2, 2) and tuple(paths['path_to_B'][-1]) == (5, 18)
+
+
+def test_bulk_import_from_csv_file(make_map, client):
+    name, path = make_map(two_rooms())
+    content = b"name,type,x,y\nD,start,1,1\nE,end,20,5\n"
+    response = client.post(f'/import_pois/{name}', data={'poi_file': (io.BytesIO(content), 'pois.csv')},
+                           content_type='multipart/form-data').get_json()
+    assert response['imported'] == 2 and response['routes'] == 0
+    assert [poi['type'] for poi in get_poi_map(path)] == ['start', 'end']
+
+    response = client.post(f'/import_pois/{name}', json={'pois': [{'name': 'X'}]})
+    assert response.status_code == 400
@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+from backend import profiling
+
+
+def profile_files(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_profile_header_is_ignored_by_default(client):
+    response = client.get('/maps_list', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    assert profile_files("data/profiles") == []
+
+
+def test_profile_header_when_enabled(app, client):
+    app.config['PROFILING_HEADER_ENABLED'] = True
+    response = client.get('/maps_list', headers={'X-Profile': '1'})
+    base = os.path.join("data/profiles", response.headers['X-Profile-Id'])
+    for extension in ('.prof', '.folded', '.json'):
+        assert os.path.exists(base + extension)
+    with open(base + ".json") as f:
+        assert json.load(f)['endpoint'] == 'main.maps_list'
+
+
+def test_profile_header_in_debug_mode(app, client):
+    app.debug = True
+    assert 'X-Profile-Id' in client.get('/maps_list', headers={'X-Profile': '1'}).headers
+
+
+def test_sampled_fast_requests_are_not_kept(app, client):
+    app.config.update(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_THRESHOLD=60.0)
+    assert 'X-Profile-Id' not in client.get('/maps_list').headers
+    app.config['PROFILING_SLOW_THRESHOLD'] = 0.0
+    assert 'X-Profile-Id' in client.get('/maps_list').headers
+
+
+def test_size_cap_removes_oldest_profiles(tmp_path):
+    for i in range(3):
+        for extension in ('.prof', '.json'):
+            (tmp_path / f"profile_{i}{extension}").write_bytes(b"x" * 100)
+        stamp = time.time() - 100 + i
+        for extension in ('.prof', '.json'):
+            os.utime(tmp_path / f"profile_{i}{extension}", (stamp, stamp))
+
+    assert profiling.enforce_size_cap(str(tmp_path), 250) == 2
+    assert sorted(os.listdir(tmp_path)) == ['profile_2.json', 'profile_2.prof']
+
+
+def test_only_one_request_is_profiled_at_a_time():
+    first = profiling.start_request_profile()
+    try:
+        assert profiling.start_request_profile() is None
+    finally:
+        profiling.finish_request_profile(first)
+    second = profiling.start_request_profile()
+    assert second is not None
+    profiling.finish_request_profile(second)
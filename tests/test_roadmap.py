@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+
+from backend import metrics
+from backend.grid_store import get_store_dir, open_layer
+from backend.pathfinding import roadmap as roadmap_module
+from backend.pathfinding.roadmap import (
+    ROADMAP_FILE, Roadmap, build_roadmap, connect_skeleton, has_roadmap, load_roadmap, medial_axis, store_roadmap,
+    wait_for_roadmap_updates
+)
+from backend.utils import add_obstacle_to_map, undo_last_obstacle
+from conftest import assert_valid_path, two_rooms
+
+
+def warehouse(height=60, width=80):
+    # Murs extérieurs, rangées de racks et une allée transversale
+    grid = np.zeros((height, width), dtype=bool)
+    grid[[0, -1], :] = True
+    grid[:, [0, -1]] = True
+    for x in range(8, width - 8, 10):
+        grid[6:height // 2 - 3, x:x + 3] = True
+        grid[height // 2 + 3:height - 6, x:x + 3] = True
+    return grid
+
+
+def test_roadmap_connects_free_cells():
+    grid = warehouse()
+    roadmap = Roadmap(build_roadmap(grid, connect_skeleton(grid, medial_axis(grid))))
+    free = np.argwhere(~grid)
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        (y0, x0), (y1, x1) = free[rng.choice(len(free), 2)]
+        start, end = (int(x0), int(y0)), (int(x1), int(y1))
+        path = roadmap.query(grid, start, end)
+        assert path is not None
+        assert_valid_path(grid, path, start, end)
+
+
+def test_query_on_unconnected_cells_misses():
+    grid = two_rooms()
+    roadmap = Roadmap(build_roadmap(grid, connect_skeleton(grid, medial_axis(grid))))
+    assert roadmap.query(grid, (2, 2), (25, 2)) is None
+
+
+def test_roadmap_is_opt_in(client, make_map):
+    name, path = make_map(warehouse(), start=(3, 3))
+    response = client.post(f'/add_poi/{name}', json={'x': 75, 'y': 55, 'type': 'end', 'name': 'Quai'})
+    assert response.get_json()['success']
+    assert add_obstacle_to_map(path, [{'x': 2.0, 'y': 1.5}, {'x': 2.5, 'y': 1.5}])
+    wait_for_roadmap_updates()
+    # Ni les requêtes ni les éditions ne calculent de roadmap tant qu'elle est désactivée
+    assert not os.path.exists(os.path.join(get_store_dir(path), ROADMAP_FILE))
+
+
+def test_edits_schedule_updates_only_for_an_existing_roadmap(make_map, monkeypatch):
+    _, path = make_map(warehouse())
+    scheduled = []
+    monkeypatch.setattr('backend.utils.schedule_roadmap_update', lambda map_path, rows, cols: scheduled.append(len(rows)))
+    assert add_obstacle_to_map(path, [{'x': 2.0, 'y': 1.5}, {'x': 2.5, 'y': 1.5}])
+    assert undo_last_obstacle(path)
+    assert scheduled == [] and not has_roadmap(path)
+
+    assert store_roadmap(path)
+    assert add_obstacle_to_map(path, [{'x': 2.0, 'y': 1.5}, {'x': 2.5, 'y': 1.5}])
+    assert undo_last_obstacle(path)
+    assert len(scheduled) == 2 and scheduled[0] == scheduled[1] > 0
+
+
+def test_falls_back_to_a_star_on_miss(app, make_map, monkeypatch):
+    app.config['ROADMAP_ENABLED'] = True
+    client = app.test_client()
+    name, path = make_map(warehouse(), start=(3, 3))
+    assert store_roadmap(path)
+    monkeypatch.setattr(Roadmap, 'query', lambda self, grid, start, end: None)
+
+    misses = metrics.snapshot()['counters'].get('roadmap.misses', 0)
+    response = client.post(f'/add_poi/{name}', json={'x': 75, 'y': 55, 'type': 'end', 'name': 'Quai'})
+    assert response.get_json()['success']
+    assert metrics.snapshot()['counters']['roadmap.misses'] == misses + 1
+
+
+def test_obstacle_edit_updates_roadmap(make_map):
+    grid = warehouse()
+    _, path = make_map(grid)
+    assert store_roadmap(path)
+    old = load_roadmap(path)
+    start, end = (3, 30), (76, 30)
+    assert old.query(grid, start, end) is not None
+
+    # Mur en travers de l'allée centrale, avec un passage en haut
+    assert add_obstacle_to_map(path, [{'x': 2.0, 'y': 0.5}, {'x': 2.0, 'y': 2.8}])
+    edited = open_layer(path, 'obstacle_grid').to_array()
+    stale = old.query(edited, start, end)
+    # Roadmap en retard : un chemin qui traverserait le nouveau mur est refusé
+    assert stale is None or not any(edited[y, x] for x, y in stale)
+
+    wait_for_roadmap_updates()
+    updated = load_roadmap(path)
+    assert updated is not old
+    route = updated.query(edited, start, end)
+    assert route is not None
+    assert_valid_path(edited, route, start, end)
+
+
+def test_stale_roadmap_is_not_written(make_map, monkeypatch):
+    _, path = make_map(warehouse())
+    build = roadmap_module.build_roadmap
+
+    def build_during_edit(grid, skeleton=None):
+        assert add_obstacle_to_map(path, [{'x': 2.0, 'y': 0.5}, {'x': 2.0, 'y': 2.8}])
+        return build(grid, skeleton)
+
+    monkeypatch.setattr(roadmap_module, 'build_roadmap', build_during_edit)
+    assert not store_roadmap(path)
+    monkeypatch.setattr(roadmap_module, 'build_roadmap', build)
+    assert not os.path.exists(os.path.join(get_store_dir(path), ROADMAP_FILE))
+    # Calcul reprogrammé, sur la grille modifiée
+    wait_for_roadmap_updates()
+    edited = open_layer(path, 'obstacle_grid').to_array()
+    skeleton = load_roadmap(path).skeleton
+    assert len(skeleton) and not edited[skeleton[:, 1], skeleton[:, 0]].any()
@@ -0,0 +1,68 @@
+import numpy as np
+from matplotlib.path import Path
+
+from backend.svg_convertor import fill_polygons_even_odd, svg_to_occupancy
+
+# Murs extérieurs (10 x 10 unités), un rack plein, un rack sans remplissage et un pilier troué
+SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">
+  <path d="M 0 0 L 10 0 L 10 10 L 0 10 Z" fill="none" stroke="black"/>
+  <path d="M 1 1 L 3 1 L 3 3 L 1 3 Z"/>
+  <path d="M 6 1 L 8 1 L 8 3 L 6 3 Z" style="fill: none; stroke: black"/>
+  <path d="M 1 5 L 5 5 L 5 9 L 1 9 Z M 2 6 L 4 6 L 4 8 L 2 8 Z"/>
+</svg>
+"""
+
+
+def cell_centres_inside(rings, shape):
+    # Référence : test pair-impair de matplotlib sur le centre de chaque case
+    height, width = shape
+    ys, xs = np.mgrid[0:height, 0:width]
+    centres = np.column_stack([xs.ravel() + 0.5, ys.ravel() + 0.5])
+    inside = np.zeros(height * width, dtype=bool)
+    for ring in rings:
+        inside ^= Path(ring).contains_points(centres)
+    return inside.reshape(shape)
+
+
+def test_even_odd_fill_matches_reference_on_random_polygons():
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 12))
+        radii = rng.uniform(5, 20, 12)
+        ring = np.column_stack([25 + radii * np.cos(angles), 25 + radii * np.sin(angles)])
+        hole = 25 + (ring - 25) * 0.3
+        grid = fill_polygons_even_odd(np.zeros((50, 50), dtype=bool), [ring, hole])
+        assert np.array_equal(grid, cell_centres_inside([ring, hole], grid.shape))
+
+
+def test_fill_keeps_existing_obstacles():
+    grid = np.zeros((10, 10), dtype=bool)
+    grid[0, 0] = True
+    fill_polygons_even_odd(grid, [np.array([[2, 2], [6, 2], [6, 6], [2, 6]])])
+    assert grid[0, 0]
+    assert grid[2:6, 2:6].all() and grid.sum() == 17
+
+
+def test_svg_fill_closed(workdir):
+    svg_path = workdir / "map.svg"
+    svg_path.write_text(SVG)
+    outline, _ = svg_to_occupancy(str(svg_path), resolution=10.0)
+    filled, _ = svg_to_occupancy(str(svg_path), resolution=10.0, fill_closed=True)
+
+    # Par défaut, seuls les contours sont des obstacles
+    assert not outline[20, 20]
+    # Rack plein rempli, rack sans remplissage et murs extérieurs laissés vides
+    assert filled[20, 20]
+    assert not filled[20, 70]
+    assert not filled[45, 50]
+    # Le trou du pilier reste libre
+    assert filled[55, 15] and not filled[70, 30]
+    assert np.array_equal(filled | outline, filled)
+
+
+def test_add_poi_rejects_point_on_obstacle(make_map, client):
+    grid = np.zeros((20, 20), dtype=bool)
+    grid[5:10, 5:10] = True
+    name, _ = make_map(grid, start=(0, 0))
+    response = client.post(f'/add_poi/{name}', json={'x': 7, 'y': 7, 'type': 'end', 'name': 'Dedans'})
+    assert response.get_json() == {'success': False, 'message': "Le point est placé sur un obstacle."}
@@ -0,0 +1,94 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend.pathfinding.a_star import PathfindingTimeout
+from backend.pathfinding.wavefront import multi_source_distances, nearest_sources
+from backend.utils import add_poi_to_map
+from conftest import random_grid, reference_distances, two_rooms
+
+
+def test_distances_match_dijkstra():
+    for seed in range(3):
+        grid = random_grid(seed, density=0.25)
+        free = np.argwhere(~grid)
+        sources = [(int(x), int(y)) for y, x in free[np.random.default_rng(seed).choice(len(free), 4, replace=False)]]
+        labels, distances = multi_source_distances(grid, sources)
+
+        fields = np.array([reference_distances(grid, [source]) for source in sources])
+        expected = fields.min(axis=0)
+        assert np.allclose(distances, expected, atol=1e-4)
+        reached = np.isfinite(expected)
+        assert np.array_equal(labels >= 0, reached)
+        # Chaque case est attribuée à une source à la distance minimale
+        ys, xs = np.nonzero(reached)
+        own = fields[labels[reached], ys, xs]
+        assert np.allclose(own, expected[reached], atol=1e-4)
+
+
+def test_ties_go_to_lowest_index():
+    grid = np.zeros((1, 5), dtype=bool)
+    labels, distances = multi_source_distances(grid, [(4, 0), (0, 0)])
+    assert labels[0].tolist() == [1, 1, 0, 0, 0]
+    labels, _ = multi_source_distances(grid, [(0, 0), (4, 0)])
+    assert labels[0].tolist() == [0, 0, 0, 1, 1]
+    # Deux sources sur la même case : la première la garde
+    labels, _ = multi_source_distances(grid, [(2, 0), (2, 0)])
+    assert (labels == 0).all()
+
+
+def test_invalid_sources_are_ignored():
+    grid = two_rooms()
+    labels, distances = multi_source_distances(grid, [(15, 0), (99, 0), (2, 2)])
+    assert set(np.unique(labels).tolist()) == {-1, 2}
+    assert np.isinf(distances[:, 16:]).all()
+
+
+def test_max_distance():
+    grid = np.zeros((10, 10), dtype=bool)
+    labels, distances = multi_source_distances(grid, [(0, 0)], max_distance=3.0)
+    assert distances[0, 3] == 3.0 and distances[2, 2] == pytest.approx(2.8)
+    assert np.isinf(distances[0, 4]) and labels[0, 4] == -1
+    assert distances[np.isfinite(distances)].max() <= 3.0
+
+
+def test_nearest_sources():
+    grid = two_rooms()
+    targets = [(0, 0), (29, 19), (15, 5)]
+    assert nearest_sources(grid, [(2, 2), (20, 2)], targets) == \
+        [(0, pytest.approx(2.8)), (1, pytest.approx(20.6)), (None, None)]
+    result, labels, distances = nearest_sources(grid, [(2, 2)], targets, return_fields=True)
+    assert result[1] == (None, None) and labels[19, 29] == -1 and np.isinf(distances[19, 29])
+
+
+def test_budget_and_cancel():
+    grid = np.zeros((300, 300), dtype=bool)
+    with pytest.raises(PathfindingTimeout):
+        multi_source_distances(grid, [(0, 0)], time_limit=0.0)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(PathfindingTimeout):
+        multi_source_distances(grid, [(0, 0)], cancel_event=cancel)
+
+
+def test_nearest_sources_route(client, make_map):
+    name, path = make_map(two_rooms())
+    assert add_poi_to_map(path, 2.0, 2.0, 'start', 'Gauche')
+    assert add_poi_to_map(path, 20.0, 2.0, 'start', 'Droite')
+    assert add_poi_to_map(path, 25.0, 2.0, 'end', 'Quai')
+    assert add_poi_to_map(path, 5.0, 2.0, 'end', 'Atelier')
+
+    body = client.post(f'/nearest_sources/{name}', json={'sources': ['Gauche', 'Droite']}).get_json()
+    assert body['success']
+    assert {result['target']: (result['source'], result['distance']) for result in body['results']} == \
+        {'Quai': ('Droite', 5.0), 'Atelier': ('Gauche', 3.0)}
+    assert body['coverage']['cells'] == [300, 280]
+
+    body = client.post(f'/nearest_sources/{name}', json={
+        'sources': [{'x': 2, 'y': 2}], 'targets': ['Quai'], 'max_distance': 10
+    }).get_json()
+    assert body['results'] == [{'target': 'Quai', 'source': None, 'source_index': None, 'distance': None}]
+
+    response = client.post(f'/nearest_sources/{name}', json={'sources': ['Inconnu']})
+    assert response.status_code == 400